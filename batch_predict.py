@@ -0,0 +1,302 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+from config.prompt_templates import DEFAULT_PROMPT_VARIANT, PROMPT_VARIANTS
+from config.usage_tracker import BudgetExceeded, parse_budget, usage_tracker
+from execution import resources
+from execution.staged_executor import StagedExecutor
+from indexing.artifact import is_artifact
+from ingestion.data_ingestion import ClaimReader, ClaimRecord, normalize_story_id
+from reasoning.escalation import STRONG_MODEL, parse_steps
+
+
+# --------------------------------------------------
+# Batch prediction over a JSONL request stream
+# --------------------------------------------------
+# Input, one JSON object per line:
+#   {"id": "...", "story": "The Count of Monte Cristo", "character": "Faria", "backstory": "..."}
+# ("story_id" / "char" are accepted as well.)
+#
+# Output, one JSON object per line, written as each row finishes
+# (not in input order; use "id" to match):
+#   {"id": "...", "label": "consistent", "prediction": 1, "explanation": "...", ...}
+#
+# With --prefork N the model and index are loaded once and N forked
+# workers share them (execution/prefork.py); add --listen HOST:PORT to
+# serve requests over a socket instead of reading --input.
+
+# Shared secret for --listen (multiprocessing.connection unpickles every
+# request, so the socket must never accept unauthenticated clients)
+LISTEN_AUTHKEY_ENV = "BATCH_PREDICT_AUTHKEY"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Stream claim requests (JSONL) through NarrativeConsistencyPipeline"
+    )
+    parser.add_argument("--input", default="-", help="JSONL request file, or - for stdin")
+    parser.add_argument("--output", default="-", help="JSONL result file, or - for stdout")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent LLM reasoning calls")
+    parser.add_argument("--retrieval-workers", type=int, default=None, help="Default from the CPU plan")
+    parser.add_argument("--queue-size", type=int, default=16, help="Bounded queue between stages")
+    parser.add_argument("--top-k", type=int, default=12)
+    parser.add_argument("--cores", type=int, default=None, help="CPU core budget (default: all available)")
+    parser.add_argument("--cpu-mode", default="batch", choices=resources.MODES)
+    parser.add_argument("--index-dir", default=None, help="Prebuilt index artifact to load")
+    parser.add_argument("--index-shards", default=None, help="Comma-separated host:port shard workers")
+    parser.add_argument("--dossiers", default=None, help="Character dossier file to consult first")
+    parser.add_argument("--budget", default=None, help="Hard LLM budget, e.g. tokens=2e6,cost=5")
+    parser.add_argument("--soft-budget", default=None, help="Soft LLM budget; throttles once reached")
+    parser.add_argument("--escalate", action="store_true", help="Retry UNCLEAR verdicts with more evidence")
+    parser.add_argument("--escalation-steps", default="4,8,12")
+    parser.add_argument("--strong-model", nargs="?", const=STRONG_MODEL, default=None)
+    parser.add_argument("--nli-cascade", action="store_true")
+    parser.add_argument("--structured-output", action="store_true")
+    parser.add_argument("--prompt-variant", default=DEFAULT_PROMPT_VARIANT, choices=sorted(PROMPT_VARIANTS))
+    parser.add_argument("--hierarchical", action="store_true")
+    parser.add_argument("--sentence-evidence", action="store_true")
+    parser.add_argument(
+        "--prefork",
+        type=int,
+        default=0,
+        help="Forked worker processes sharing one loaded model + index (0 = single process)",
+    )
+    parser.add_argument("--listen", default=None, help="HOST:PORT to serve requests on (needs --prefork)")
+    args = parser.parse_args()
+    if args.prefork and args.index_shards:
+        parser.error("--prefork loads the index locally; it cannot be combined with --index-shards")
+    if args.prefork and not is_artifact(args.index_dir):
+        # Building here would run multi-threaded encoding in the parent right before the fork
+        parser.error("--prefork needs a prebuilt --index-dir artifact (python -m indexing build --out DIR)")
+    if args.listen and not args.prefork:
+        parser.error("--listen needs --prefork N")
+    if args.listen and not os.environ.get(LISTEN_AUTHKEY_ENV):
+        parser.error(f"--listen needs a shared secret in {LISTEN_AUTHKEY_ENV}")
+    return args
+
+
+def timed(records, started: dict):
+    # Latency is measured from when a request enters the pipeline
+    for record in records:
+        started[record.row_index] = time.perf_counter()
+        yield record
+
+
+def to_output(record, result, started: dict) -> dict:
+    """
+    One JSONL result line; a failed row (row_errors) becomes an error line.
+    """
+    if "error" in result:
+        started.pop(record.row_index, None)
+        return {"id": record.id, "error": result["error"]}
+
+    return {
+        "id": record.id,
+        "story_id": record.story_id,
+        "char": record.char,
+        "label": result["label"],
+        # Same decision rule as final_test.py: no evidence cannot assert consistency
+        "prediction": int(result["label"] != "contradict" and result["num_evidence"] > 0),
+        "explanation": result["explanation"],
+        "num_evidence": result["num_evidence"],
+        "latency_s": round(time.perf_counter() - started.pop(record.row_index), 3),
+    }
+
+
+def run(args, out) -> None:
+    from pipeline import NarrativeConsistencyPipeline
+
+    source = sys.stdin if args.input == "-" else args.input
+    reader = ClaimReader(source, fmt="jsonl", buffer_size=args.queue_size)
+    usage_tracker.set_budgets(hard=parse_budget(args.budget), soft=parse_budget(args.soft_budget))
+    plan = resources.configure(args.cpu_mode, args.cores)
+    args.retrieval_workers = args.retrieval_workers or plan.retrieval_workers
+
+    pipeline = NarrativeConsistencyPipeline(
+        nli_cascade=args.nli_cascade,
+        structured_output=args.structured_output,
+        prompt_variant=args.prompt_variant,
+        hierarchical=args.hierarchical,
+        index_dir=args.index_dir,
+        index_shards=args.index_shards.split(",") if args.index_shards else None,
+        dossiers_path=args.dossiers,
+        escalation_steps=parse_steps(args.escalation_steps) if args.escalate else None,
+        strong_model=args.strong_model,
+        sentence_evidence=args.sentence_evidence,
+        plan=plan,
+    )
+
+    # Bounded queues between stages give backpressure: the reader never
+    # runs more than a few queue lengths ahead of the LLM calls. A failing
+    # row becomes an error line instead of stopping the stream.
+    executor = pipeline.make_executor(
+        args.top_k,
+        args.retrieval_workers,
+        args.concurrency,
+        queue_size=args.queue_size,
+        ordered=False,
+        row_errors=True,
+    )
+
+    done_count = 0
+    errors = 0
+    started = {}
+
+    for _, (record, _evidence, result) in usage_tracker.until_budget(executor.run(timed(reader, started))):
+        row = to_output(record, result, started)
+        errors += "error" in row
+        done_count += 1
+        out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        out.flush()
+
+    reader.close()
+    print(f"Processed {done_count} requests ({errors} errors)")
+    print(executor.summary())
+    if pipeline.escalation is not None:
+        print(pipeline.escalation.summary())
+    print(usage_tracker.summary())
+
+
+# --------------------------------------------------
+# Pre-forked workers
+# --------------------------------------------------
+def _split_budget(budget, n: int):
+    # Each worker tracks its own usage, so it gets an equal share
+    return {key: value / n for key, value in budget.items()} if budget else budget
+
+
+class PipelineWorker:
+    """
+    One forked worker: its own pipeline (LLM client, reasoner) around
+    the index shared with the parent.
+    """
+
+    def __init__(self, pipeline, args):
+        self.pipeline = pipeline
+        self.args = args
+        self.stages = pipeline.stages(args.top_k, args.retrieval_workers, args.concurrency, row_errors=True)
+        self.executor = None
+        self.requests = 0
+        self.started = {}
+
+    def stream(self, records):
+        self.executor = StagedExecutor(self.stages, queue_size=self.args.queue_size, ordered=False)
+        for _, (record, _evidence, result) in usage_tracker.until_budget(
+            self.executor.run(timed(records, self.started))
+        ):
+            yield to_output(record, result, self.started)
+
+    def handle(self, request) -> dict:
+        self.requests += 1
+        record = ClaimRecord(
+            row_index=self.requests,
+            id=str(request.get("id", self.requests)),
+            story_id=normalize_story_id(request.get("story_id") or request.get("story") or ""),
+            backstory=request.get("backstory", ""),
+            char=request.get("char") or request.get("character") or "",
+        )
+        retrieval, reasoning = self.stages
+        self.started[record.row_index] = time.perf_counter()
+        try:
+            _, _evidence, result = reasoning.fn(retrieval.fn(record))
+            return to_output(record, result, self.started)
+        except BudgetExceeded as e:
+            self.started.pop(record.row_index, None)
+            return {"id": record.id, "error": f"BudgetExceeded: {e}"}
+
+    def finish(self) -> dict:
+        lines = [self.executor.summary()] if self.executor is not None else []
+        if self.pipeline.escalation is not None:
+            lines.append(self.pipeline.escalation.summary())
+        return {
+            "usage": usage_tracker.state(),
+            "stopped": str(usage_tracker.stopped) if usage_tracker.stopped else None,
+            "summary": "\n".join(lines),
+        }
+
+
+def run_prefork(args, out) -> None:
+    from execution.prefork import PreforkPool, freeze_for_fork
+    from indexing.hierarchical_index import HierarchicalIndex
+    from indexing.local_vector_index import LocalVectorIndex
+    from indexing.sharded_index import parse_address
+    from ingestion.data_ingestion import load_novels
+    from pipeline import NarrativeConsistencyPipeline
+
+    hard, soft = parse_budget(args.budget), parse_budget(args.soft_budget)
+    plan = resources.configure(args.cpu_mode, args.cores)
+    cores = plan.cores
+
+    # Loaded (never built) once; workers share these pages copy-on-write
+    index = LocalVectorIndex.load(args.index_dir, novels=load_novels("data/novels"), plan=plan)
+    # No torch / OpenMP thread pools may exist at the fork
+    resources.configure(args.cpu_mode, 1, verbose=False)
+    shared = HierarchicalIndex(index) if args.hierarchical else index
+    shared.encode_query("warm-up")
+    freeze_for_fork(shared)
+
+    def worker_init(i):
+        plan = resources.configure(args.cpu_mode, max(1, cores // args.prefork), verbose=False)
+        args.retrieval_workers = args.retrieval_workers or plan.retrieval_workers
+        usage_tracker.set_budgets(hard=_split_budget(hard, args.prefork), soft=_split_budget(soft, args.prefork))
+        pipeline = NarrativeConsistencyPipeline(
+            index=shared,
+            nli_cascade=args.nli_cascade,
+            structured_output=args.structured_output,
+            prompt_variant=args.prompt_variant,
+            dossiers_path=args.dossiers,
+            escalation_steps=parse_steps(args.escalation_steps) if args.escalate else None,
+            strong_model=args.strong_model,
+            sentence_evidence=args.sentence_evidence,
+        )
+        return PipelineWorker(pipeline, args)
+
+    pool = PreforkPool(args.prefork, worker_init, queue_size=args.queue_size)
+
+    if args.listen:
+        pool.serve(parse_address(args.listen), os.environ[LISTEN_AUTHKEY_ENV].encode("utf-8"))
+        return
+
+    source = sys.stdin if args.input == "-" else args.input
+    reader = ClaimReader(source, fmt="jsonl", buffer_size=args.queue_size)
+
+    done_count = 0
+    errors = 0
+    for row in pool.run(reader):
+        errors += "error" in row
+        done_count += 1
+        out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        out.flush()
+    reader.close()
+
+    print(f"Processed {done_count} requests ({errors} errors) on {args.prefork} pre-forked workers")
+    for i, extra in sorted(pool.finished.items()):
+        usage_tracker.merge(extra["usage"])
+        if extra["stopped"]:
+            print(f"🛑 worker {i}: {extra['stopped']}")
+        print(f"worker {i}: {extra['summary']}")
+    print(pool.memory_report())
+    print(usage_tracker.summary())
+
+
+def main():
+    args = parse_args()
+    runner = run_prefork if args.prefork else run
+
+    if args.output == "-":
+        # Results own stdout; all logging from the pipeline goes to stderr
+        out = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            runner(args, out)
+    else:
+        with open(args.output, "w", encoding="utf-8") as out:
+            with contextlib.redirect_stdout(sys.stderr):
+                runner(args, out)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,20 @@ from google.genai import types
 from dotenv import load_dotenv
 load_dotenv()
 
+from config.usage_tracker import UsageTracker, usage_tracker
+
+# Output cap for structured (JSON) verdicts: a label plus a short explanation
+STRUCTURED_MAX_OUTPUT_TOKENS = 256
+# Extra output room for models that always think (thinking counts as output)
+THINKING_OUTPUT_TOKENS = 2048
+
+
+def can_disable_thinking(model_name: str) -> bool:
+    """
+    Pro models always think and reject thinking_budget=0.
+    """
+    return "pro" not in model_name.rsplit("/", 1)[-1]
+
 
 class GeminiLLM:
     """
@@ -15,6 +29,7 @@ class GeminiLLM:
         model_name: str = "models/gemini-flash-latest",   # models/gemini-pro-latest
         temperature: float = 0.0,
         max_output_tokens: int = 1536,
+        usage: UsageTracker = None,
     ):
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
@@ -23,18 +38,34 @@ class GeminiLLM:
         self.client = genai.Client(api_key=api_key)
 
         self.model_name = model_name
+        self.temperature = temperature
+        # Token accounting + budgets (process-wide tracker by default)
+        self.usage = usage or usage_tracker
         self.generation_config = types.GenerateContentConfig(
             temperature=temperature,
             max_output_tokens=max_output_tokens,
         )
 
-    def generate(self, prompt: str) -> str:
+    def _call(self, prompt: str, config):
+        # Raises BudgetExceeded past the hard budget, sleeps past the soft one
+        self.usage.before_request()
+
         response = self.client.models.generate_content(
             model=self.model_name,
             contents=prompt,
-            config=self.generation_config,
+            config=config,
         )
 
+        self.usage.record(self.model_name, getattr(response, "usage_metadata", None))
+        return response
+
+    def generate(self, prompt: str, system_instruction: str = None) -> str:
+        config = self.generation_config
+        if system_instruction:
+            config = config.model_copy(update={"system_instruction": system_instruction})
+
+        response = self._call(prompt, config)
+
         # Defensive handling
         if response is None:
             return ""
@@ -44,3 +75,48 @@ class GeminiLLM:
             return ""
 
         return text.strip()
+
+    def generate_json(
+        self,
+        prompt: str,
+        response_schema,
+        max_output_tokens: int = STRUCTURED_MAX_OUTPUT_TOKENS,
+        thinking_budget: int = None,
+        system_instruction: str = None,
+    ) -> str:
+        """
+        Constrained JSON generation via the SDK's response schema.
+        Returns the raw JSON text; parsing is left to the caller.
+
+        Thinking is disabled by default so hidden reasoning tokens do not
+        eat into the tight output cap. Models that cannot turn it off keep
+        their default thinking, with THINKING_OUTPUT_TOKENS added to the cap.
+        """
+        if thinking_budget is None and can_disable_thinking(self.model_name):
+            thinking_budget = 0
+
+        thinking_config = None
+        if thinking_budget is not None:
+            thinking_config = types.ThinkingConfig(thinking_budget=thinking_budget)
+        else:
+            max_output_tokens += THINKING_OUTPUT_TOKENS
+
+        config = types.GenerateContentConfig(
+            temperature=self.temperature,
+            max_output_tokens=max_output_tokens,
+            response_mime_type="application/json",
+            response_schema=response_schema,
+            thinking_config=thinking_config,
+            system_instruction=system_instruction,
+        )
+
+        response = self._call(prompt, config)
+
+        if response is None:
+            return ""
+
+        text = getattr(response, "text", None)
+        if not text:
+            return ""
+
+        return text.strip()
@@ -35,6 +35,141 @@ Final Explanation: One or two sentences explaining your decision.
 """
 
 
+# Structured-output variant: same task, answered as JSON matching
+# CLAIM_VERDICT_SCHEMA instead of free-form analysis + "Final Label:" lines.
+CLAIM_VERIFICATION_JSON_PROMPT = """
+You are a literary reasoning assistant evaluating narrative consistency.
+
+Your task is NOT strict fact-checking.
+Your task is to judge whether a claim is COMPATIBLE with the narrative evidence.
+
+Definitions:
+- CONSISTENT: The evidence supports or aligns with the claim, even if some details are implied rather than explicitly stated.
+- CONTRADICT: The evidence clearly conflicts with the claim.
+- UNCLEAR: The evidence does not provide enough information to reasonably judge the claim.
+
+Important rules:
+1. Do NOT require every detail of the claim to be explicitly stated.
+2. If the narrative portrayal reasonably supports the claim and nothing contradicts it, choose CONSISTENT.
+3. Absence of a minor detail does NOT make a claim unclear.
+4. Only choose CONTRADICT if the evidence clearly disagrees with the claim.
+5. Prefer CONSISTENT over UNCLEAR when evidence aligns overall.
+
+Claim:
+{claim}
+
+Relevant excerpts from the novel:
+{evidence_blocks}
+
+Answer with a JSON object:
+- "label": CONSISTENT, CONTRADICT or UNCLEAR
+- "explanation": one or two short sentences (at most 40 words) justifying the label
+"""
+
+CLAIM_VERDICT_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "label": {
+            "type": "STRING",
+            "enum": ["CONSISTENT", "CONTRADICT", "UNCLEAR"],
+        },
+        "explanation": {"type": "STRING"},
+    },
+    "required": ["label", "explanation"],
+    "property_ordering": ["label", "explanation"],
+}
+
+
+
+# --------------------------------------------------
+# Prompt variants: static instructions in the system instruction
+# --------------------------------------------------
+# The definitions and rules above are identical for every claim. Variants
+# other than "legacy" send them once as the SDK system instruction and keep
+# only the claim and evidence in the user prompt. Compare variants with
+# `python prompt_ab.py` before switching the default.
+
+CLAIM_SYSTEM_INSTRUCTION = """
+You are a literary reasoning assistant evaluating narrative consistency.
+Judge whether a claim is COMPATIBLE with excerpts from a novel; this is not strict fact-checking.
+
+Definitions:
+- CONSISTENT: The evidence supports or aligns with the claim, even if some details are implied rather than explicitly stated.
+- CONTRADICT: The evidence clearly conflicts with the claim.
+- UNCLEAR: The evidence does not provide enough information to reasonably judge the claim.
+
+Rules:
+1. Do NOT require every detail of the claim to be explicitly stated.
+2. If the narrative portrayal reasonably supports the claim and nothing contradicts it, choose CONSISTENT.
+3. Absence of a minor detail does NOT make a claim unclear.
+4. Only choose CONTRADICT if the evidence clearly disagrees with the claim.
+5. Prefer CONSISTENT over UNCLEAR when evidence aligns overall.
+"""
+
+FREE_FORM_ANSWER_INSTRUCTION = """
+First write a brief analysis of how the evidence relates to the claim.
+Then end your response with exactly these two lines and nothing after them:
+Final Label: CONSISTENT or CONTRADICT or UNCLEAR
+Final Explanation: One or two sentences explaining your decision.
+"""
+
+JSON_ANSWER_INSTRUCTION = """
+Answer with a JSON object:
+- "label": CONSISTENT, CONTRADICT or UNCLEAR
+- "explanation": one or two short sentences (at most 40 words) justifying the label
+"""
+
+CLAIM_USER_PROMPT = """
+Claim:
+{claim}
+
+Relevant excerpts from the novel:
+{evidence_blocks}
+"""
+
+# Same decision rules, condensed
+COMPACT_SYSTEM_INSTRUCTION = """
+Judge if a claim about a novel is compatible with the given excerpts (not strict fact-checking).
+CONSISTENT: evidence supports or aligns with it, details may be implied.
+CONTRADICT: evidence clearly conflicts with it.
+UNCLEAR: evidence is insufficient to judge.
+Missing minor details are not UNCLEAR; prefer CONSISTENT over UNCLEAR when evidence aligns overall.
+"""
+
+COMPACT_USER_PROMPT = """Claim: {claim}
+
+Excerpts:
+{evidence_blocks}
+"""
+
+# name -> system instruction / user template for free-form and JSON
+# verdicts, plus the evidence block label
+PROMPT_VARIANTS = {
+    "legacy": {
+        "system": None,
+        "user": CLAIM_VERIFICATION_PROMPT,
+        "json_system": None,
+        "json_user": CLAIM_VERIFICATION_JSON_PROMPT,
+        "evidence_label": "[Evidence {i}]",
+    },
+    "split": {
+        "system": CLAIM_SYSTEM_INSTRUCTION + FREE_FORM_ANSWER_INSTRUCTION,
+        "user": CLAIM_USER_PROMPT,
+        "json_system": CLAIM_SYSTEM_INSTRUCTION + JSON_ANSWER_INSTRUCTION,
+        "json_user": CLAIM_USER_PROMPT,
+        "evidence_label": "[Evidence {i}]",
+    },
+    "compact": {
+        "system": COMPACT_SYSTEM_INSTRUCTION + FREE_FORM_ANSWER_INSTRUCTION,
+        "user": COMPACT_USER_PROMPT,
+        "json_system": COMPACT_SYSTEM_INSTRUCTION + JSON_ANSWER_INSTRUCTION,
+        "json_user": COMPACT_USER_PROMPT,
+        "evidence_label": "[{i}]",
+    },
+}
+
+DEFAULT_PROMPT_VARIANT = "legacy"
+
 
 #############################################################################################
 CLAIM_DECOMPOSITION_PROMPT = """
@@ -62,3 +197,20 @@ Example format:
 2. Fact two.
 3. Fact three.
 """
+
+
+# Offline, once per (story, character): compact fact sheet reused by every
+# claim about that character (see retrieval/dossier.py)
+CHARACTER_DOSSIER_PROMPT = """
+You are building a fact sheet about the character {character} from excerpts of a novel.
+
+Excerpts:
+{passages}
+
+List the facts these excerpts establish about {character}: origin and family,
+occupation, places, dates and ages, key events, relationships and traits.
+
+Rules:
+- Only state what the excerpts support; do not guess.
+- One short bullet point per fact, at most 150 words in total.
+"""
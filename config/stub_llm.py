@@ -0,0 +1,60 @@
+import random
+import time
+from types import SimpleNamespace
+
+from config.usage_tracker import UsageTracker, usage_tracker
+
+
+# Rough English average for Gemini tokenization
+CHARS_PER_TOKEN = 4.0
+
+
+def estimate_tokens(text: str) -> int:
+    return int(len(text or "") / CHARS_PER_TOKEN) + 1
+
+
+class StubLLM:
+    """
+    Offline stand-in for GeminiLLM (same generate / generate_json
+    interface) for measuring prompt size and pipeline overhead without
+    API calls. Labels are random, so accuracy numbers are meaningless.
+
+    Latency is simulated as a fixed overhead plus a per-input-token cost,
+    and usage is recorded in the UsageTracker like a real response.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "stub",
+        base_latency: float = 0.02,
+        seconds_per_1k_tokens: float = 0.01,
+        seed: int = 0,
+        usage: UsageTracker = None,
+    ):
+        self.model_name = model_name
+        self.base_latency = base_latency
+        self.seconds_per_1k_tokens = seconds_per_1k_tokens
+        self.usage = usage or usage_tracker
+        self._rng = random.Random(seed)
+
+    def _respond(self, prompt: str, system_instruction: str, text: str) -> str:
+        self.usage.before_request()
+
+        prompt_tokens = estimate_tokens(prompt) + estimate_tokens(system_instruction)
+        time.sleep(self.base_latency + self.seconds_per_1k_tokens * prompt_tokens / 1000)
+
+        self.usage.record(self.model_name, SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=estimate_tokens(text),
+        ))
+        return text
+
+    def generate(self, prompt: str, system_instruction: str = None) -> str:
+        label = self._rng.choice(["CONSISTENT", "CONTRADICT", "UNCLEAR"])
+        text = f"Stub analysis.\nFinal Label: {label}\nFinal Explanation: Stub response."
+        return self._respond(prompt, system_instruction, text)
+
+    def generate_json(self, prompt: str, response_schema, system_instruction: str = None, **kwargs) -> str:
+        label = self._rng.choice(["CONSISTENT", "CONTRADICT", "UNCLEAR"])
+        text = f'{{"label": "{label}", "explanation": "Stub response."}}'
+        return self._respond(prompt, system_instruction, text)
@@ -0,0 +1,269 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional
+
+
+# Estimated USD per 1M tokens (input, output incl. thinking). Check current
+# Gemini pricing before relying on the cost figures.
+MODEL_PRICES = {
+    "models/gemini-flash-latest": (0.30, 2.50),
+    "models/gemini-pro-latest": (1.25, 10.00),
+}
+DEFAULT_PRICE = (1.25, 10.00)   # unknown models: assume the expensive end
+
+BUDGET_KEYS = ("tokens", "requests", "cost")
+
+
+class BudgetExceeded(RuntimeError):
+    pass
+
+
+def parse_budget(spec: Optional[str]) -> Dict[str, float]:
+    """
+    "tokens=2e6,requests=500,cost=5" -> {"tokens": 2e6, "requests": 500, "cost": 5.0}
+    """
+    if not spec:
+        return {}
+
+    budget = {}
+    for part in spec.split(","):
+        key, _, value = part.partition("=")
+        key = key.strip()
+        if key not in BUDGET_KEYS or not value.strip():
+            raise ValueError(f"Invalid budget {part!r}, expected one of {BUDGET_KEYS} as key=value")
+        budget[key] = float(value)
+    return budget
+
+
+def as_budget_exceeded(exc: BaseException) -> Optional[BudgetExceeded]:
+    """
+    The BudgetExceeded behind `exc` (e.g. re-raised by a pipeline stage), if any.
+    """
+    while exc is not None:
+        if isinstance(exc, BudgetExceeded):
+            return exc
+        exc = exc.__cause__
+    return None
+
+
+def _new_counter() -> Dict[str, float]:
+    return {"requests": 0, "prompt_tokens": 0, "output_tokens": 0, "cached_tokens": 0, "cost": 0.0}
+
+
+class UsageTracker:
+    """
+    Aggregates token usage reported by every LLM response, per run,
+    per stage, per model and per row.
+
+    Soft budget: once reached, each further request is delayed by
+    `throttle_seconds`. Hard budget: further requests and checkpoint()
+    raise BudgetExceeded, so runners can stop cleanly between rows.
+    """
+
+    def __init__(self, throttle_seconds: float = 2.0):
+        self.hard: Dict[str, float] = {}
+        self.soft: Dict[str, float] = {}
+        self.throttle_seconds = throttle_seconds
+
+        self.total = _new_counter()
+        self.by_stage: Dict[str, Dict[str, float]] = {}
+        self.by_model: Dict[str, Dict[str, float]] = {}
+        self.by_row: Dict[str, Dict[str, float]] = {}
+
+        self.started = time.time()
+        self.stopped: Optional[BudgetExceeded] = None
+        self._soft_warned = False
+        self._lock = threading.Lock()
+        self._context = threading.local()
+
+    def set_budgets(self, hard: Optional[Dict] = None, soft: Optional[Dict] = None) -> None:
+        self.hard = dict(hard or {})
+        self.soft = dict(soft or {})
+
+    # --------------------------------------------------
+    # Attribution (per worker thread)
+    # --------------------------------------------------
+    @contextmanager
+    def context(self, stage: Optional[str] = None, row=None):
+        """
+        Attributes LLM calls made inside the block to a stage and / or row.
+        """
+        previous = (getattr(self._context, "stage", None), getattr(self._context, "row", None))
+        self._context.stage = stage or previous[0]
+        self._context.row = row if row is not None else previous[1]
+        try:
+            yield
+        finally:
+            self._context.stage, self._context.row = previous
+
+    # --------------------------------------------------
+    # Budgets
+    # --------------------------------------------------
+    def _usage(self) -> Dict[str, float]:
+        return {
+            "tokens": self.total["prompt_tokens"] + self.total["output_tokens"],
+            "requests": self.total["requests"],
+            "cost": self.total["cost"],
+        }
+
+    @staticmethod
+    def _over(usage: Dict[str, float], budget: Dict[str, float]) -> Optional[str]:
+        for key, limit in budget.items():
+            if usage[key] >= limit:
+                return f"{key} {usage[key]:.6g} >= {limit:.6g}"
+        return None
+
+    def checkpoint(self) -> None:
+        """
+        Raises BudgetExceeded once the hard budget is used up.
+        """
+        with self._lock:
+            reason = self._over(self._usage(), self.hard)
+        if reason:
+            raise BudgetExceeded(f"Hard budget reached: {reason}")
+
+    def until_budget(self, items: Iterable) -> Iterator:
+        """
+        Passes items through, checking the hard budget between them. When
+        it is used up (here or inside a pipeline stage), stops the loop
+        cleanly and records the reason in `self.stopped`.
+        """
+        self.stopped = None
+        it = iter(items)
+        try:
+            while True:
+                try:
+                    self.checkpoint()
+                    item = next(it)
+                except StopIteration:
+                    return
+                except Exception as e:
+                    stop = as_budget_exceeded(e)
+                    if stop is None:
+                        raise
+                    self.stopped = stop
+                    print(f"\n🛑 {stop} – stopping the run")
+                    return
+                yield item
+        finally:
+            close = getattr(it, "close", None)
+            if close is not None:
+                close()
+
+    def before_request(self) -> None:
+        self.checkpoint()
+
+        with self._lock:
+            reason = self._over(self._usage(), self.soft)
+            warn = reason and not self._soft_warned
+            self._soft_warned = self._soft_warned or bool(reason)
+
+        if warn:
+            print(f"⚠️ Soft budget reached ({reason}); throttling LLM requests "
+                  f"by {self.throttle_seconds:.1f}s")
+        if reason:
+            time.sleep(self.throttle_seconds)
+
+    # --------------------------------------------------
+    # Recording
+    # --------------------------------------------------
+    def record(self, model: str, usage_metadata) -> None:
+        """
+        Adds one response's usage_metadata (may be missing on errors).
+        """
+        prompt = getattr(usage_metadata, "prompt_token_count", None) or 0
+        output = (
+            (getattr(usage_metadata, "candidates_token_count", None) or 0)
+            + (getattr(usage_metadata, "thoughts_token_count", None) or 0)
+        )
+        cached = getattr(usage_metadata, "cached_content_token_count", None) or 0
+
+        price_in, price_out = MODEL_PRICES.get(model, DEFAULT_PRICE)
+        cost = (prompt * price_in + output * price_out) / 1e6
+
+        stage = getattr(self._context, "stage", None) or "other"
+        row = getattr(self._context, "row", None)
+
+        with self._lock:
+            counters = [
+                self.total,
+                self.by_stage.setdefault(stage, _new_counter()),
+                self.by_model.setdefault(model, _new_counter()),
+            ]
+            if row is not None:
+                counters.append(self.by_row.setdefault(str(row), _new_counter()))
+
+            for c in counters:
+                c["requests"] += 1
+                c["prompt_tokens"] += prompt
+                c["output_tokens"] += output
+                c["cached_tokens"] += cached
+                c["cost"] += cost
+
+    def state(self) -> Dict:
+        """
+        Picklable copy of the counters, e.g. to send from a worker process.
+        """
+        with self._lock:
+            return {
+                "total": dict(self.total),
+                "by_stage": {k: dict(v) for k, v in self.by_stage.items()},
+                "by_model": {k: dict(v) for k, v in self.by_model.items()},
+                "by_row": {k: dict(v) for k, v in self.by_row.items()},
+            }
+
+    def merge(self, state: Dict) -> None:
+        """
+        Adds another tracker's state() (worker processes) to this one.
+        """
+        with self._lock:
+            pairs = [(self.total, state["total"])]
+            for name in ("by_stage", "by_model", "by_row"):
+                groups = getattr(self, name)
+                pairs += [(groups.setdefault(k, _new_counter()), v) for k, v in state[name].items()]
+            for mine, theirs in pairs:
+                for key, value in theirs.items():
+                    mine[key] += value
+
+    # --------------------------------------------------
+    # Reporting
+    # --------------------------------------------------
+    def summary(self) -> str:
+        t = self.total
+        lines = [
+            f"LLM usage: {t['requests']} requests, {t['prompt_tokens']:,} prompt + "
+            f"{t['output_tokens']:,} output tokens, est. ${t['cost']:.4f} "
+            f"in {time.time() - self.started:.0f}s"
+        ]
+
+        for title, groups in (("stage", self.by_stage), ("model", self.by_model)):
+            for name, c in sorted(groups.items()):
+                lines.append(
+                    f"  {title} {name:<28} requests={c['requests']:<6} "
+                    f"prompt={c['prompt_tokens']:<10,} output={c['output_tokens']:<8,} "
+                    f"est. ${c['cost']:.4f}"
+                )
+
+        if self.by_row:
+            rows = list(self.by_row.values())
+            avg = sum(r["prompt_tokens"] + r["output_tokens"] for r in rows) / len(rows)
+            top_id, top = max(
+                self.by_row.items(),
+                key=lambda kv: kv[1]["prompt_tokens"] + kv[1]["output_tokens"],
+            )
+            lines.append(
+                f"  per row: avg {avg:,.0f} tokens over {len(rows)} rows, max "
+                f"{top['prompt_tokens'] + top['output_tokens']:,} (row {top_id}, "
+                f"{top['requests']} requests)"
+            )
+
+        if self.hard:
+            lines.append(f"  hard budget: {self.hard}")
+        if self.soft:
+            lines.append(f"  soft budget: {self.soft}")
+        return "\n".join(lines)
+
+
+# One tracker per process, shared by every GeminiLLM instance
+usage_tracker = UsageTracker()
@@ -1,62 +1,198 @@
-import pandas as pd
+import argparse
+
 from tqdm import tqdm
-from sklearn.metrics import (
-    accuracy_score,
-    precision_recall_fscore_support,
-    classification_report,
-    confusion_matrix,
-)
 
-from ingestion.data_ingestion import load_novels
-from indexing.chunking import chunk_all_novels
-from indexing.local_vector_index import LocalVectorIndex
-from retrieval.retrieval_evidence import retrieve_evidence
+from execution import resources
+from execution.csv_output import AtomicCsvWriter
+from execution.reporting import normalize_prediction, report_metrics
+from execution.claim_stages import claim_stages
+from execution.staged_executor import StagedExecutor
+from execution.sharding import (
+    PARTIALS_DIR,
+    in_shard,
+    parse_shard,
+    partial_path,
+)
+from ingestion.data_ingestion import ClaimReader
+from ingestion.dedup import DEFAULT_THRESHOLD, audit_path, find_duplicates
+from indexing.hierarchical_index import HierarchicalIndex
+from indexing.local_vector_index import build_local_index
+from indexing.sharded_index import ShardedVectorIndex
+from retrieval.dossier import DossierStore
+from retrieval.retrieval_evidence import gather_evidence
+from retrieval.sentence_index import SentenceEvidenceIndex
+from retrieval.snapshot import SnapshotWriter, retrieval_config
 from reasoning.claim_reasoner import ClaimReasoner
+from reasoning.escalation import STRONG_MODEL, make_escalating_reasoner, parse_steps
+from reasoning.nli_cascade import CascadeReasoner
 from config.llm_config import GeminiLLM
+from config.prompt_templates import DEFAULT_PROMPT_VARIANT, PROMPT_VARIANTS
+from config.usage_tracker import parse_budget, usage_tracker
 
 
-# ---------------------------------------------------------
-# Dataset-grade normalization
-# ---------------------------------------------------------
-def normalize_prediction(pred: str, true: str) -> str:
-    """
-    Dataset-grade normalization:
-    - UNCLEAR counts as CONTRADICT if GT is CONTRADICT
-    - Otherwise UNCLEAR counts as CONSISTENT
-    """
-    pred = pred.lower()
-    true = true.lower()
-
-    if pred == "unclear" and true == "contradict":
-        return "contradict"
-    if pred == "unclear":
-        return "consistent"
-    return pred
+def parse_args():
+    parser = argparse.ArgumentParser(description="Evaluate the pipeline on data/train.csv")
+    parser.add_argument(
+        "--nli-cascade",
+        action="store_true",
+        help="Decide confident rows with a local NLI model and only send the rest to the LLM",
+    )
+    parser.add_argument(
+        "--structured-output",
+        action="store_true",
+        help="Ask the LLM for a JSON verdict (label + short explanation) instead of free-form analysis",
+    )
+    parser.add_argument(
+        "--prompt-variant",
+        default=DEFAULT_PROMPT_VARIANT,
+        choices=sorted(PROMPT_VARIANTS),
+        help="Prompt layout; non-legacy variants send the static rules as the system instruction",
+    )
+    parser.add_argument(
+        "--hierarchical",
+        action="store_true",
+        help="Coarse-to-fine retrieval: pick top chapters first, then search chunks inside them",
+    )
+    parser.add_argument(
+        "--sentence-evidence",
+        action="store_true",
+        help="Send only the best-matching sentences (plus context) of each passage to the LLM",
+    )
+    parser.add_argument(
+        "--shard",
+        default=None,
+        help="Only process shard i of N (\"i/N\", 0-based); results go to a partial file",
+    )
+    parser.add_argument(
+        "--index-dir",
+        default=None,
+        help="Load a prebuilt index from this directory (built and saved there if missing)",
+    )
+    parser.add_argument(
+        "--index-shards",
+        default=None,
+        help="Comma-separated host:port list of index shard workers (python -m indexing serve)",
+    )
+    parser.add_argument(
+        "--dossiers",
+        default=None,
+        help="Character dossier file (python -m retrieval.dossier); consulted before retrieval",
+    )
+    parser.add_argument(
+        "--escalate",
+        action="store_true",
+        help="Judge on a few passages first; retry UNCLEAR / unparsable verdicts with more evidence",
+    )
+    parser.add_argument("--escalation-steps", default="4,8,12", help="Evidence sizes tried in order")
+    parser.add_argument(
+        "--strong-model",
+        nargs="?",
+        const=STRONG_MODEL,
+        default=None,
+        help=f"Use a stronger model for the last escalation step (default: {STRONG_MODEL})",
+    )
+    parser.add_argument(
+        "--budget",
+        default=None,
+        help="Hard LLM budget, e.g. tokens=2e6,requests=500,cost=5 (USD estimate); stops cleanly when reached",
+    )
+    parser.add_argument(
+        "--soft-budget",
+        default=None,
+        help="Soft LLM budget (same format); requests are throttled once it is reached",
+    )
+    parser.add_argument("--partials-dir", default=PARTIALS_DIR)
+    parser.add_argument(
+        "--retrieval-workers",
+        type=int,
+        default=None,
+        help="Threads running retrieval (overlaps with in-flight LLM calls); default from the CPU plan",
+    )
+    parser.add_argument(
+        "--reasoning-workers",
+        type=int,
+        default=1,
+        help="Concurrent LLM reasoning calls",
+    )
+    parser.add_argument("--queue-size", type=int, default=8, help="Bounded queue between stages")
+    parser.add_argument(
+        "--snapshot-out",
+        default=None,
+        help="Also save each row's evidence for replay_reasoning.py (e.g. artifacts/evidence_train.jsonl.gz)",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Reason once per group of exact duplicate backstories (same story and character)",
+    )
+    parser.add_argument(
+        "--dedup-near",
+        action="store_true",
+        help="Also share verdicts between near duplicates (implies --dedup)",
+    )
+    parser.add_argument("--dedup-threshold", type=float, default=DEFAULT_THRESHOLD, help="Near-duplicate similarity")
+    parser.add_argument(
+        "--dedup-audit",
+        default=None,
+        help=f"CSV of duplicate -> canonical rows (default: {audit_path('train')})",
+    )
+    parser.add_argument("--cores", type=int, default=None, help="CPU core budget (default: all available)")
+    parser.add_argument(
+        "--cpu-mode",
+        default="batch",
+        choices=resources.MODES,
+        help="How the core budget is split between torch, FAISS and retrieval workers",
+    )
+
+    args = parser.parse_args()
+    if args.index_shards and (args.hierarchical or args.index_dir):
+        parser.error("--index-shards cannot be combined with --hierarchical or --index-dir")
+    return args
 
 
 # ---------------------------------------------------------
 # Main evaluation
 # ---------------------------------------------------------
 def main():
+    args = parse_args()
+    shard = parse_shard(args.shard)
+    usage_tracker.set_budgets(hard=parse_budget(args.budget), soft=parse_budget(args.soft_budget))
+    plan = resources.configure(args.cpu_mode, args.cores)
+    args.retrieval_workers = args.retrieval_workers or plan.retrieval_workers
+
     # ---------------------------
-    # Load training data
+    # Load training data (streamed, columns validated up front)
     # ---------------------------
-    df = pd.read_csv("data/train.csv")
-
-    # Sanity check (VERY IMPORTANT)
-    required_cols = {"backstory", "char", "label", "story_id"}
-    missing = required_cols - set(df.columns)
-    if missing:
-        raise ValueError(f"Missing columns in train.csv: {missing}")
+    reader = ClaimReader("data/train.csv", require_label=True, required=("id", "backstory", "char"))
+    rows = (r for r in reader if in_shard(r.id, shard))
+    if shard is not None:
+        print(f"Processing shard {shard[0]}/{shard[1]}")
 
     # ---------------------------
     # Load & index novels
     # ---------------------------
-    novels = load_novels("data/novels")
-    chunks = chunk_all_novels(novels)
+    if args.index_shards:
+        index = ShardedVectorIndex(args.index_shards.split(","))
+    else:
+        index = build_local_index("data/novels", index_dir=args.index_dir, plan=plan)
+        if args.hierarchical:
+            index = HierarchicalIndex(index)
+    sentence_index = SentenceEvidenceIndex(index.model) if args.sentence_evidence else None
+    dossiers = DossierStore.load(args.dossiers) if args.dossiers else None
 
-    index = LocalVectorIndex()
-    index.index_chunks(chunks)
+    # Duplicate backstories share one retrieval + LLM call (canonical row)
+    dedup = None
+    if args.dedup or args.dedup_near:
+        dedup = find_duplicates(
+            rows,
+            model=index.model,
+            threshold=args.dedup_threshold,
+            share_near=args.dedup_near,
+            batch_size=plan.encode_batch_size,
+        )
+        dedup.save(args.dedup_audit or audit_path("train", shard))
+        print(dedup.summary())
+        rows = dedup.canonical_rows()
 
     # ---------------------------
     # Initialize LLM + reasoner
@@ -66,48 +202,80 @@ def main():
         max_output_tokens=1536,
         temperature=0.0,
     )
-    reasoner = ClaimReasoner(llm)
+    reasoner = ClaimReasoner(
+        llm, structured_output=args.structured_output, prompt_variant=args.prompt_variant
+    )
+    escalation = None
+    top_k = 8
+    if args.escalate:
+        escalation = make_escalating_reasoner(
+            reasoner,
+            steps=parse_steps(args.escalation_steps),
+            strong_model=args.strong_model,
+            structured_output=args.structured_output,
+            prompt_variant=args.prompt_variant,
+        )
+        reasoner = escalation
+        top_k = escalation.max_evidence   # retrieve once, reason on prefixes
+    if args.nli_cascade:
+        reasoner = CascadeReasoner(reasoner)
 
     y_true = []
     y_pred = []
 
+    partial = None
+    if shard is not None:
+        partial = AtomicCsvWriter(
+            partial_path("eval", shard, args.partials_dir),
+            ["row_index", "id", "label", "raw_pred", "pred", "explanation"],
+        )
+
+    snapshot = None
+    if args.snapshot_out:
+        config = retrieval_config(index, top_k, args.sentence_evidence, args.dossiers)
+        snapshot = SnapshotWriter(args.snapshot_out, config, claims="data/train.csv")
+
     print("\n" + "=" * 80)
     print("STARTING EVALUATION")
     print("=" * 80 + "\n")
 
-    for i, row in tqdm(df.iterrows(), total=len(df)):
-        print(f"\n[{i+1}/{len(df)}] Processing example")
-
-        # ---------------------------
-        # Correct column usage
-        # ---------------------------
-        claim = row["backstory"]
-        character_name = row["char"]
-        true_label = row["label"].lower()
-
-        # Normalize book_name → story_id
-        story_id = (
-            row["story_id"]
-            .strip()
-            .lower()
-            .replace(" ", "_")
-        )
-
-        # ---------------------------
-        # Retrieval (dual-query)
-        # ---------------------------
-        evidence = retrieve_evidence(
-            claim=claim,
-            story_id=story_id,
+    # ---------------------------
+    # Retrieval and reasoning run as overlapped stages;
+    # this loop is the (in-order) writing stage
+    # ---------------------------
+    def retrieve(row):
+        # Character dossier first, if one was built for this character
+        return gather_evidence(
+            claim=row.backstory,
+            story_id=row.story_id,
             vector_index=index,
-            character_name=character_name,
-            top_k=8,
+            character_name=row.char,
+            top_k=top_k,
+            sentence_index=sentence_index,
+            dossiers=dossiers,
         )
 
-        # ---------------------------
-        # Reasoning
-        # ---------------------------
-        result = reasoner.verify_claim(claim, evidence)
+    def reason(row, evidence):
+        return reasoner.verify_claim(row.backstory, evidence)
+
+    executor = StagedExecutor(
+        claim_stages(retrieve, reason, args.retrieval_workers, args.reasoning_workers),
+        queue_size=args.queue_size,
+    )
+
+    # Stops cleanly between rows once the hard budget is used up
+    results = usage_tracker.until_budget(executor.run(rows))
+    if dedup is not None:
+        results = dedup.expand(results)
+    for i, (row, evidence, result) in enumerate(tqdm(results)):
+        if snapshot is not None:
+            snapshot.write(row, evidence)
+        print(f"\n[{i+1}] Processed example {row.id}")
+
+        claim = row.backstory
+        character_name = row.char
+        true_label = row.label
+        story_id = row.story_id
 
         raw_pred = result["label"].lower()
         final_pred = normalize_prediction(raw_pred, true_label)
@@ -123,38 +291,56 @@ def main():
         print("\nGROUND TRUTH:", true_label.upper())
         print("RAW MODEL LABEL:", raw_pred.upper())
         print("FINAL LABEL USED:", final_pred.upper())
+        if "stage" in result:
+            print("DECIDED BY:", result["stage"].upper())
         print("\nMODEL EXPLANATION:")
         print(result["explanation"])
         print("-" * 80)
 
         y_true.append(true_label)
         y_pred.append(final_pred)
+        if partial is not None:
+            partial.write({
+                "row_index": row.row_index,
+                "id": row.id,
+                "label": true_label,
+                "raw_pred": raw_pred,
+                "pred": final_pred,
+                "explanation": result["explanation"],
+            })
+
+    reader.close()
+    if snapshot is not None:
+        snapshot.close()
 
     # ---------------------------
     # Metrics
     # ---------------------------
-    accuracy = accuracy_score(y_true, y_pred)
-    precision, recall, f1, _ = precision_recall_fscore_support(
-        y_true, y_pred, average="macro", zero_division=0
-    )
-
-    print("\n" + "=" * 80)
-    print("EVALUATION RESULTS")
-    print("=" * 80)
-
-    print("\nAccuracy:")
-    print(round(accuracy, 4))
-
-    print("\nPrecision / Recall / F1 (macro):")
-    print(f"Precision: {precision:.4f}")
-    print(f"Recall   : {recall:.4f}")
-    print(f"F1-score : {f1:.4f}")
+    if usage_tracker.stopped is not None:
+        print(f"\n⚠️ Run stopped by budget after {len(y_true)} rows; metrics below cover those rows only")
 
-    print("\nClassification Report:")
-    print(classification_report(y_true, y_pred, zero_division=0))
+    if partial is not None:
+        # An incomplete shard must not look finished to merge_shards.py
+        partial.close(commit=usage_tracker.stopped is None)
+        if usage_tracker.stopped is None:
+            print(f"\nSaved shard results to {partial.path}")
+            print("Run `python merge_shards.py eval` once all shards are done.")
+        else:
+            print(f"\nIncomplete shard results kept in {partial.tmp_path}")
+    if partial is None or usage_tracker.stopped is not None:
+        if y_true:
+            report_metrics(y_true, y_pred)
 
-    print("\nConfusion Matrix:")
-    print(confusion_matrix(y_true, y_pred))
+    print("\n" + executor.summary())
+    if args.nli_cascade:
+        print(reasoner.summary())
+    if dossiers is not None:
+        print(dossiers.summary())
+    if dedup is not None:
+        print(dedup.summary())
+    if escalation is not None:
+        print(escalation.summary())
+    print(usage_tracker.summary())
 
 
 # ---------------------------------------------------------
@@ -0,0 +1,65 @@
+from typing import Callable, List
+
+from config.usage_tracker import BudgetExceeded, usage_tracker
+from execution.staged_executor import Stage
+
+
+# --------------------------------------------------
+# Retrieval / reasoning stages shared by every runner
+# --------------------------------------------------
+# Items flow through a StagedExecutor as
+#
+#   row  ->  (row, evidence)  ->  (row, evidence, result)
+#
+# with evidence = retrieve(row) and result = reason(row, evidence). `row`
+# is usually a ClaimRecord; runners that only reason (snapshot replays,
+# prompt A/B) feed (row, evidence) pairs straight into reasoning_stage.
+#
+# With row_errors=True a failing row becomes {"error": "..."} instead of
+# stopping the run (BudgetExceeded still stops it).
+
+
+def _error(e: BaseException) -> dict:
+    return {"error": f"{type(e).__name__}: {e}"}
+
+
+def retrieval_stage(retrieve: Callable, workers: int = 1, row_errors: bool = False) -> Stage:
+    def run(row):
+        try:
+            return row, retrieve(row)
+        except Exception as e:
+            if not row_errors or isinstance(e, BudgetExceeded):
+                raise
+            return row, e
+
+    return Stage("retrieval", run, workers)
+
+
+def reasoning_stage(reason: Callable, workers: int = 1, row_errors: bool = False) -> Stage:
+    def run(item):
+        row, evidence = item
+        if isinstance(evidence, Exception):   # retrieval failed (row_errors)
+            return row, [], _error(evidence)
+        try:
+            # LLM usage is attributed to the row (reason() may narrow the stage)
+            with usage_tracker.context(stage="reasoning", row=getattr(row, "id", None)):
+                return row, evidence, reason(row, evidence)
+        except Exception as e:
+            if not row_errors or isinstance(e, BudgetExceeded):
+                raise
+            return row, evidence, _error(e)
+
+    return Stage("reasoning", run, workers)
+
+
+def claim_stages(
+    retrieve: Callable,
+    reason: Callable,
+    retrieval_workers: int = 1,
+    reasoning_workers: int = 1,
+    row_errors: bool = False,
+) -> List[Stage]:
+    return [
+        retrieval_stage(retrieve, retrieval_workers, row_errors),
+        reasoning_stage(reason, reasoning_workers, row_errors),
+    ]
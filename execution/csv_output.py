@@ -0,0 +1,41 @@
+import csv
+import os
+from typing import Dict, List
+
+
+class AtomicCsvWriter:
+    """
+    Streams result rows to a CSV file as they are produced.
+
+    Rows go to "<path>.tmp" and the file is renamed into place only when
+    the writer closes cleanly, so readers (e.g. the shard merge) never see
+    half a file and memory stays constant however many rows are written.
+    """
+
+    def __init__(self, path: str, fieldnames: List[str]):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.rows = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(self.tmp_path, "w", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, row: Dict) -> None:
+        self._writer.writerow(row)
+        self.rows += 1
+
+    def close(self, commit: bool = True) -> None:
+        if self._file.closed:
+            return
+        self._file.close()
+        if commit:
+            os.replace(self.tmp_path, self.path)
+
+    def __enter__(self) -> "AtomicCsvWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # Keep the .tmp file on failure for inspection, never publish it
+        self.close(commit=exc_type is None)
@@ -0,0 +1,335 @@
+import gc
+import multiprocessing
+import queue
+import threading
+import traceback
+from multiprocessing.connection import Listener
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+
+# --------------------------------------------------
+# Pre-forked worker pool
+# --------------------------------------------------
+# The parent loads the embedding model and the index once, freezes them
+# and forks N workers, which share those pages copy-on-write instead of
+# each loading bge-base and the index again.
+#
+#   freeze_for_fork(index)     # arrays read-only, model in eval mode, gc.freeze()
+#   pool = PreforkPool(8, worker_init)
+#   for result in pool.run(items): ...      # batch: items are spread over workers
+#   pool.serve(("127.0.0.1", 7100), key)    # serving: workers accept() on one socket
+#   print(pool.memory_report())
+#
+# worker_init(worker_index) runs in the child after the fork and returns
+# the worker object: .stream(items) -> results for batch runs, and
+# .handle(request) -> response for serving; an optional .finish() -> dict
+# is sent back to the parent when a batch worker is done.
+#
+# Fork after loading, never after heavy multi-threaded work: threads (and
+# OpenMP pools) do not survive a fork. Prefer a prebuilt, memory-mapped
+# index artifact, and keep the parent's torch at one thread until the fork.
+
+_STOP = None
+
+
+def memory_usage(pid="self") -> Optional[Dict[str, int]]:
+    """
+    kB from /proc/<pid>/smaps_rollup: rss, pss, uss (pages only this
+    process maps) and shared. None where the file does not exist.
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        return None
+
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+    }
+
+
+def _make_readonly(obj, depth: int = 0, seen: Optional[set] = None) -> None:
+    seen = set() if seen is None else seen
+    if id(obj) in seen or depth > 3:
+        return
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        obj.setflags(write=False)
+        return
+    if isinstance(obj, dict):
+        values = obj.values()
+    elif isinstance(obj, (list, tuple)):
+        values = obj
+    elif hasattr(obj, "__dict__"):
+        values = vars(obj).values()
+    else:
+        return
+    for value in values:
+        _make_readonly(value, depth + 1, seen)
+
+
+def freeze_for_fork(index) -> None:
+    """
+    Prepares a loaded index (and its embedding model; also works on a
+    HierarchicalIndex around it) to be shared by forked workers:
+      - numpy arrays hanging off the index become read-only, so an
+        accidental in-place write fails instead of copying the page
+      - the model goes to eval mode without gradients
+      - gc.freeze() moves every live object to the permanent generation,
+        so the workers' garbage collector never writes to their pages
+    """
+    model = getattr(index, "model", None)
+    if model is not None:
+        model.eval()
+        for param in model.parameters():
+            param.requires_grad_(False)
+
+    # The model's tensors are not numpy arrays; do not walk into it
+    seen = {id(model)}
+    for value in vars(index).values():
+        _make_readonly(value, seen=seen)
+
+    gc.collect()
+    gc.freeze()
+
+
+# --------------------------------------------------
+# Worker side
+# --------------------------------------------------
+def _drain(tasks) -> Iterator:
+    while True:
+        item = tasks.get()
+        if item is _STOP:
+            return
+        yield item
+
+
+def _worker_main(index: int, worker_init: Callable, tasks, results, listener=None) -> None:
+    try:
+        worker = worker_init(index)
+        results.put(("ready", index, memory_usage()))
+
+        if listener is not None:
+            _serve_forever(worker, listener)
+            return
+
+        for out in worker.stream(_drain(tasks)):
+            results.put(("result", index, out))
+
+        finish = getattr(worker, "finish", None)
+        extra = finish() if finish is not None else None
+        results.put(("done", index, memory_usage(), extra))
+    except BaseException:
+        results.put(("error", index, traceback.format_exc()))
+
+
+def _serve_forever(worker, listener: Listener) -> None:
+    # One connection at a time per worker; concurrency comes from the number of workers
+    while True:
+        try:
+            conn = listener.accept()
+        except Exception as e:   # failed handshake: wrong authkey, bare TCP connect, reset
+            print(f"⚠️ Rejected connection: {type(e).__name__}: {e}")
+            continue
+        try:
+            _serve_connection(worker, conn)
+        finally:
+            conn.close()
+
+
+def _serve_connection(worker, conn) -> None:
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            response = worker.handle(request)
+        except Exception as e:
+            response = {"error": f"{type(e).__name__}: {e}"}
+        try:
+            conn.send(response)
+        except OSError:   # client went away mid-request
+            return
+
+
+# --------------------------------------------------
+# Parent side
+# --------------------------------------------------
+class PreforkPool:
+    def __init__(self, workers: int, worker_init: Callable[[int], object], queue_size: int = 64):
+        if workers < 1:
+            raise ValueError("A pre-fork pool needs at least one worker")
+        self.workers = workers
+        self.worker_init = worker_init
+        self.queue_size = queue_size
+
+        self.memory: Dict[str, Dict] = {}     # "parent" / "worker i ready" / "worker i done"
+        self.finished: Dict[int, object] = {}  # worker index -> finish() result
+        self._ctx = multiprocessing.get_context("fork")
+
+    def _spawn(self, index: int, tasks, results, listener=None):
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self.worker_init, tasks, results, listener),
+            daemon=True,
+        )
+        proc.start()
+        return proc
+
+    def _start(self, tasks, results, listener=None) -> List:
+        self.memory["parent"] = memory_usage()
+        return [self._spawn(i, tasks, results, listener) for i in range(self.workers)]
+
+    def _record(self, msg) -> None:
+        kind, index = msg[0], msg[1]
+        if kind == "error":
+            raise RuntimeError(f"Pre-fork worker {index} failed:\n{msg[2]}")
+        self.memory[f"worker {index} {kind}"] = msg[2]
+        if kind == "done":
+            self.finished[index] = msg[3]
+
+    def run(self, items: Iterable) -> Iterator:
+        """
+        Spreads items over the workers and yields their results as they
+        arrive (not in input order).
+        """
+        tasks = self._ctx.Queue(maxsize=self.queue_size)
+        tasks.cancel_join_thread()   # workers stopping early must not block exit
+        results = self._ctx.Queue()
+        procs = self._start(tasks, results)
+
+        def feed():
+            for item in items:
+                tasks.put(item)
+            for _ in procs:
+                tasks.put(_STOP)
+
+        threading.Thread(target=feed, daemon=True).start()
+
+        active = set(range(self.workers))
+        try:
+            while active:
+                try:
+                    msg = results.get(timeout=1.0)
+                except queue.Empty:
+                    crashed = [i for i in active if procs[i].exitcode not in (None, 0)]
+                    if crashed:
+                        raise RuntimeError(
+                            f"Pre-fork worker {crashed[0]} died (exit code {procs[crashed[0]].exitcode})"
+                        )
+                    continue
+
+                if msg[0] == "result":
+                    yield msg[2]
+                    continue
+                self._record(msg)
+                if msg[0] == "done":
+                    active.discard(msg[1])
+        finally:
+            for proc in procs:
+                if proc.is_alive():
+                    proc.terminate()
+                proc.join()
+
+    def serve(self, address, authkey: bytes) -> None:
+        """
+        Listens on `address` in the parent; every worker accepts
+        connections on the shared socket. Blocks until interrupted.
+        Protocol: send a request object, receive the response object.
+
+        A worker that dies while serving is forked again from the parent;
+        one that fails before it is ready (worker_init) stops the pool.
+        """
+        listener = Listener(address, authkey=authkey)
+        results = self._ctx.Queue()
+        procs = self._start(None, results, listener)
+        ready = set()
+        errors: Dict[int, str] = {}
+
+        def receive(timeout: float) -> None:
+            try:
+                msg = results.get(timeout=timeout)
+            except queue.Empty:
+                return
+            if msg[0] == "error":
+                errors[msg[1]] = msg[2]
+                print(f"⚠️ Pre-fork worker {msg[1]} failed:\n{msg[2]}")
+                return
+            self._record(msg)
+            ready.add(msg[1])
+
+        try:
+            while len(ready) < self.workers:
+                receive(1.0)
+                self._check_startup(procs, ready, errors)
+            print(self.memory_report())
+            print(f"✅ {self.workers} pre-forked workers serving on {listener.address[0]}:{listener.address[1]}")
+
+            while True:
+                receive(1.0)
+                for i, proc in enumerate(procs):
+                    if proc.is_alive():
+                        continue
+                    proc.join()
+                    while not results.empty():   # its last words, if any
+                        receive(0.1)
+                    self._check_startup(procs, ready, errors)
+                    print(f"⚠️ Pre-fork worker {i} exited (code {proc.exitcode}); forking a replacement")
+                    ready.discard(i)
+                    errors.pop(i, None)
+                    procs[i] = self._spawn(i, None, results, listener)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for proc in procs:
+                if proc.is_alive():
+                    proc.terminate()
+                proc.join()
+            listener.close()
+
+    @staticmethod
+    def _check_startup(procs: List, ready: set, errors: Dict[int, str]) -> None:
+        # A worker that dies before it is ready would only fail again
+        for i, proc in enumerate(procs):
+            if i not in ready and not proc.is_alive():
+                detail = errors.get(i) or f"exit code {proc.exitcode}"
+                raise RuntimeError(f"Pre-fork worker {i} failed during startup:\n{detail}")
+
+    def memory_report(self) -> str:
+        """
+        Per-process memory from smaps_rollup. USS is what each extra
+        worker really costs; shared pages are counted once in PSS.
+        """
+        if not self.memory or all(m is None for m in self.memory.values()):
+            return "Memory: /proc/<pid>/smaps_rollup not available"
+
+        lines = [f"{'process':<20} {'RSS MiB':>9} {'PSS MiB':>9} {'USS MiB':>9} {'shared MiB':>11}"]
+        for name, m in self.memory.items():
+            if m is None:
+                continue
+            lines.append(
+                f"{name:<20} {m['rss'] / 1024:>9.1f} {m['pss'] / 1024:>9.1f} "
+                f"{m['uss'] / 1024:>9.1f} {m['shared'] / 1024:>11.1f}"
+            )
+
+        # Latest sample per worker ("done" follows "ready")
+        last = {}
+        for name, m in self.memory.items():
+            if name.startswith("worker") and m:
+                last[name.split()[1]] = m
+        if last:
+            uss = sum(m["uss"] for m in last.values()) / len(last) / 1024
+            parent = (self.memory.get("parent") or {}).get("rss", 0) / 1024
+            lines.append(f"avg worker USS {uss:.1f} MiB ({len(last)} workers) vs parent RSS {parent:.1f} MiB")
+        return "Memory per process:\n" + "\n".join(lines)
@@ -0,0 +1,143 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sklearn.metrics import (
+    accuracy_score,
+    precision_recall_fscore_support,
+    classification_report,
+    confusion_matrix,
+)
+
+
+def normalize_prediction(pred: str, true: str) -> str:
+    """
+    Dataset-grade normalization:
+    - UNCLEAR counts as CONTRADICT if GT is CONTRADICT
+    - Otherwise UNCLEAR counts as CONSISTENT
+    """
+    pred = pred.lower()
+    true = true.lower()
+
+    if pred == "unclear" and true == "contradict":
+        return "contradict"
+    if pred == "unclear":
+        return "consistent"
+    return pred
+
+
+def score_prediction(pred: str) -> str:
+    """
+    Gold-independent scoring for comparing configurations: UNCLEAR stays
+    "unclear", which never matches a gold label, so it counts as wrong.
+    Report unclear_rate next to accuracy.
+    """
+    return pred.lower()
+
+
+def unclear_rate(y_pred: List[str]) -> float:
+    return sum(p == "unclear" for p in y_pred) / len(y_pred) if y_pred else 0.0
+
+
+def report_metrics(y_true: List[str], y_pred: List[str]) -> None:
+    """
+    Prints accuracy, macro P/R/F1, the classification report and
+    the confusion matrix.
+    """
+    accuracy = accuracy_score(y_true, y_pred)
+    precision, recall, f1, _ = precision_recall_fscore_support(
+        y_true, y_pred, average="macro", zero_division=0
+    )
+
+    print("\n" + "=" * 80)
+    print("EVALUATION RESULTS")
+    print("=" * 80)
+
+    print("\nAccuracy:")
+    print(round(accuracy, 4))
+
+    print("\nPrecision / Recall / F1 (macro):")
+    print(f"Precision: {precision:.4f}")
+    print(f"Recall   : {recall:.4f}")
+    print(f"F1-score : {f1:.4f}")
+
+    print("\nClassification Report:")
+    print(classification_report(y_true, y_pred, zero_division=0))
+
+    print("\nConfusion Matrix:")
+    print(confusion_matrix(y_true, y_pred))
+
+
+# --------------------------------------------------
+# Bootstrap confidence intervals (quick_eval.py)
+# --------------------------------------------------
+def _accuracy(y_true: np.ndarray, y_pred: np.ndarray) -> np.ndarray:
+    # Rows are bootstrap replicates
+    return (y_true == y_pred).mean(axis=-1)
+
+
+def _macro_f1(y_true: np.ndarray, y_pred: np.ndarray) -> np.ndarray:
+    # Same definition as sklearn's f1_score(average="macro", zero_division=0)
+    # over the gold labels (an "unclear" prediction is a miss, not a class),
+    # vectorized over replicates
+    f1s = []
+    for label in np.unique(y_true):
+        tp = ((y_pred == label) & (y_true == label)).sum(axis=-1)
+        fp = ((y_pred == label) & (y_true != label)).sum(axis=-1)
+        fn = ((y_pred != label) & (y_true == label)).sum(axis=-1)
+        denom = 2 * tp + fp + fn
+        f1s.append(np.where(denom > 0, 2 * tp / np.maximum(denom, 1), 0.0))
+    return np.mean(f1s, axis=0)
+
+
+METRICS = {"accuracy": _accuracy, "macro_f1": _macro_f1}
+
+
+def bootstrap_indices(n: int, n_boot: int = 2000, seed: int = 0) -> np.ndarray:
+    """
+    (n_boot, n) resampling indices. Reuse the same indices for two
+    configurations evaluated on the same rows to get paired intervals.
+    """
+    return np.random.default_rng(seed).integers(0, n, size=(n_boot, n))
+
+
+def bootstrap_ci(
+    y_true: List[str],
+    y_pred: List[str],
+    metric: str = "accuracy",
+    indices: Optional[np.ndarray] = None,
+    alpha: float = 0.05,
+) -> Tuple[float, float, float]:
+    """
+    (point estimate, lower, upper) percentile bootstrap interval.
+    """
+    fn = METRICS[metric]
+    t, p = np.asarray(y_true), np.asarray(y_pred)
+    if indices is None:
+        indices = bootstrap_indices(len(t))
+
+    point = float(fn(t, p))
+    samples = fn(t[indices], p[indices])
+    lo, hi = np.quantile(samples, [alpha / 2, 1 - alpha / 2])
+    return point, float(lo), float(hi)
+
+
+def paired_bootstrap_diff(
+    y_true: List[str],
+    pred_a: List[str],
+    pred_b: List[str],
+    metric: str = "accuracy",
+    indices: Optional[np.ndarray] = None,
+    alpha: float = 0.05,
+) -> Tuple[float, float, float]:
+    """
+    Interval for metric(b) - metric(a) on the same rows.
+    """
+    fn = METRICS[metric]
+    t, a, b = np.asarray(y_true), np.asarray(pred_a), np.asarray(pred_b)
+    if indices is None:
+        indices = bootstrap_indices(len(t))
+
+    point = float(fn(t, b) - fn(t, a))
+    samples = fn(t[indices], b[indices]) - fn(t[indices], a[indices])
+    lo, hi = np.quantile(samples, [alpha / 2, 1 - alpha / 2])
+    return point, float(lo), float(hi)
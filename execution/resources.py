@@ -0,0 +1,139 @@
+import os
+from typing import Dict, Optional
+
+
+# --------------------------------------------------
+# CPU thread governor
+# --------------------------------------------------
+# torch (query / chunk encoding), FAISS (OpenMP search) and our own worker
+# pools each default to "all cores". Run together they oversubscribe the
+# machine: N retrieval workers x T torch threads x F FAISS threads. One
+# core budget is split here instead, per workload:
+#
+#   build  - one big encoding job: every core to torch and FAISS
+#   serve  - low latency per request: few threads per query, several
+#            concurrent requests
+#   batch  - throughput: several retrieval workers, each with an equal
+#            share of the cores, single-threaded FAISS
+#
+# torch and FAISS are sized through their APIs. BLAS / OpenMP pools used by
+# numpy only read their env vars when first loaded, i.e. at import time,
+# long before configure() runs; export them when launching if needed, e.g.
+#   OMP_NUM_THREADS=1 OPENBLAS_NUM_THREADS=1 python final_test.py ...
+
+MODES = ("build", "serve", "batch")
+
+# Read by native libraries when they are first loaded; never set here
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def available_cores() -> int:
+    """
+    Cores this process may use: CPU_BUDGET if set, else the CPU
+    affinity mask (respects taskset / container cpusets).
+    """
+    budget = os.getenv("CPU_BUDGET")
+    if budget:
+        return max(1, int(budget))
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:   # not available on macOS / Windows
+        return max(1, os.cpu_count() or 1)
+
+
+class ResourcePlan:
+    """
+    Thread and pool sizes derived from one core budget.
+    """
+
+    def __init__(self, mode: str = "batch", cores: Optional[int] = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown resource mode {mode!r}, choose from {MODES}")
+        self.mode = mode
+        self.cores = cores or available_cores()
+
+        if mode == "build":
+            self.retrieval_workers = 1
+            self.torch_threads = self.cores
+            self.faiss_threads = self.cores
+            self.encode_batch_size = 64
+        elif mode == "serve":
+            # A single query encodes fastest on a few threads; the rest of
+            # the cores serve concurrent requests
+            self.torch_threads = min(4, self.cores)
+            self.retrieval_workers = max(1, self.cores // self.torch_threads)
+            self.faiss_threads = 1
+            self.encode_batch_size = 16
+        else:
+            self.retrieval_workers = min(4, self.cores)
+            self.torch_threads = max(1, self.cores // self.retrieval_workers)
+            self.faiss_threads = 1
+            self.encode_batch_size = 32
+
+        self.torch_interop_threads = 1
+
+    def as_dict(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "cores": self.cores,
+            "retrieval_workers": self.retrieval_workers,
+            "torch_threads": self.torch_threads,
+            "torch_interop_threads": self.torch_interop_threads,
+            "faiss_threads": self.faiss_threads,
+            "encode_batch_size": self.encode_batch_size,
+        }
+
+
+_applied: Optional[ResourcePlan] = None
+
+
+def configure(mode: str = "batch", cores: Optional[int] = None, verbose: bool = True) -> ResourcePlan:
+    """
+    Applies a plan's torch and FAISS thread counts process-wide and
+    returns it; pass the plan on to what it sizes (e.g. LocalVectorIndex).
+    """
+    global _applied
+    plan = ResourcePlan(mode, cores)
+
+    # HF tokenizers spawn their own pool otherwise (read on first use)
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+    import faiss
+    import torch
+
+    torch.set_num_threads(plan.torch_threads)
+    try:
+        torch.set_num_interop_threads(plan.torch_interop_threads)
+    except RuntimeError:
+        pass   # only settable before the first inter-op parallel work
+
+    faiss.omp_set_num_threads(plan.faiss_threads)
+
+    _applied = plan
+    if verbose:
+        print(report())
+    return plan
+
+
+def report() -> str:
+    """
+    Effective settings, read back from the libraries.
+    """
+    import faiss
+    import torch
+
+    plan = _applied
+    lines = [
+        f"⚙️ CPU plan: mode={plan.mode if plan else 'unset'} cores={plan.cores if plan else available_cores()}",
+        f"   torch threads={torch.get_num_threads()} interop={torch.get_num_interop_threads()}  "
+        f"faiss omp threads={faiss.omp_get_max_threads()}",
+    ]
+    if plan is not None:
+        lines.append(
+            f"   retrieval workers={plan.retrieval_workers}  "
+            f"encode batch size={plan.encode_batch_size}"
+        )
+    inherited = [f"{v}={os.environ[v]}" for v in THREAD_ENV_VARS if v in os.environ]
+    if inherited:
+        lines.append("   from the launch environment: " + "  ".join(inherited))
+    return "\n".join(lines)
@@ -0,0 +1,87 @@
+import glob
+import os
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+Shard = Tuple[int, int]   # (index, count), index is 0-based
+
+PARTIALS_DIR = "results/partials"
+
+
+def parse_shard(spec: Optional[str]) -> Optional[Shard]:
+    """
+    Parses "i/N" (0 <= i < N). Returns None when no shard is given.
+    """
+    if spec is None:
+        return None
+
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", spec)
+    if not match:
+        raise ValueError(f"Invalid shard spec {spec!r}, expected i/N")
+
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard spec {spec!r}, need 0 <= i < N")
+
+    return index, count
+
+
+def shard_of(row_id, count: int) -> int:
+    """
+    Deterministic shard assignment from the row id, independent of
+    row order, process and Python hash seed.
+    """
+    return zlib.crc32(str(row_id).strip().encode("utf-8")) % count
+
+
+def in_shard(row_id, shard: Optional[Shard]) -> bool:
+    if shard is None:
+        return True
+    index, count = shard
+    return shard_of(row_id, count) == index
+
+
+def story_shards(story_ids: Iterable[str], count: int) -> Dict[str, int]:
+    """
+    Story -> index shard: sorted story ids dealt round-robin, so N shards
+    get equal story counts (a hash of a handful of ids rarely does).
+    Rows keep the crc32 scheme of shard_of.
+    """
+    return {sid: i % count for i, sid in enumerate(sorted(story_ids))}
+
+
+# --------------------------------------------------
+# Partial result files
+# --------------------------------------------------
+def partial_path(kind: str, shard: Shard, partials_dir: str = PARTIALS_DIR) -> str:
+    index, count = shard
+    return os.path.join(partials_dir, f"{kind}_shard_{index:03d}_of_{count:03d}.csv")
+
+
+def find_partials(kind: str, partials_dir: str = PARTIALS_DIR) -> List[str]:
+    """
+    Returns the partial files of one complete shard set, in shard order.
+    """
+    pattern = re.compile(rf"{re.escape(kind)}_shard_(\d+)_of_(\d+)\.csv$")
+    found = {}
+
+    for path in glob.glob(os.path.join(partials_dir, f"{kind}_shard_*_of_*.csv")):
+        match = pattern.search(os.path.basename(path))
+        if match:
+            found[(int(match.group(1)), int(match.group(2)))] = path
+
+    if not found:
+        raise FileNotFoundError(f"No '{kind}' partials found in {partials_dir}")
+
+    counts = {count for _, count in found}
+    if len(counts) != 1:
+        raise ValueError(f"Partials from different shard counts in {partials_dir}: {sorted(counts)}")
+
+    count = counts.pop()
+    missing = [i for i in range(count) if (i, count) not in found]
+    if missing:
+        raise ValueError(f"Missing '{kind}' partials for shards {missing} of {count}")
+
+    return [found[(i, count)] for i in range(count)]
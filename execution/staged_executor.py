@@ -0,0 +1,210 @@
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List
+
+
+class Stage:
+    """
+    One step of the pipeline: `fn` maps an item to the next stage's item,
+    run by `workers` threads.
+    """
+
+    def __init__(self, name: str, fn: Callable, workers: int = 1):
+        if workers < 1:
+            raise ValueError(f"Stage {name!r} needs at least one worker")
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+
+        self.items = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _record(self, seconds: float) -> None:
+        with self._lock:
+            self.items += 1
+            self.busy_seconds += seconds
+
+
+class _Failure:
+    def __init__(self, stage: str, error: BaseException):
+        self.stage = stage
+        self.error = error
+
+
+_END = object()
+
+
+class StagedExecutor:
+    """
+    Runs items through a chain of stages connected by bounded queues.
+
+    Each stage has its own worker threads, so e.g. retrieval for upcoming
+    rows overlaps in-flight LLM calls, and throughput approaches the limit
+    of the slowest stage. Full queues block the upstream stage
+    (backpressure), so at most roughly queue_size items wait between two
+    stages. Results are yielded to the caller – the writing stage – either
+    in input order or as they finish, tagged with their input position.
+
+    In order, a slow row holds back every later result; the input is then
+    only admitted up to `window` positions past the oldest unreleased row,
+    which bounds the reorder buffer as well.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 8, ordered: bool = True):
+        if not stages:
+            raise ValueError("StagedExecutor needs at least one stage")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.ordered = ordered
+        # Enough positions to keep every worker busy plus one queue of slack
+        self.window = queue_size + sum(stage.workers for stage in stages)
+        self._stop = threading.Event()
+        self._released = 0
+        self._progress = threading.Condition()
+
+    # --------------------------------------------------
+    # Plumbing
+    # --------------------------------------------------
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _admit(self, seq: int) -> bool:
+        # Ordered runs: wait until `seq` is within the window of released results
+        with self._progress:
+            while seq >= self._released + self.window:
+                if self._stop.is_set():
+                    return False
+                self._progress.wait(timeout=0.1)
+        return True
+
+    def _feed(self, items: Iterable, out: queue.Queue, n_workers: int) -> None:
+        try:
+            for seq, item in enumerate(items):
+                if self.ordered and not self._admit(seq):
+                    return
+                if not self._put(out, (seq, item)):
+                    return
+        except BaseException as e:   # reading the input failed
+            self._put(out, (-1, _Failure("input", e)))
+        for _ in range(n_workers):
+            self._put(out, _END)
+
+    def _work(
+        self,
+        stage: Stage,
+        inbox: queue.Queue,
+        outbox: queue.Queue,
+        remaining: List[int],
+        lock: threading.Lock,
+        downstream_workers: int,
+    ) -> None:
+        while not self._stop.is_set():
+            try:
+                entry = inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            if entry is _END:
+                # Last worker of this stage closes the next one
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    for _ in range(downstream_workers):
+                        self._put(outbox, _END)
+                return
+
+            seq, item = entry
+            if not isinstance(item, _Failure):
+                t0 = time.perf_counter()
+                try:
+                    item = stage.fn(item)
+                except BaseException as e:
+                    item = _Failure(stage.name, e)
+                stage._record(time.perf_counter() - t0)
+
+            if not self._put(outbox, (seq, item)):
+                return
+
+    # --------------------------------------------------
+    # Public API
+    # --------------------------------------------------
+    def run(self, items: Iterable) -> Iterator:
+        """
+        Yields the last stage's outputs (in input order when ordered=True).
+        With ordered=False, yields (input_position, output) pairs as they finish.
+        Re-raises the first stage error in the caller.
+        """
+        self._stop.clear()
+        self._released = 0
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [
+            threading.Thread(
+                target=self._feed,
+                args=(items, queues[0], self.stages[0].workers),
+                daemon=True,
+            )
+        ]
+
+        for i, stage in enumerate(self.stages):
+            downstream = self.stages[i + 1].workers if i + 1 < len(self.stages) else 1
+            remaining, lock = [stage.workers], threading.Lock()
+            for _ in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work,
+                    args=(stage, queues[i], queues[i + 1], remaining, lock, downstream),
+                    daemon=True,
+                    name=f"{stage.name}-worker",
+                ))
+
+        for t in threads:
+            t.start()
+
+        results = queues[-1]
+        pending: Dict[int, object] = {}
+        next_seq = 0
+
+        try:
+            while True:
+                entry = results.get()
+                if entry is _END:
+                    break
+
+                seq, item = entry
+                if isinstance(item, _Failure):
+                    raise RuntimeError(f"Stage {item.stage!r} failed") from item.error
+
+                if not self.ordered:
+                    yield seq, item
+                    continue
+
+                # Reorder buffer: release results in input order
+                pending[seq] = item
+                while next_seq in pending:
+                    item = pending.pop(next_seq)
+                    next_seq += 1
+                    with self._progress:
+                        self._released = next_seq
+                        self._progress.notify()
+                    yield item
+        finally:
+            self._stop.set()
+
+    def summary(self) -> str:
+        lines = ["Stage statistics:"]
+        for stage in self.stages:
+            avg = stage.busy_seconds / stage.items if stage.items else 0.0
+            lines.append(
+                f"  {stage.name:<10} workers={stage.workers:<3} items={stage.items:<6} "
+                f"avg={avg * 1000:.1f} ms  "
+                f"capacity≈{stage.workers / avg if avg else float('inf'):.2f} items/s"
+            )
+        return "\n".join(lines)
@@ -1,12 +1,32 @@
-import pandas as pd
+import argparse
+
 from tqdm import tqdm
 
-from ingestion.data_ingestion import load_novels
-from indexing.chunking import chunk_all_novels
-from indexing.local_vector_index import LocalVectorIndex
-from retrieval.retrieval_evidence import retrieve_evidence, normalize_story_id
+from execution import resources
+from execution.csv_output import AtomicCsvWriter
+from execution.claim_stages import claim_stages
+from execution.staged_executor import StagedExecutor
+from execution.sharding import (
+    PARTIALS_DIR,
+    in_shard,
+    parse_shard,
+    partial_path,
+)
+from ingestion.data_ingestion import ClaimReader
+from ingestion.dedup import DEFAULT_THRESHOLD, audit_path, find_duplicates
+from indexing.hierarchical_index import HierarchicalIndex
+from indexing.local_vector_index import build_local_index
+from indexing.sharded_index import ShardedVectorIndex
+from retrieval.dossier import DossierStore
+from retrieval.retrieval_evidence import gather_evidence
+from retrieval.sentence_index import SentenceEvidenceIndex
+from retrieval.snapshot import SnapshotWriter, retrieval_config
 from reasoning.claim_reasoner import ClaimReasoner
+from reasoning.escalation import STRONG_MODEL, make_escalating_reasoner, parse_steps
+from reasoning.nli_cascade import CascadeReasoner
 from config.llm_config import GeminiLLM
+from config.prompt_templates import DEFAULT_PROMPT_VARIANT, PROMPT_VARIANTS
+from config.usage_tracker import parse_budget, usage_tracker
 
 
 # --------------------------------------------------
@@ -20,9 +40,11 @@ def build_evidence_rationale(claim, evidence_chunks, reasoning_output):
     lines.append("")
 
     lines.append("Relevant Excerpts from the Novel:")
+    # The dossier fact summary is not a novel excerpt
+    evidence_chunks = [ch for ch in evidence_chunks if not ch.get("dossier_summary")]
     if evidence_chunks:
         for i, ch in enumerate(evidence_chunks[:5], 1):
-            excerpt = ch["text"].strip().replace("\n", " ")
+            excerpt = (ch.get("excerpt") or ch["text"]).strip().replace("\n", " ")
             excerpt = excerpt[:600]
             lines.append(f'[Excerpt {i}] "{excerpt}..."')
     else:
@@ -52,63 +74,237 @@ def build_evidence_rationale(claim, evidence_chunks, reasoning_output):
     return "\n".join(lines)
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run final inference on data/test.csv")
+    parser.add_argument(
+        "--nli-cascade",
+        action="store_true",
+        help="Decide confident rows with a local NLI model and only send the rest to the LLM",
+    )
+    parser.add_argument(
+        "--structured-output",
+        action="store_true",
+        help="Ask the LLM for a JSON verdict (label + short explanation) instead of free-form analysis",
+    )
+    parser.add_argument(
+        "--prompt-variant",
+        default=DEFAULT_PROMPT_VARIANT,
+        choices=sorted(PROMPT_VARIANTS),
+        help="Prompt layout; non-legacy variants send the static rules as the system instruction",
+    )
+    parser.add_argument(
+        "--hierarchical",
+        action="store_true",
+        help="Coarse-to-fine retrieval: pick top chapters first, then search chunks inside them",
+    )
+    parser.add_argument(
+        "--sentence-evidence",
+        action="store_true",
+        help="Send only the best-matching sentences (plus context) of each passage to the LLM",
+    )
+    parser.add_argument(
+        "--shard",
+        default=None,
+        help="Only process shard i of N (\"i/N\", 0-based); results go to a partial file",
+    )
+    parser.add_argument(
+        "--index-dir",
+        default=None,
+        help="Load a prebuilt index from this directory (built and saved there if missing)",
+    )
+    parser.add_argument(
+        "--index-shards",
+        default=None,
+        help="Comma-separated host:port list of index shard workers (python -m indexing serve)",
+    )
+    parser.add_argument(
+        "--dossiers",
+        default=None,
+        help="Character dossier file (python -m retrieval.dossier); consulted before retrieval",
+    )
+    parser.add_argument(
+        "--escalate",
+        action="store_true",
+        help="Judge on a few passages first; retry UNCLEAR / unparsable verdicts with more evidence",
+    )
+    parser.add_argument("--escalation-steps", default="4,8,12", help="Evidence sizes tried in order")
+    parser.add_argument(
+        "--strong-model",
+        nargs="?",
+        const=STRONG_MODEL,
+        default=None,
+        help=f"Use a stronger model for the last escalation step (default: {STRONG_MODEL})",
+    )
+    parser.add_argument(
+        "--budget",
+        default=None,
+        help="Hard LLM budget, e.g. tokens=2e6,requests=500,cost=5 (USD estimate); stops cleanly when reached",
+    )
+    parser.add_argument(
+        "--soft-budget",
+        default=None,
+        help="Soft LLM budget (same format); requests are throttled once it is reached",
+    )
+    parser.add_argument("--partials-dir", default=PARTIALS_DIR)
+    parser.add_argument(
+        "--retrieval-workers",
+        type=int,
+        default=None,
+        help="Threads running retrieval (overlaps with in-flight LLM calls); default from the CPU plan",
+    )
+    parser.add_argument(
+        "--reasoning-workers",
+        type=int,
+        default=1,
+        help="Concurrent LLM reasoning calls",
+    )
+    parser.add_argument("--queue-size", type=int, default=8, help="Bounded queue between stages")
+    parser.add_argument(
+        "--snapshot-out",
+        default=None,
+        help="Also save each row's evidence for replay_reasoning.py (e.g. artifacts/evidence_test.jsonl.gz)",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Reason once per group of exact duplicate backstories (same story and character)",
+    )
+    parser.add_argument(
+        "--dedup-near",
+        action="store_true",
+        help="Also share verdicts between near duplicates (implies --dedup)",
+    )
+    parser.add_argument("--dedup-threshold", type=float, default=DEFAULT_THRESHOLD, help="Near-duplicate similarity")
+    parser.add_argument(
+        "--dedup-audit",
+        default=None,
+        help=f"CSV of duplicate -> canonical rows (default: {audit_path('test')})",
+    )
+    parser.add_argument("--cores", type=int, default=None, help="CPU core budget (default: all available)")
+    parser.add_argument(
+        "--cpu-mode",
+        default="batch",
+        choices=resources.MODES,
+        help="How the core budget is split between torch, FAISS and retrieval workers",
+    )
+
+    args = parser.parse_args()
+    if args.index_shards and (args.hierarchical or args.index_dir):
+        parser.error("--index-shards cannot be combined with --hierarchical or --index-dir")
+    return args
+
+
 # --------------------------------------------------
 # Final Test Pipeline
 # --------------------------------------------------
 def main():
+    args = parse_args()
+    shard = parse_shard(args.shard)
+    usage_tracker.set_budgets(hard=parse_budget(args.budget), soft=parse_budget(args.soft_budget))
+    plan = resources.configure(args.cpu_mode, args.cores)
+    args.retrieval_workers = args.retrieval_workers or plan.retrieval_workers
+
     print("=" * 80)
     print("FINAL TEST INFERENCE")
     print("=" * 80)
 
-    df = pd.read_csv("data/test.csv")
-
-    required_cols = {"id", "backstory", "char"}
-    missing = required_cols - set(df.columns)
-    if missing:
-        raise ValueError(f"Missing columns in test.csv: {missing}")
-
-    # Identify story column
-    story_col = None
-    for c in ["story_id", "book_name", "book", "novel_id"]:
-        if c in df.columns:
-            story_col = c
-            break
+    # Streamed; columns (incl. the story identifier column) validated up front
+    reader = ClaimReader("data/test.csv", required=("id", "backstory", "char"))
+    print(f"Using '{reader.story_column}' as story identifier")
 
-    if story_col is None:
-        raise ValueError("No story identifier column found in test.csv")
+    rows = (r for r in reader if in_shard(r.id, shard))
+    if shard is not None:
+        print(f"Processing shard {shard[0]}/{shard[1]}")
 
-    print(f"Using '{story_col}' as story identifier")
-
-    novels = load_novels("data/novels")
-    chunks = chunk_all_novels(novels)
+    if args.index_shards:
+        index = ShardedVectorIndex(args.index_shards.split(","))
+    else:
+        index = build_local_index("data/novels", index_dir=args.index_dir, plan=plan)
+        if args.hierarchical:
+            index = HierarchicalIndex(index)
+    sentence_index = SentenceEvidenceIndex(index.model) if args.sentence_evidence else None
+    dossiers = DossierStore.load(args.dossiers) if args.dossiers else None
 
-    index = LocalVectorIndex()
-    index.index_chunks(chunks)
+    # Duplicate backstories share one retrieval + LLM call (canonical row)
+    dedup = None
+    if args.dedup or args.dedup_near:
+        dedup = find_duplicates(
+            rows,
+            model=index.model,
+            threshold=args.dedup_threshold,
+            share_near=args.dedup_near,
+            batch_size=plan.encode_batch_size,
+        )
+        dedup.save(args.dedup_audit or audit_path("test", shard))
+        print(dedup.summary())
+        rows = dedup.canonical_rows()
 
     llm = GeminiLLM(
         model_name="models/gemini-flash-latest",
         max_output_tokens=1536,
         temperature=0.0,
     )
-    reasoner = ClaimReasoner(llm)
+    reasoner = ClaimReasoner(
+        llm, structured_output=args.structured_output, prompt_variant=args.prompt_variant
+    )
+    escalation = None
+    top_k = 8
+    if args.escalate:
+        escalation = make_escalating_reasoner(
+            reasoner,
+            steps=parse_steps(args.escalation_steps),
+            strong_model=args.strong_model,
+            structured_output=args.structured_output,
+            prompt_variant=args.prompt_variant,
+        )
+        reasoner = escalation
+        top_k = escalation.max_evidence   # retrieve once, reason on prefixes
+    if args.nli_cascade:
+        reasoner = CascadeReasoner(reasoner)
 
-    outputs = []
+    if shard is not None:
+        writer = AtomicCsvWriter(
+            partial_path("test", shard, args.partials_dir),
+            ["row_index", "id", "prediction", "evidence_rationale"],
+        )
+    else:
+        writer = AtomicCsvWriter("result.csv", ["id", "prediction", "evidence_rationale"])
 
-    for _, row in tqdm(df.iterrows(), total=len(df)):
-        example_id = row["id"]
-        claim = str(row["backstory"])
-        character = str(row["char"])
-        story_id = normalize_story_id(str(row[story_col]))
+    snapshot = None
+    if args.snapshot_out:
+        config = retrieval_config(index, top_k, args.sentence_evidence, args.dossiers)
+        snapshot = SnapshotWriter(args.snapshot_out, config, claims="data/test.csv")
 
-        evidence = retrieve_evidence(
-            claim=claim,
-            story_id=story_id,
+    # Retrieval and reasoning run as overlapped stages; this loop writes in order
+    def retrieve(row):
+        # Character dossier first, if one was built for this character
+        return gather_evidence(
+            claim=row.backstory,
+            story_id=row.story_id,
             vector_index=index,
-            character_name=character,
-            top_k=8,
+            character_name=row.char,
+            top_k=top_k,
+            sentence_index=sentence_index,
+            dossiers=dossiers,
         )
 
-        reasoning = reasoner.verify_claim(claim, evidence)
+    def reason(row, evidence):
+        return reasoner.verify_claim(row.backstory, evidence)
+
+    executor = StagedExecutor(
+        claim_stages(retrieve, reason, args.retrieval_workers, args.reasoning_workers),
+        queue_size=args.queue_size,
+    )
+
+    # Stops cleanly between rows once the hard budget is used up
+    results = usage_tracker.until_budget(executor.run(rows))
+    if dedup is not None:
+        results = dedup.expand(results)
+    for row, evidence, reasoning in tqdm(results):
+        if snapshot is not None:
+            snapshot.write(row, evidence)
+        example_id = row.id
+        claim = row.backstory
 
         # -------------------------------
         # Evidence-aware label decision
@@ -126,14 +322,42 @@ def main():
             reasoning_output=reasoning,
         )
 
-        outputs.append({
+        writer.write({
+            "row_index": row.row_index,
             "id": example_id,
             "prediction": final_label,
             "evidence_rationale": rationale,
         })
 
-    pd.DataFrame(outputs).to_csv("result.csv", index=False)
-    print("\nSaved predictions to result.csv")
+    reader.close()
+    if snapshot is not None:
+        snapshot.close()
+
+    if usage_tracker.stopped is not None:
+        # Never publish an incomplete submission file
+        writer.close(commit=False)
+        print(f"\n⚠️ Run stopped by budget after {writer.rows} rows; "
+              f"incomplete predictions kept in {writer.tmp_path}")
+    else:
+        writer.close()
+        if shard is not None:
+            print(f"\nSaved shard predictions to {writer.path}")
+            print("Run `python merge_shards.py test` once all shards are done.")
+        else:
+            print("\nSaved predictions to result.csv")
+
+    print(executor.summary())
+    if args.hierarchical:
+        print(index.summary())
+    if args.nli_cascade:
+        print(reasoner.summary())
+    if dossiers is not None:
+        print(dossiers.summary())
+    if dedup is not None:
+        print(dedup.summary())
+    if escalation is not None:
+        print(escalation.summary())
+    print(usage_tracker.summary())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,118 @@
+"""
+Index artifact commands.
+
+    python -m indexing build --out artifacts/index
+    python -m indexing info artifacts/index
+    python -m indexing verify artifacts/index --novels-dir data/novels
+
+    python -m indexing build --out artifacts/shard0 --shard 0/2
+    python -m indexing serve artifacts/shard0 --port 7001
+"""
+import argparse
+import json
+import time
+
+from indexing.artifact import check_compatible, read_manifest
+from indexing.chunking import CHUNK_SIZE_CHARS, OVERLAP_CHARS
+
+
+DEFAULT_EMBEDDING_MODEL = "BAAI/bge-base-en-v1.5"
+
+
+def build(args) -> None:
+    from execution import resources
+    from ingestion.data_ingestion import load_novels
+    from indexing.chunking import chunk_all_novels
+    from indexing.entity_index import build_entity_index
+    from indexing.local_vector_index import LocalVectorIndex
+
+    plan = resources.configure("build", args.cores)
+    t0 = time.time()
+
+    novels = load_novels(args.novels_dir)
+    if args.shard:
+        from execution.sharding import parse_shard, story_shards
+
+        index_of, count = parse_shard(args.shard)
+        owner = story_shards(novels, count)
+        novels = {sid: text for sid, text in novels.items() if owner[sid] == index_of}
+        if not novels:
+            raise SystemExit(f"No novels fall into shard {args.shard}")
+        print(f"Index shard {args.shard}: {sorted(novels)}")
+    chunks = chunk_all_novels(novels)
+
+    index = LocalVectorIndex(args.model, plan=plan)
+    index.index_chunks(chunks)
+    index.entity_index = build_entity_index(novels, chunks)
+    index.save(args.out, novels=novels, chunk_size=CHUNK_SIZE_CHARS, overlap=OVERLAP_CHARS)
+
+    print(f"Built {len(chunks)} chunks from {len(novels)} novels in {time.time() - t0:.1f}s")
+
+
+def info(args) -> None:
+    print(json.dumps(read_manifest(args.artifact), indent=2))
+
+
+def verify(args) -> None:
+    from ingestion.data_ingestion import load_novels
+
+    novels = load_novels(args.novels_dir)
+    check_compatible(
+        read_manifest(args.artifact),
+        embedding_model=args.model,
+        chunk_size=CHUNK_SIZE_CHARS,
+        overlap=OVERLAP_CHARS,
+        novels=novels,
+    )
+    print(f"✅ {args.artifact} is compatible with {args.novels_dir}")
+
+
+def serve(args) -> None:
+    from indexing.sharded_index import serve_shard, shard_authkey
+
+    try:
+        authkey = shard_authkey()
+    except ValueError as e:
+        raise SystemExit(str(e))
+    serve_shard(args.artifact, (args.host, args.port), authkey=authkey, cores=args.cores)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m indexing", description="Index artifact commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="Build and write a versioned index artifact")
+    p_build.add_argument("--out", required=True, help="Artifact directory")
+    p_build.add_argument("--novels-dir", default="data/novels")
+    p_build.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL)
+    p_build.add_argument(
+        "--shard",
+        default=None,
+        help="Only index the stories of shard i of N (\"i/N\"), for scatter-gather search",
+    )
+    p_build.add_argument("--cores", type=int, default=None, help="CPU core budget (default: all available)")
+    p_build.set_defaults(func=build)
+
+    p_info = sub.add_parser("info", help="Print an artifact's manifest")
+    p_info.add_argument("artifact")
+    p_info.set_defaults(func=info)
+
+    p_verify = sub.add_parser("verify", help="Check an artifact against the current novels and config")
+    p_verify.add_argument("artifact")
+    p_verify.add_argument("--novels-dir", default="data/novels")
+    p_verify.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL)
+    p_verify.set_defaults(func=verify)
+
+    p_serve = sub.add_parser("serve", help="Serve an index shard to ShardedVectorIndex front ends")
+    p_serve.add_argument("artifact")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=7001)
+    p_serve.add_argument("--cores", type=int, default=None, help="CPU core budget (default: all available)")
+    p_serve.set_defaults(func=serve)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional
+
+
+# Bump whenever the on-disk layout changes
+ARTIFACT_VERSION = 2
+
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.faiss"
+CHUNKS_DIR = "chunks"
+ENTITIES_FILE = "entities.json"
+
+
+class IncompatibleArtifactError(ValueError):
+    pass
+
+
+def hash_novels(novels: Dict[str, str]) -> Dict[str, str]:
+    """
+    sha256 of each cleaned novel text, keyed by story_id.
+    """
+    return {
+        story_id: hashlib.sha256(text.encode("utf-8")).hexdigest()
+        for story_id, text in sorted(novels.items())
+    }
+
+
+def is_artifact(artifact_dir: Optional[str]) -> bool:
+    return bool(artifact_dir) and os.path.exists(os.path.join(artifact_dir, MANIFEST_FILE))
+
+
+def write_manifest(artifact_dir: str, manifest: Dict) -> None:
+    manifest = dict(manifest)
+    manifest.setdefault("format_version", ARTIFACT_VERSION)
+    manifest.setdefault("created_at", time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+
+    with open(os.path.join(artifact_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def read_manifest(artifact_dir: str) -> Dict:
+    with open(os.path.join(artifact_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_compatible(
+    manifest: Dict,
+    embedding_model: Optional[str] = None,
+    chunk_size: Optional[int] = None,
+    overlap: Optional[int] = None,
+    novels: Optional[Dict[str, str]] = None,
+) -> None:
+    """
+    Raises IncompatibleArtifactError if the artifact was built with a
+    different layout, model, chunking or corpus than expected.
+    """
+    problems = []
+
+    if manifest.get("format_version") != ARTIFACT_VERSION:
+        problems.append(
+            f"format version {manifest.get('format_version')} != {ARTIFACT_VERSION}"
+        )
+    if embedding_model is not None and manifest.get("embedding_model") != embedding_model:
+        problems.append(
+            f"embedding model {manifest.get('embedding_model')} != {embedding_model}"
+        )
+    if chunk_size is not None and manifest.get("chunk_size") != chunk_size:
+        problems.append(f"chunk_size {manifest.get('chunk_size')} != {chunk_size}")
+    if overlap is not None and manifest.get("overlap") != overlap:
+        problems.append(f"overlap {manifest.get('overlap')} != {overlap}")
+    if novels is not None:
+        expected = hash_novels(novels)
+        built = manifest.get("novels", {})
+        changed = sorted(
+            sid for sid in set(expected) | set(built)
+            if expected.get(sid) != built.get(sid)
+        )
+        if changed:
+            problems.append(f"novel contents differ for {changed}")
+
+    if problems:
+        raise IncompatibleArtifactError(
+            "Index artifact is incompatible: " + "; ".join(problems)
+        )
@@ -0,0 +1,131 @@
+import json
+import os
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+
+
+# -----------------------------
+# Columnar chunk metadata
+# -----------------------------
+# One file per column inside <artifact>/chunks/:
+#   numeric columns -> <name>.npy
+#   string columns  -> <name>.bin (UTF-8, concatenated) + <name>.offsets.npy
+# Both are memory-mapped on load, so processes on one host share the pages.
+COLUMNS_FILE = "columns.json"
+
+
+def _column_type(value) -> str:
+    if isinstance(value, str):
+        return "str"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int64"
+    if isinstance(value, float):
+        return "float64"
+    raise TypeError(f"Unsupported chunk field type: {type(value).__name__}")
+
+
+class ChunkStore(Sequence):
+    """
+    Read-only, memory-mapped list of chunk dicts.
+    Behaves like the List[Dict] built by chunk_all_novels.
+    """
+
+    def __init__(self, columns: Dict[str, str], data: Dict[str, tuple]):
+        self.columns = columns          # name -> type
+        self._data = data               # name -> (values,) or (bytes, offsets)
+        first = next(iter(data.values()))
+        self._len = len(first[1]) - 1 if len(first) == 2 else len(first[0])
+
+    # --------------------------------------------------
+    # Writing
+    # --------------------------------------------------
+    @staticmethod
+    def write(chunks: List[Dict], store_dir: str) -> None:
+        if not chunks:
+            raise ValueError("No chunks to write.")
+
+        os.makedirs(store_dir, exist_ok=True)
+        columns = {name: _column_type(v) for name, v in chunks[0].items()}
+
+        for name, kind in columns.items():
+            values = [chunk[name] for chunk in chunks]
+
+            if kind == "str":
+                encoded = [v.encode("utf-8") for v in values]
+                offsets = np.zeros(len(encoded) + 1, dtype="int64")
+                np.cumsum([len(b) for b in encoded], out=offsets[1:])
+                with open(os.path.join(store_dir, f"{name}.bin"), "wb") as f:
+                    for b in encoded:
+                        f.write(b)
+                np.save(os.path.join(store_dir, f"{name}.offsets.npy"), offsets)
+            else:
+                np.save(os.path.join(store_dir, f"{name}.npy"), np.asarray(values, dtype=kind))
+
+        with open(os.path.join(store_dir, COLUMNS_FILE), "w", encoding="utf-8") as f:
+            json.dump(columns, f)
+
+    # --------------------------------------------------
+    # Reading
+    # --------------------------------------------------
+    @classmethod
+    def open(cls, store_dir: str, mmap: bool = True) -> "ChunkStore":
+        with open(os.path.join(store_dir, COLUMNS_FILE), "r", encoding="utf-8") as f:
+            columns = json.load(f)
+
+        mmap_mode = "r" if mmap else None
+        data = {}
+
+        for name, kind in columns.items():
+            if kind == "str":
+                offsets = np.load(os.path.join(store_dir, f"{name}.offsets.npy"), mmap_mode=mmap_mode)
+                bin_path = os.path.join(store_dir, f"{name}.bin")
+                if os.path.getsize(bin_path) == 0:
+                    raw = np.zeros(0, dtype="uint8")
+                elif mmap:
+                    raw = np.memmap(bin_path, dtype="uint8", mode="r")
+                else:
+                    raw = np.fromfile(bin_path, dtype="uint8")
+                data[name] = (raw, offsets)
+            else:
+                data[name] = (np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode=mmap_mode),)
+
+        return cls(columns, data)
+
+    def _value(self, name: str, i: int):
+        entry = self._data[name]
+        if self.columns[name] == "str":
+            raw, offsets = entry
+            return bytes(raw[offsets[i]:offsets[i + 1]]).decode("utf-8")
+        return entry[0][i].item()
+
+    def column(self, name: str) -> List:
+        """
+        Materializes one column as a Python list (cheap for small fields).
+        """
+        if self.columns[name] == "str":
+            raw, offsets = self._data[name]
+            blob = bytes(raw)
+            return [
+                blob[offsets[i]:offsets[i + 1]].decode("utf-8")
+                for i in range(self._len)
+            ]
+        return self._data[name][0].tolist()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._len))]
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError(i)
+        return {name: self._value(name, int(i)) for name in self.columns}
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(self._len):
+            yield self[i]
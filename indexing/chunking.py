@@ -1,5 +1,8 @@
+from bisect import bisect_right
 from typing import Dict, List
 
+from ingestion.text_cleaning import find_chapter_starts
+
 
 # -----------------------------
 # Chunking configuration
@@ -16,6 +19,7 @@ def chunk_novel(
 ) -> List[dict]:
     """
     Splits a novel into overlapping chunks with metadata.
+    Each chunk records the chapter its text starts in.
     """
 
     if overlap >= chunk_size:
@@ -23,6 +27,7 @@ def chunk_novel(
 
     chunks = []
     text_length = len(full_text)
+    chapter_starts = find_chapter_starts(full_text)
 
     start = 0
     chunk_index = 0
@@ -30,20 +35,25 @@ def chunk_novel(
 
     while start < text_length:
         end = min(start + chunk_size, text_length)
-        chunk_text = full_text[start:end].strip()
+        raw_text = full_text[start:end]
+        chunk_text = raw_text.strip()
 
         # Skip empty / whitespace-only chunks
         if not chunk_text:
             start += step
             continue
 
+        # Offsets of the stripped text, so full_text[start_char:end_char] == text
+        text_start = start + (len(raw_text) - len(raw_text.lstrip()))
+
         chunk = {
             "chunk_id": f"{story_id}_{chunk_index:05d}",
             "story_id": story_id,
             "text": chunk_text,
-            "start_char": start,
-            "end_char": end,
+            "start_char": text_start,
+            "end_char": text_start + len(chunk_text),
             "position": start / text_length,
+            "chapter": bisect_right(chapter_starts, text_start) - 1,
         }
 
         chunks.append(chunk)
@@ -0,0 +1,236 @@
+import json
+import os
+import re
+from bisect import bisect_right
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+
+# -----------------------------
+# Entity configuration
+# -----------------------------
+# Optional per-story alias file, data/entities/<story_id>.json:
+#   {"characters": {canonical: [surface forms]}, "places": {...},
+#    "ambiguous": [names shared by several characters]}
+# Dataset character names may join several identities with "/"
+# (e.g. "Tom Ayrton/Ben Joyce"); each part is looked up separately.
+# Every story, with or without a file, also gets its recurring
+# capitalized n-grams (proper names) indexed, so new novels are
+# pre-filtered too.
+ENTITY_ALIASES_DIR = "data/entities"
+
+# A word counts as part of a name when its lowercase form is this many
+# times rarer than the capitalized one ("Faria" vs "The" / "the")
+NAME_CASE_RATIO = 10
+NAME_MAX_WORDS = 3
+NAME_MIN_MENTIONS = 3
+
+WORD_PATTERN = re.compile(r"[^\W\d_][\w'’-]*")
+
+
+def _key(kind: str, name: str) -> str:
+    return f"{kind}:{name.strip().lower()}"
+
+
+class EntityMentionIndex:
+    """
+    Maps character names (with aliases), places and recurring proper
+    names to the rows of the chunk list that mention them.
+
+    Rows are positions in the chunk list handed to LocalVectorIndex,
+    i.e. FAISS ids.
+    """
+
+    def __init__(self):
+        self.mentions: Dict[str, Dict[str, Set[int]]] = {}
+        self.aliases: Dict[str, Dict[str, str]] = {}   # story -> alias key -> canonical key
+
+    # --------------------------------------------------
+    # Lookup
+    # --------------------------------------------------
+    def rows_for(self, story_id: str, name: str, kind: str = "char") -> Optional[Set[int]]:
+        """
+        Rows mentioning an entity, or None if the entity is not indexed
+        (callers should then search without restriction).
+        """
+        story_mentions = self.mentions.get(story_id)
+        if not story_mentions or not name or not name.strip():
+            return None
+
+        story_aliases = self.aliases.get(story_id, {})
+        rows: Set[int] = set()
+        found = False
+
+        for part in name.split("/"):
+            key = _key(kind, part)
+            key = story_aliases.get(key, key)
+            if key not in story_mentions:
+                # Not in the alias file: the name as it occurs in the text
+                key = _key("name", part)
+            if key in story_mentions:
+                rows |= story_mentions[key]
+                found = True
+
+        return rows if found else None
+
+    def to_dict(self) -> Dict:
+        return {
+            "mentions": {
+                sid: {k: sorted(v) for k, v in m.items()}
+                for sid, m in self.mentions.items()
+            },
+            "aliases": self.aliases,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "EntityMentionIndex":
+        index = cls()
+        index.mentions = {
+            sid: {k: set(v) for k, v in m.items()}
+            for sid, m in data.get("mentions", {}).items()
+        }
+        index.aliases = data.get("aliases", {})
+        return index
+
+
+# --------------------------------------------------
+# Building
+# --------------------------------------------------
+def load_aliases(story_id: str, aliases_dir: str = ENTITY_ALIASES_DIR) -> Dict[str, Dict[str, List[str]]]:
+    path = os.path.join(aliases_dir, f"{story_id}.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _alias_table(aliases: Dict[str, Dict[str, List[str]]]) -> Tuple[Dict[str, str], Set[str]]:
+    """
+    Surface form (lowercased) -> canonical key for one story, plus the
+    ambiguous forms: those listed for more than one entity or under
+    "ambiguous". They are dropped, as they would restrict the search
+    to the wrong entity's chunks.
+    """
+    owners: Dict[str, Set[str]] = {}
+    for kind, section in (("char", "characters"), ("place", "places")):
+        for canonical, forms in aliases.get(section, {}).items():
+            for form in [canonical] + forms:
+                owners.setdefault(form.lower(), set()).add(_key(kind, canonical))
+
+    clashes = {form for form, keys in owners.items() if len(keys) > 1}
+    if clashes:
+        print(f"⚠️ Ignoring aliases listed for several entities: {sorted(clashes)}")
+    ambiguous = clashes | {form.lower() for form in aliases.get("ambiguous", [])}
+    table = {form: next(iter(keys)) for form, keys in owners.items() if form not in ambiguous}
+    return table, ambiguous
+
+
+def _compile_pattern(surface_forms: List[str]) -> Optional[re.Pattern]:
+    if not surface_forms:
+        return None
+    # Longest forms first so "Abbé Faria" wins over "Faria"
+    forms = sorted(set(surface_forms), key=len, reverse=True)
+    alternation = "|".join(re.escape(f) for f in forms)
+    return re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE)
+
+
+def _name_mentions(text: str) -> Dict[str, List[Tuple[int, int]]]:
+    """
+    Recurring proper names: runs of up to NAME_MAX_WORDS capitalized words
+    (single-space separated) whose lowercase forms are rare in the text.
+    Returns surface form (lowercased) -> (start, end) of each mention.
+    """
+    words = [(m.group(0), m.start(), m.end()) for m in WORD_PATTERN.finditer(text)]
+    counts = Counter(w for w, _, _ in words)
+
+    def is_name(word: str) -> bool:
+        return (
+            word[0].isupper() and not word.isupper()
+            and counts[word.lower()] * NAME_CASE_RATIO <= counts[word]
+        )
+
+    mentions: Dict[str, List[Tuple[int, int]]] = {}
+    run: List[Tuple[str, int, int]] = []
+    for word in words + [("", len(text), len(text))]:
+        if word[0] and is_name(word[0]) and (not run or text[run[-1][2]:word[1]] == " "):
+            run.append(word)
+            continue
+
+        for i in range(len(run)):
+            for j in range(i + 1, min(i + NAME_MAX_WORDS, len(run)) + 1):
+                form = " ".join(w for w, _, _ in run[i:j]).lower()
+                mentions.setdefault(form, []).append((run[i][1], run[j - 1][2]))
+        run = [word] if word[0] and is_name(word[0]) else []
+
+    return {form: spans for form, spans in mentions.items() if len(spans) >= NAME_MIN_MENTIONS}
+
+
+def build_entity_index(
+    novels: Dict[str, str],
+    chunks: List[Dict],
+    aliases_dir: str = ENTITY_ALIASES_DIR,
+) -> EntityMentionIndex:
+    """
+    One regex pass per novel for the alias file's entities and one word
+    pass for proper names; each match is assigned to every chunk whose
+    [start_char, end_char) span contains it.
+    """
+    index = EntityMentionIndex()
+
+    rows_by_story: Dict[str, List[int]] = {}
+    for row, chunk in enumerate(chunks):
+        rows_by_story.setdefault(chunk["story_id"], []).append(row)
+
+    for story_id, full_text in novels.items():
+        rows = rows_by_story.get(story_id)
+        if not rows:
+            continue
+
+        rows.sort(key=lambda r: chunks[r]["start_char"])
+        starts = [chunks[r]["start_char"] for r in rows]
+        story_mentions: Dict[str, Set[int]] = {}
+
+        def add(key: str, start: int, end: int) -> None:
+            # Overlapping chunks: walk back from the last chunk starting before the match
+            pos = bisect_right(starts, start) - 1
+            while pos >= 0 and chunks[rows[pos]]["end_char"] >= end:
+                story_mentions.setdefault(key, set()).add(rows[pos])
+                pos -= 1
+
+        table, ambiguous = _alias_table(load_aliases(story_id, aliases_dir))
+        pattern = _compile_pattern(list(table))
+        if pattern is not None:
+            for match in pattern.finditer(full_text):
+                add(table[match.group(0).lower()], match.start(), match.end())
+
+        for form, spans in _name_mentions(full_text).items():
+            if form in ambiguous:
+                continue
+            for start, end in spans:
+                add(_key("name", form), start, end)
+
+        index.mentions[story_id] = story_mentions
+        index.aliases[story_id] = {
+            _key(k.split(":", 1)[0], alias): k
+            for alias, k in table.items()
+        }
+
+    return index
+
+
+if __name__ == "__main__":
+    from ingestion.data_ingestion import load_novels
+    from indexing.chunking import chunk_all_novels
+
+    novels = load_novels("data/novels")
+    chunks = chunk_all_novels(novels)
+    entity_index = build_entity_index(novels, chunks)
+
+    for story_id, mentions in entity_index.mentions.items():
+        print(f"\n{story_id}: {len(mentions)} entities")
+        top = sorted(mentions.items(), key=lambda kv: len(kv[1]), reverse=True)[:10]
+        for key, rows in top:
+            print(f"  {key}: {len(rows)} chunks")
+
+    faria = entity_index.rows_for("the_count_of_monte_cristo", "Faria")
+    print(f"\nFaria mentioned in {len(faria or [])} chunks")
@@ -0,0 +1,189 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+
+class HierarchicalIndex:
+    """
+    Two-level, coarse-to-fine retrieval over a LocalVectorIndex.
+
+    Level 1: one embedding per (story, chapter) – the renormalized mean of
+             its chunk vectors – picks the top few chapters for a query.
+    Level 2: chunk-level scoring only inside those chapters.
+
+    Exposes the same query() / get_vectors() interface as LocalVectorIndex,
+    so retrieve_evidence can use either.
+    """
+
+    def __init__(self, base, top_chapters: int = 4):
+        self.base = base
+        self.top_chapters = top_chapters
+        self.entity_index = base.entity_index
+        self.restricted = 0     # entity restriction applied inside the chapters
+        self.unrestricted = 0   # entity rows missed the chapters: searched them all
+        self._lock = threading.Lock()   # counters are shared by retrieval workers
+
+        groups: Dict[Tuple[str, int], List[int]] = {}
+        for row in range(len(base.chunks)):
+            chunk = base.chunks[row]
+            groups.setdefault((chunk["story_id"], chunk["chapter"]), []).append(row)
+
+        self.chapter_keys: List[Tuple[str, int]] = list(groups)
+        self.chapter_rows: List[np.ndarray] = [
+            np.asarray(groups[key], dtype="int64") for key in self.chapter_keys
+        ]
+
+        centroids = np.vstack([
+            base.index.reconstruct_batch(rows).mean(axis=0)
+            for rows in self.chapter_rows
+        ]).astype("float32")
+        faiss.normalize_L2(centroids)
+
+        self.chapter_index = faiss.IndexFlatIP(centroids.shape[1])
+        self.chapter_index.add(centroids)
+
+        story_chapters: Dict[str, List[int]] = {}
+        for cid, (story_id, _) in enumerate(self.chapter_keys):
+            story_chapters.setdefault(story_id, []).append(cid)
+        self.story_chapters = {
+            sid: np.asarray(c, dtype="int64") for sid, c in story_chapters.items()
+        }
+
+        print(f"✅ Hierarchical index: {len(self.chapter_keys)} chapters over {len(base.chunks)} chunks")
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def summary(self) -> str:
+        total = self.restricted + self.unrestricted
+        return (
+            f"Hierarchical index: entity restriction kept in {self.restricted}/{total} queries, "
+            f"dropped in {self.unrestricted} (no mention in the chosen chapters)"
+            if total else "Hierarchical index: no entity-restricted queries"
+        )
+
+    @property
+    def model(self):
+        return self.base.model
+
+    def encode_query(self, query_text: str) -> np.ndarray:
+        return self.base.encode_query(query_text)
+
+    # --------------------------------------------------
+    # Level 1
+    # --------------------------------------------------
+    def select_chapters(self, query_vec: np.ndarray, story_id: Optional[str]) -> List[int]:
+        if story_id is None:
+            k = min(self.top_chapters, self.chapter_index.ntotal)
+            _, ids = self.chapter_index.search(query_vec, k)
+        else:
+            chapters = self.story_chapters.get(story_id)
+            if chapters is None:
+                return []
+            k = min(self.top_chapters, len(chapters))
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(chapters))
+            _, ids = self.chapter_index.search(query_vec, k, params=params)
+
+        return [int(i) for i in ids[0] if i >= 0]
+
+    # --------------------------------------------------
+    # Level 2
+    # --------------------------------------------------
+    def query(
+        self,
+        query_text: str,
+        story_id: str,
+        top_k: int = 50,
+        return_scores: bool = True,
+        entity: Optional[str] = None,
+        candidate_ids: Optional[Iterable[int]] = None,
+    ) -> List[Dict]:
+        query_vec = self.encode_query(query_text)
+
+        chapters = self.select_chapters(query_vec, story_id)
+        if not chapters:
+            return []
+        rows = np.concatenate([self.chapter_rows[c] for c in chapters])
+
+        # Keep the entity restriction when it leaves anything to search;
+        # otherwise search the chapters unrestricted and count the fallback
+        if candidate_ids is not None:
+            restrict = np.fromiter(candidate_ids, dtype="int64")
+        else:
+            restrict = self.base.candidate_rows(story_id, entity) if entity else None
+        if restrict is not None:
+            narrowed = np.intersect1d(rows, restrict)
+            if len(narrowed):
+                rows = narrowed
+                self._count("restricted")
+            else:
+                self._count("unrestricted")
+
+        # Score only the selected chunks: work grows with the chapters, not the corpus
+        vectors = self.base.index.reconstruct_batch(rows)
+        scores = vectors @ query_vec[0]
+
+        k = min(top_k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for i in top:
+            chunk = dict(self.base.chunks[int(rows[i])])
+            if return_scores:
+                chunk["score"] = float(scores[i])
+            results.append(chunk)
+
+        return results
+
+    def get_vectors(self, chunk_ids: List[str]) -> np.ndarray:
+        return self.base.get_vectors(chunk_ids)
+
+
+if __name__ == "__main__":
+    # Benchmark: hierarchical vs flat on train.csv claims (recall@k + latency)
+    import time
+
+    from indexing.local_vector_index import build_local_index
+    from ingestion.data_ingestion import read_claims
+
+    TOP_K = 24
+
+    flat = build_local_index("data/novels")
+    hier = HierarchicalIndex(flat)
+
+    rows = list(read_claims("data/train.csv"))
+
+    recalls, flat_ms, hier_ms, searched = [], [], [], []
+
+    for row in rows:
+        claim = row.backstory
+        story_id = row.story_id
+        query_vec = flat.encode_query(claim)
+
+        t0 = time.perf_counter()
+        f_hits = flat.search_vector(query_vec, flat.candidate_rows(story_id), TOP_K)
+        flat_ms.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        chapters = hier.select_chapters(query_vec, story_id)
+        h_rows = np.concatenate([hier.chapter_rows[c] for c in chapters])
+        h_vecs = flat.index.reconstruct_batch(h_rows)
+        h_scores = h_vecs @ query_vec[0]
+        k = min(TOP_K, len(h_rows))
+        h_top = h_rows[np.argpartition(-h_scores, k - 1)[:k]]
+        hier_ms.append((time.perf_counter() - t0) * 1000)
+
+        f_ids = {h["chunk_id"] for h in f_hits}
+        h_ids = {flat.chunks[int(r)]["chunk_id"] for r in h_top}
+        recalls.append(len(f_ids & h_ids) / max(len(f_ids), 1))
+        searched.append(len(h_rows) / len(flat.story_rows[story_id]))
+
+    print(f"\nQueries: {len(rows)}  top_k={TOP_K}  top_chapters={hier.top_chapters}")
+    print(f"Recall@{TOP_K} vs flat : {np.mean(recalls):.3f}")
+    print(f"Chunks scored (share): {np.mean(searched):.3f}")
+    print(f"Flat latency   (ms)  : {np.mean(flat_ms):.3f}")
+    print(f"Hierarchical   (ms)  : {np.mean(hier_ms):.3f}")
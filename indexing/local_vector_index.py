@@ -1,8 +1,25 @@
-from typing import List, Dict
+import json
+import os
+import shutil
+from typing import List, Dict, Iterable, Optional
 import faiss
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
+from execution.resources import ResourcePlan
+from indexing.artifact import (
+    CHUNKS_DIR,
+    ENTITIES_FILE,
+    INDEX_FILE,
+    check_compatible,
+    hash_novels,
+    is_artifact,
+    read_manifest,
+    write_manifest,
+)
+from indexing.chunk_store import ChunkStore
+from indexing.chunking import CHUNK_SIZE_CHARS, OVERLAP_CHARS
+
 
 class LocalVectorIndex:
     """
@@ -10,12 +27,26 @@ class LocalVectorIndex:
     Uses cosine similarity via normalized inner product.
     """
 
-    def __init__(self, embedding_model: str = "BAAI/bge-base-en-v1.5"):
-        self.model = SentenceTransformer(embedding_model)
+    def __init__(
+        self,
+        embedding_model: str = "BAAI/bge-base-en-v1.5",
+        load_model: bool = True,
+        plan: Optional[ResourcePlan] = None,
+    ):
+        self.embedding_model = embedding_model
+        # Batch sizes for this process (execution/resources.py); callers
+        # pass the plan they configured
+        self.plan = plan or ResourcePlan()
+        # Search-only processes (e.g. index shard workers) receive encoded
+        # queries and can skip loading the embedding model
+        self.model = SentenceTransformer(embedding_model) if load_model else None
 
         self.index = None                 # FAISS index
         self.chunks: List[Dict] = []      # chunk metadata
         self.story_ids: List[str] = []    # parallel list for filtering
+        self.story_rows: Dict[str, np.ndarray] = {}   # story_id -> FAISS ids
+        self.row_of: Dict[str, int] = {}              # chunk_id -> FAISS id
+        self.entity_index = None          # optional EntityMentionIndex
 
 
     # --------------------------------------------------
@@ -34,6 +65,7 @@ class LocalVectorIndex:
             texts,
             convert_to_numpy=True,
             normalize_embeddings=True,
+            batch_size=self.plan.encode_batch_size,
             show_progress_bar=True,
         ).astype("float32")
 
@@ -45,9 +77,145 @@ class LocalVectorIndex:
 
         self.chunks = chunks
         self.story_ids = [chunk["story_id"] for chunk in chunks]
+        self._build_row_maps([chunk["chunk_id"] for chunk in chunks])
 
         print(f"✅ Indexed {len(chunks)} chunks (dim={dim})")
 
+    def _build_row_maps(self, chunk_ids: List[str]) -> None:
+        rows: Dict[str, List[int]] = {}
+        for i, sid in enumerate(self.story_ids):
+            rows.setdefault(sid, []).append(i)
+        self.story_rows = {
+            sid: np.asarray(r, dtype="int64") for sid, r in rows.items()
+        }
+        self.row_of = {cid: i for i, cid in enumerate(chunk_ids)}
+
+    def get_vectors(self, chunk_ids: List[str]) -> np.ndarray:
+        """
+        Stored (normalized) embeddings for the given chunks, one row each.
+        """
+        rows = np.asarray([self.row_of[cid] for cid in chunk_ids], dtype="int64")
+        return self.index.reconstruct_batch(rows)
+
+    # --------------------------------------------------
+    # Persistence (versioned artifact)
+    # --------------------------------------------------
+    def save(
+        self,
+        artifact_dir: str,
+        novels: Optional[Dict[str, str]] = None,
+        chunk_size: int = CHUNK_SIZE_CHARS,
+        overlap: int = OVERLAP_CHARS,
+    ) -> None:
+        """
+        Writes a versioned artifact directory: FAISS index, columnar chunk
+        metadata, entity index and a manifest (model id, chunk parameters,
+        novel content hashes). Written to a temp dir and renamed into place.
+        """
+        if self.index is None:
+            raise RuntimeError("Index not built. Call index_chunks() first.")
+
+        tmp_dir = f"{artifact_dir.rstrip(os.sep)}.tmp-{os.getpid()}"
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+
+        faiss.write_index(self.index, os.path.join(tmp_dir, INDEX_FILE))
+        ChunkStore.write(list(self.chunks), os.path.join(tmp_dir, CHUNKS_DIR))
+
+        if self.entity_index is not None:
+            with open(os.path.join(tmp_dir, ENTITIES_FILE), "w", encoding="utf-8") as f:
+                json.dump(self.entity_index.to_dict(), f)
+
+        write_manifest(tmp_dir, {
+            "embedding_model": self.embedding_model,
+            "dim": self.index.d,
+            "num_chunks": self.index.ntotal,
+            "chunk_size": chunk_size,
+            "overlap": overlap,
+            "novels": hash_novels(novels) if novels is not None else {},
+        })
+
+        if os.path.exists(artifact_dir):
+            shutil.rmtree(artifact_dir)
+        os.replace(tmp_dir, artifact_dir)
+
+        print(f"💾 Saved index artifact to {artifact_dir}")
+
+    @classmethod
+    def load(
+        cls,
+        artifact_dir: str,
+        embedding_model: Optional[str] = None,
+        mmap: bool = True,
+        novels: Optional[Dict[str, str]] = None,
+        load_model: bool = True,
+        plan: Optional[ResourcePlan] = None,
+    ) -> "LocalVectorIndex":
+        """
+        Maps a prebuilt artifact instead of re-indexing.
+
+        The FAISS index and chunk columns are memory-mapped read-only, so
+        startup costs little more than mapping the files and processes on
+        one host share the pages. Raises IncompatibleArtifactError if the
+        artifact does not match the expected model, chunking or novels
+        (pass `novels` to catch a stale artifact here, not at query time).
+        """
+        from indexing.entity_index import EntityMentionIndex
+
+        manifest = read_manifest(artifact_dir)
+        check_compatible(
+            manifest,
+            embedding_model=embedding_model,
+            chunk_size=CHUNK_SIZE_CHARS,
+            overlap=OVERLAP_CHARS,
+            novels=novels,
+        )
+
+        obj = cls(manifest["embedding_model"], load_model=load_model, plan=plan)
+
+        # IO_FLAG_MMAP alone still copies a flat index's codes into process
+        # memory; MMAP_IFC maps them from the file (faiss-cpu pinned in requirements.txt)
+        io_flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY if mmap else 0
+        obj.index = faiss.read_index(os.path.join(artifact_dir, INDEX_FILE), io_flags)
+
+        store = ChunkStore.open(os.path.join(artifact_dir, CHUNKS_DIR), mmap=mmap)
+        obj.chunks = store
+        obj.story_ids = store.column("story_id")
+        obj._build_row_maps(store.column("chunk_id"))
+
+        entities_path = os.path.join(artifact_dir, ENTITIES_FILE)
+        if os.path.exists(entities_path):
+            with open(entities_path, "r", encoding="utf-8") as f:
+                obj.entity_index = EntityMentionIndex.from_dict(json.load(f))
+
+        print(f"✅ Loaded {len(store)} chunks from {artifact_dir}")
+        return obj
+
+    # --------------------------------------------------
+    # Candidate restriction
+    # --------------------------------------------------
+    def candidate_rows(
+        self,
+        story_id: Optional[str],
+        entity: Optional[str] = None,
+    ) -> Optional[np.ndarray]:
+        """
+        FAISS ids a query may touch, or None for the whole corpus.
+        Restricts to the story, then to chunks mentioning `entity`
+        when the entity index knows it.
+        """
+        rows = None
+        if story_id is not None:
+            rows = self.story_rows.get(story_id, np.empty(0, dtype="int64"))
+
+        if entity and self.entity_index is not None and story_id is not None:
+            mentioned = self.entity_index.rows_for(story_id, entity)
+            if mentioned:
+                rows = np.fromiter(sorted(mentioned), dtype="int64")
+
+        return rows
+
     # --------------------------------------------------
     # Querying (Layer 3 primitive)
     # --------------------------------------------------
@@ -57,31 +225,63 @@ class LocalVectorIndex:
         story_id: str,
         top_k: int = 50,
         return_scores: bool = True,
+        entity: Optional[str] = None,
+        candidate_ids: Optional[Iterable[int]] = None,
     ) -> List[Dict]:
         """
         Retrieve candidate chunks for a query.
         This function OVER-FETCHES and DOES NOT truncate to top_k.
         Layer 4 decides how many to keep.
+
+        Search is restricted with a FAISS IDSelector to the story's chunks,
+        narrowed to chunks mentioning `entity` when it is indexed, or to
+        explicit `candidate_ids`.
         """
         if self.index is None:
             raise RuntimeError("Index not built. Call index_chunks() first.")
 
-        query_vec = self.model.encode(
+        query_vec = self.encode_query(query_text)
+
+        if candidate_ids is not None:
+            rows = np.fromiter(candidate_ids, dtype="int64")
+        else:
+            rows = self.candidate_rows(story_id, entity)
+
+        return self.search_vector(query_vec, rows, top_k, return_scores)
+
+    def encode_query(self, query_text: str) -> np.ndarray:
+        return self.model.encode(
             [query_text],
             convert_to_numpy=True,
             normalize_embeddings=True,
         ).astype("float32")
 
-        search_k = min(top_k, len(self.chunks))
-        scores, indices = self.index.search(query_vec, search_k)
+    def search_vector(
+        self,
+        query_vec: np.ndarray,
+        rows: Optional[np.ndarray],
+        top_k: int = 50,
+        return_scores: bool = True,
+    ) -> List[Dict]:
+        """
+        Search an encoded query over `rows` (FAISS ids), or the whole
+        corpus when rows is None.
+        """
+        if rows is None:
+            search_k = min(top_k, len(self.chunks))
+            scores, indices = self.index.search(query_vec, search_k)
+        else:
+            search_k = min(top_k, len(rows))
+            if search_k == 0:
+                return []
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(rows))
+            scores, indices = self.index.search(query_vec, search_k, params=params)
 
         results = []
         seen = set()
 
         for score, idx in zip(scores[0], indices[0]):
-            if idx in seen:
-                continue
-            if self.story_ids[idx] != story_id:
+            if idx < 0 or idx in seen:
                 continue
 
             seen.add(idx)
@@ -96,20 +296,47 @@ class LocalVectorIndex:
         return results
 
 
-if __name__ == "__main__":
+def build_local_index(
+    novels_dir: str = "data/novels",
+    index_dir: Optional[str] = None,
+    plan: Optional[ResourcePlan] = None,
+) -> LocalVectorIndex:
+    """
+    Load, chunk and index all novels, with the entity mention index attached.
+
+    With `index_dir`, a prebuilt artifact (see `python -m indexing build`)
+    is memory-mapped instead of re-indexing; if none exists yet, the
+    freshly built index is saved there. An artifact built from other
+    novel contents raises IncompatibleArtifactError.
+    """
     from ingestion.data_ingestion import load_novels
+
+    novels = load_novels(novels_dir)
+    if is_artifact(index_dir):
+        return LocalVectorIndex.load(index_dir, novels=novels, plan=plan)
+
     from indexing.chunking import chunk_all_novels
+    from indexing.entity_index import build_entity_index
 
-    novels = load_novels("data/novels")
     chunks = chunk_all_novels(novels)
 
-    index = LocalVectorIndex()
+    index = LocalVectorIndex(plan=plan)
     index.index_chunks(chunks)
+    index.entity_index = build_entity_index(novels, chunks)
+
+    if index_dir:
+        index.save(index_dir, novels=novels)
+
+    return index
+
+
+if __name__ == "__main__":
+    index = build_local_index("data/novels")
 
     query = "Thalcave's people faded as colonists advanced; his father was the last of the tribal guides and knew the pampas geography and animal ways."
     story_id = "in_search_of_the_castaways"
 
-    results = index.query(query, story_id, top_k=50)
+    results = index.query(query, story_id, top_k=50, entity="Thalcave")
 
     print("\nQuery results:")
     for r in results[:5]:
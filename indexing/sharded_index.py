@@ -0,0 +1,395 @@
+import heapq
+import multiprocessing
+import os
+import secrets
+import threading
+from multiprocessing.connection import Client, Listener
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from indexing.artifact import IncompatibleArtifactError
+
+
+# Shared secret for the shard RPC. multiprocessing.connection unpickles
+# every request, so there is no default: anyone holding the key can run
+# code on the shard host.
+AUTHKEY_ENV = "INDEX_SHARD_AUTHKEY"
+
+Address = Tuple[str, int]
+
+
+def parse_address(spec: str) -> Address:
+    """
+    "host:port" -> (host, port)
+    """
+    host, _, port = spec.strip().rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid shard address {spec!r}, expected host:port")
+    return host, int(port)
+
+
+def shard_authkey(authkey: Optional[bytes] = None) -> bytes:
+    """
+    `authkey`, else the secret from INDEX_SHARD_AUTHKEY; raises if neither is set.
+    """
+    if authkey:
+        return authkey
+    secret = os.environ.get(AUTHKEY_ENV, "")
+    if not secret:
+        raise ValueError(
+            f"Index shard RPC needs a shared secret: set {AUTHKEY_ENV} to the same value on every host"
+        )
+    return secret.encode("utf-8")
+
+
+def story_of(chunk_id: str) -> str:
+    # chunk ids are "<story_id>_<chunk index>"
+    return chunk_id.rsplit("_", 1)[0]
+
+
+# --------------------------------------------------
+# Shard worker
+# --------------------------------------------------
+class ShardServer:
+    """
+    Serves searches over one index shard: an artifact holding a subset of
+    the stories (see `python -m indexing build --shard i/N`).
+
+    Queries arrive already encoded, so the worker never loads the
+    embedding model – only the memory-mapped vectors and chunk text.
+    """
+
+    def __init__(self, artifact_dir: str):
+        from indexing.local_vector_index import LocalVectorIndex
+
+        self.artifact_dir = artifact_dir
+        self.index = LocalVectorIndex.load(artifact_dir, load_model=False)
+
+    def info(self) -> Dict:
+        return {
+            "embedding_model": self.index.embedding_model,
+            "dim": self.index.index.d,
+            "num_chunks": len(self.index.chunks),
+            "stories": sorted(self.index.story_rows),
+        }
+
+    def search(
+        self,
+        query_vec: np.ndarray,
+        story_id: Optional[str],
+        entity: Optional[str],
+        top_k: int,
+        rows: Optional[List[int]] = None,
+    ) -> List[Dict]:
+        """
+        `rows` (shard-local FAISS ids) replace the story / entity restriction.
+        """
+        if rows is None:
+            rows = self.index.candidate_rows(story_id, entity)
+        else:
+            rows = np.asarray(rows, dtype="int64")
+        return self.index.search_vector(query_vec, rows, top_k)
+
+    def handle(self, request: Tuple):
+        op, *payload = request
+        if op == "search":
+            return self.search(*payload)
+        if op == "vectors":
+            return self.index.get_vectors(*payload)
+        if op == "info":
+            return self.info()
+        raise ValueError(f"Unknown shard request {op!r}")
+
+    def _serve_connection(self, conn) -> None:
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(("ok", self.handle(request)))
+                except Exception as e:
+                    conn.send(("error", f"{type(e).__name__}: {e}"))
+
+    def serve(self, address: Address, authkey: bytes, ready=None) -> None:
+        """
+        Accepts front-end connections forever, one thread per connection.
+        `ready` (a Pipe end) receives the bound address, useful with port 0.
+        """
+        with Listener(address, authkey=authkey) as listener:
+            print(f"✅ Shard {self.artifact_dir} serving {len(self.index.story_rows)} stories on "
+                  f"{listener.address[0]}:{listener.address[1]}")
+            if ready is not None:
+                ready.send(listener.address)
+                ready.close()
+
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:   # failed handshake, e.g. wrong authkey
+                    print(f"⚠️ Rejected shard connection: {e}")
+                    continue
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+
+def serve_shard(
+    artifact_dir: str,
+    address: Address,
+    authkey: Optional[bytes] = None,
+    ready=None,
+    cores: Optional[int] = None,
+) -> None:
+    from execution import resources
+
+    # Checked before loading anything: never listen without a secret
+    authkey = shard_authkey(authkey)
+    resources.configure("serve", cores)
+    ShardServer(artifact_dir).serve(address, authkey, ready)
+
+
+def start_local_shards(
+    artifact_dirs: List[str],
+    host: str = "127.0.0.1",
+    authkey: Optional[bytes] = None,
+) -> Tuple[List[multiprocessing.Process], List[Address], bytes]:
+    """
+    Starts one worker process per shard artifact on this machine and
+    returns (processes, addresses, authkey) once all of them are
+    listening. Without an `authkey` (or INDEX_SHARD_AUTHKEY) a random
+    one is generated for these workers.
+    """
+    from execution.resources import available_cores
+
+    ctx = multiprocessing.get_context("spawn")
+    procs, pipes = [], []
+    # Co-located shards split this machine's cores between them
+    cores = max(1, available_cores() // len(artifact_dirs))
+    authkey = authkey or os.environ.get(AUTHKEY_ENV, "").encode("utf-8") or secrets.token_bytes(32)
+
+    for artifact_dir in artifact_dirs:
+        parent_end, child_end = ctx.Pipe(duplex=False)
+        proc = ctx.Process(
+            target=serve_shard,
+            args=(artifact_dir, (host, 0), authkey, child_end, cores),
+            daemon=True,
+        )
+        proc.start()
+        child_end.close()
+        procs.append(proc)
+        pipes.append(parent_end)
+
+    addresses = []
+    for artifact_dir, pipe in zip(artifact_dirs, pipes):
+        try:
+            addresses.append(tuple(pipe.recv()))
+        except EOFError:
+            raise RuntimeError(f"Shard worker for {artifact_dir} exited during startup") from None
+
+    return procs, addresses, authkey
+
+
+# --------------------------------------------------
+# Front end (scatter-gather)
+# --------------------------------------------------
+class ShardedVectorIndex:
+    """
+    Front end over several index shard workers, each owning a subset of
+    the stories, locally or on other hosts.
+
+    Encodes the query once, sends it to the shard owning the story (or to
+    every shard for the cross-story fallback) and merges the per-shard
+    top-k lists. Exposes the query() / get_vectors() interface of
+    LocalVectorIndex, so retrieve_evidence works unchanged.
+    """
+
+    def __init__(self, addresses: Iterable, authkey: Optional[bytes] = None):
+        self.addresses: List[Address] = [
+            parse_address(a) if isinstance(a, str) else tuple(a) for a in addresses
+        ]
+        if not self.addresses:
+            raise ValueError("ShardedVectorIndex needs at least one shard address")
+        self.authkey = shard_authkey(authkey)
+        self._local = threading.local()   # connections are per thread
+
+        infos = self._scatter({i: ("info",) for i in range(len(self.addresses))})
+
+        models = {info["embedding_model"] for info in infos.values()}
+        if len(models) != 1:
+            raise IncompatibleArtifactError(f"Shards use different embedding models: {sorted(models)}")
+        self.embedding_model = models.pop()
+
+        self.shard_of_story: Dict[str, int] = {}
+        for shard, info in sorted(infos.items()):
+            for story_id in info["stories"]:
+                if story_id in self.shard_of_story:
+                    raise ValueError(
+                        f"Story {story_id!r} is served by shards "
+                        f"{self.shard_of_story[story_id]} and {shard}"
+                    )
+                self.shard_of_story[story_id] = shard
+
+        self.num_chunks = sum(info["num_chunks"] for info in infos.values())
+        # Global FAISS ids: shards' rows concatenated in address order
+        self.offsets = np.cumsum([0] + [infos[i]["num_chunks"] for i in range(len(self.addresses))])
+        self.entity_index = None   # entity restriction is applied inside the shards
+        self.model = SentenceTransformer(self.embedding_model)
+
+        print(f"✅ Connected to {len(self.addresses)} index shards "
+              f"({len(self.shard_of_story)} stories, {self.num_chunks} chunks)")
+
+    # --------------------------------------------------
+    # RPC
+    # --------------------------------------------------
+    def _conn(self, shard: int):
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        if shard not in conns:
+            conns[shard] = Client(self.addresses[shard], authkey=self.authkey)
+        return conns[shard]
+
+    def _scatter(self, requests: Dict[int, Tuple]) -> Dict:
+        """
+        Sends every request before waiting on any reply, so the shards
+        work in parallel. Every reply is read before an error is raised,
+        so no stale answer is left queued for the thread's next call.
+        """
+        shard = None
+        replies = {}
+        try:
+            for shard, request in requests.items():
+                self._conn(shard).send(request)
+            for shard in requests:
+                replies[shard] = self._conn(shard).recv()
+        except (EOFError, OSError) as e:
+            # Replies still in flight on the other connections cannot be
+            # matched to a call any more: drop them all
+            self._drop(requests)
+            host, port = self.addresses[shard]
+            raise ConnectionError(f"Index shard {host}:{port} is unavailable") from e
+
+        failed = {shard: value for shard, (status, value) in replies.items() if status != "ok"}
+        if failed:
+            shard, value = min(failed.items())
+            raise RuntimeError(f"Index shard {shard} failed: {value}")
+        return {shard: value for shard, (_, value) in replies.items()}
+
+    def _drop(self, shards: Iterable[int]) -> None:
+        conns = getattr(self._local, "conns", {})
+        for shard in shards:
+            conn = conns.pop(shard, None)
+            if conn is not None:
+                conn.close()
+
+    def close(self) -> None:
+        self._drop(list(getattr(self._local, "conns", {})))
+
+    # --------------------------------------------------
+    # LocalVectorIndex interface
+    # --------------------------------------------------
+    def encode_query(self, query_text: str) -> np.ndarray:
+        return self.model.encode(
+            [query_text],
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        ).astype("float32")
+
+    def query(
+        self,
+        query_text: str,
+        story_id: str,
+        top_k: int = 50,
+        return_scores: bool = True,
+        entity: Optional[str] = None,
+        candidate_ids: Optional[Iterable[int]] = None,
+    ) -> List[Dict]:
+        """
+        Same contract as LocalVectorIndex.query; story_id=None searches
+        every shard. `candidate_ids` are global ids (see self.offsets):
+        each is sent, as a shard-local id, to the shard that owns it.
+        """
+        query_vec = self.encode_query(query_text)
+
+        if candidate_ids is not None:
+            ids = np.fromiter(candidate_ids, dtype="int64")
+            if len(ids) and (ids.min() < 0 or ids.max() >= self.num_chunks):
+                raise ValueError(f"candidate_ids must lie in [0, {self.num_chunks})")
+            owner = np.searchsorted(self.offsets, ids, side="right") - 1
+            requests = {
+                int(shard): ("search", query_vec, story_id, entity, top_k,
+                             (ids[owner == shard] - self.offsets[shard]).tolist())
+                for shard in np.unique(owner)
+            }
+        elif story_id is None:
+            requests = {
+                shard: ("search", query_vec, story_id, entity, top_k)
+                for shard in range(len(self.addresses))
+            }
+        elif story_id in self.shard_of_story:
+            shard = self.shard_of_story[story_id]
+            requests = {shard: ("search", query_vec, story_id, entity, top_k)}
+        else:
+            return []
+
+        replies = self._scatter(requests)
+
+        # Each shard returns its own top_k; merge the sorted lists
+        hits = heapq.nlargest(
+            top_k,
+            (hit for shard_hits in replies.values() for hit in shard_hits),
+            key=lambda hit: hit["score"],
+        )
+
+        if not return_scores:
+            for hit in hits:
+                hit.pop("score", None)
+        return hits
+
+    def get_vectors(self, chunk_ids: List[str]) -> np.ndarray:
+        """
+        Stored embeddings, fetched from the shards owning the chunks' stories.
+        """
+        by_shard: Dict[int, List[int]] = {}
+        for pos, cid in enumerate(chunk_ids):
+            by_shard.setdefault(self.shard_of_story[story_of(cid)], []).append(pos)
+
+        replies = self._scatter({
+            shard: ("vectors", [chunk_ids[p] for p in positions])
+            for shard, positions in by_shard.items()
+        })
+
+        vectors = None
+        for shard, positions in by_shard.items():
+            block = replies[shard]
+            if vectors is None:
+                vectors = np.empty((len(chunk_ids), block.shape[1]), dtype="float32")
+            vectors[positions] = block
+
+        return vectors if vectors is not None else np.empty((0, 0), dtype="float32")
+
+
+if __name__ == "__main__":
+    # Demo: start local shard workers on prebuilt shard artifacts, e.g.
+    #   python -m indexing build --out artifacts/shard0 --shard 0/2
+    #   python -m indexing build --out artifacts/shard1 --shard 1/2
+    #   python -m indexing.sharded_index artifacts/shard0 artifacts/shard1
+    import sys
+    import time
+
+    procs, addresses, authkey = start_local_shards(sys.argv[1:])
+    index = ShardedVectorIndex(addresses, authkey)
+
+    query = "Thalcave's people faded as colonists advanced; his father was the last of the tribal guides and knew the pampas geography and animal ways."
+
+    for story_id in ("in_search_of_the_castaways", None):
+        t0 = time.perf_counter()
+        results = index.query(query, story_id, top_k=5, entity="Thalcave")
+        print(f"\nstory_id={story_id}: {(time.perf_counter() - t0) * 1000:.1f} ms")
+        for r in results:
+            print(" ", r["chunk_id"], "| score:", round(r["score"], 3))
+
+    for proc in procs:
+        proc.terminate()
@@ -1,8 +1,15 @@
 import os
 import csv
-from typing import Dict, List
+import json
+import queue
+import threading
+from typing import Dict, Iterator, List, Optional, TextIO, Union
 from ingestion.text_cleaning import strip_gutenberg_text
 
+
+def normalize_story_id(s: str) -> str:
+    return s.strip().lower().replace(" ", "_")
+
 # Load full novels
 def load_novels(novels_dir: str) -> Dict[str, str]:
     """
@@ -19,7 +26,7 @@ def load_novels(novels_dir: str) -> Dict[str, str]:
         if not filename.endswith(".txt"):
             continue
 
-        story_id = filename.replace(".txt", "").strip().lower().replace(" ", "_")
+        story_id = normalize_story_id(filename.replace(".txt", ""))
 
         file_path = os.path.join(novels_dir, filename)
         with open(file_path, "r", encoding="utf-8") as f:
@@ -39,6 +46,243 @@ def load_novels(novels_dir: str) -> Dict[str, str]:
     return novels
 
 
+# --------------------------------------------------
+# Claim records
+# --------------------------------------------------
+# Accepted source column names for each record field, in priority order
+FIELD_ALIASES = {
+    "id": ("id",),
+    "story_id": ("story_id", "book_name", "book", "novel_id", "story"),
+    "char": ("char", "character"),
+    "caption": ("caption",),
+    "backstory": ("backstory", "claim"),
+    "label": ("label",),
+}
+
+VALID_LABELS = {"consistent", "contradict"}
+
+
+class ClaimRecord:
+    """
+    One claim row. Compact (__slots__) so streams of millions of rows
+    do not pay for a dict or pandas Series per row.
+    """
+
+    __slots__ = ("row_index", "id", "story_id", "char", "caption", "backstory", "label")
+
+    def __init__(
+        self,
+        row_index: int,
+        id: str,
+        story_id: str,
+        backstory: str,
+        char: str = "",
+        caption: str = "",
+        label: Optional[str] = None,
+    ):
+        self.row_index = row_index
+        self.id = id
+        self.story_id = story_id
+        self.char = char
+        self.caption = caption
+        self.backstory = backstory
+        self.label = label
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"ClaimRecord(id={self.id!r}, story_id={self.story_id!r}, char={self.char!r})"
+
+
+class ClaimReader:
+    """
+    Streams ClaimRecords from a CSV or JSONL file (or an open text stream,
+    read as JSONL), in constant memory.
+
+    Columns are resolved and validated when the reader is created; story
+    ids are normalized once here. Iteration is fed by a background thread
+    through a bounded read-ahead buffer.
+    """
+
+    def __init__(
+        self,
+        source: Union[str, TextIO],
+        require_label: bool = False,
+        required: tuple = ("backstory",),
+        fmt: Optional[str] = None,
+        buffer_size: int = 256,
+    ):
+        self.source_name = source if isinstance(source, str) else getattr(source, "name", "<stream>")
+        self.require_label = require_label
+        self.buffer_size = buffer_size
+
+        if isinstance(source, str):
+            self.fmt = fmt or ("jsonl" if source.endswith((".jsonl", ".json")) else "csv")
+            self._file = open(source, "r", encoding="utf-8", newline="")
+            self._owns_file = True
+        else:
+            self.fmt = fmt or "jsonl"
+            self._file = source
+            self._owns_file = False
+
+        if self.fmt == "csv":
+            self._csv = csv.DictReader(self._file)
+            fieldnames = self._csv.fieldnames or []
+            self._first = None
+        else:
+            self._first = self._next_json_line()
+            fieldnames = list(self._first[1].keys()) if self._first else []
+
+        self.columns = self._resolve_columns(fieldnames, required)
+
+    @property
+    def story_column(self) -> str:
+        return self.columns["story_id"]
+
+    # --------------------------------------------------
+    # Column resolution
+    # --------------------------------------------------
+    def _resolve_columns(self, fieldnames: List[str], required: tuple) -> Dict[str, str]:
+        needed = {"story_id", *required}
+        if self.require_label:
+            needed.add("label")
+
+        columns = {}
+        for field, aliases in FIELD_ALIASES.items():
+            for alias in aliases:
+                if alias in fieldnames:
+                    columns[field] = alias
+                    break
+
+        missing = sorted(needed - set(columns))
+        if missing:
+            raise ValueError(
+                f"{self.source_name} missing required columns: {missing} "
+                f"(found {list(fieldnames)})"
+            )
+        return columns
+
+    # --------------------------------------------------
+    # Raw rows
+    # --------------------------------------------------
+    def _next_json_line(self):
+        for line_no, line in enumerate(self._file, 1):
+            line = line.strip()
+            if line:
+                try:
+                    return line_no, json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{self.source_name}: invalid JSON on line {line_no}: {e}")
+        return None
+
+    def _raw_rows(self) -> Iterator[dict]:
+        if self.fmt == "csv":
+            yield from self._csv
+            return
+
+        if self._first is not None:
+            yield self._first[1]
+        for line_no, line in enumerate(self._file, 2):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{self.source_name}: invalid JSON near line {line_no}: {e}")
+
+    def _records(self) -> Iterator[ClaimRecord]:
+        cols = self.columns
+        for row_index, row in enumerate(self._raw_rows()):
+            label = None
+            if "label" in cols:
+                label = str(row.get(cols["label"]) or "").strip().lower() or None
+                if self.require_label and label not in VALID_LABELS:
+                    raise ValueError(f"Unknown label: {row.get(cols['label'])}")
+
+            row_id = row.get(cols["id"]) if "id" in cols else None
+
+            yield ClaimRecord(
+                row_index=row_index,
+                id=str(row_id).strip() if row_id is not None else str(row_index),
+                story_id=normalize_story_id(str(row.get(cols["story_id"]) or "")),
+                backstory=str(row.get(cols["backstory"]) or "").strip() if "backstory" in cols else "",
+                char=str(row.get(cols["char"]) or "").strip() if "char" in cols else "",
+                caption=str(row.get(cols["caption"]) or "").strip() if "caption" in cols else "",
+                label=label,
+            )
+
+    # --------------------------------------------------
+    # Iteration with bounded read-ahead
+    # --------------------------------------------------
+    def __iter__(self) -> Iterator[ClaimRecord]:
+        if self.buffer_size <= 0:
+            yield from self._records()
+            return
+
+        buffer: queue.Queue = queue.Queue(maxsize=self.buffer_size)
+        stop = threading.Event()
+        done = object()
+
+        def put(item) -> bool:
+            # Timed put so a consumer that stopped reading cannot block us forever
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for record in self._records():
+                    if not put(record):
+                        return
+                put(done)
+            except BaseException as e:   # surfaced in the consumer
+                put(e)
+
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                item = buffer.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Wait for the producer so close() never closes the file under it
+            stop.set()
+            thread.join()
+
+    def close(self) -> None:
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self) -> "ClaimReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_claims(
+    source: Union[str, TextIO],
+    require_label: bool = False,
+    **kwargs,
+) -> Iterator[ClaimRecord]:
+    """
+    Convenience generator over ClaimReader that closes the file when done.
+    """
+    with ClaimReader(source, require_label=require_label, **kwargs) as reader:
+        yield from reader
+
+
 # Load train / test CSV
 def load_dataset(csv_path: str, is_train: bool = True) -> List[dict]:
     """
@@ -55,31 +299,14 @@ def load_dataset(csv_path: str, is_train: bool = True) -> List[dict]:
     """
     rows = []
 
-    with open(csv_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-
-        required_cols = {"story_id", "backstory"}
+    for record in read_claims(csv_path, require_label=is_train, buffer_size=0):
+        example = {
+            "story_id": record.story_id,
+            "backstory": record.backstory,
+        }
         if is_train:
-            required_cols.add("label")
-
-        if not required_cols.issubset(reader.fieldnames):
-            raise ValueError(
-                f"CSV {csv_path} missing required columns: {required_cols}"
-            )
-
-        for row in reader:
-            example = {
-                "story_id": row["story_id"].strip().lower().replace(" ", "_"),
-                "backstory": row["backstory"].strip(),
-            }
-
-            if is_train:
-                label_str = row["label"].strip().lower()
-                if label_str not in {"consistent", "contradict"}:
-                    raise ValueError(f"Unknown label: {row['label']}")
-                example["label"] = label_str
-
-            rows.append(example)
+            example["label"] = record.label
+        rows.append(example)
 
     if not rows:
         raise ValueError(f"No rows loaded from {csv_path}")
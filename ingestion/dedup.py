@@ -0,0 +1,206 @@
+import csv
+import os
+import unicodedata
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+
+# --------------------------------------------------
+# Claim de-duplication pre-pass
+# --------------------------------------------------
+# Claim files contain resubmissions and lightly edited copies of the same
+# backstory for the same (story, character). Each copy would otherwise run
+# its own retrieval and LLM call.
+#
+#   exact  - same text after normalize_backstory(); always share a verdict
+#   near   - cosine similarity >= threshold to an earlier backstory of the
+#            same (story, character); share a verdict only when opted in
+#
+# Duplicates always point at the earliest row of their group (the
+# canonical row), so an in-order run has the canonical verdict before any
+# of its duplicates are written.
+
+DEFAULT_THRESHOLD = 0.97
+AUDIT_DIR = "results/dedup"
+
+_PUNCT_MAP = str.maketrans({
+    "‘": "'", "’": "'", "“": '"', "”": '"',
+    "–": "-", "—": "-",
+})
+
+
+def normalize_backstory(text: str) -> str:
+    """
+    Case, unicode form, typographic quotes/dashes and whitespace are not
+    meaningful differences between two submissions of a claim.
+    """
+    text = unicodedata.normalize("NFKC", text or "").translate(_PUNCT_MAP).casefold()
+    return " ".join(text.split()).strip(" .")
+
+
+def audit_path(kind: str, shard=None) -> str:
+    name = kind if shard is None else f"{kind}_shard_{shard[0]:03d}_of_{shard[1]:03d}"
+    return os.path.join(AUDIT_DIR, f"{name}.csv")
+
+
+def group_key(row) -> Tuple[str, str]:
+    return row.story_id, " ".join((row.char or "").casefold().split())
+
+
+class DedupPlan:
+    """
+    Duplicate links for one dataset, keyed by row_index (ids are not
+    guaranteed unique across resubmissions).
+    """
+
+    def __init__(self, rows: List, share_near: bool = False, threshold: float = DEFAULT_THRESHOLD):
+        self.rows = rows
+        self.share_near = share_near
+        self.threshold = threshold
+        # row_index -> {canonical_row, canonical_id, kind, similarity, shared}
+        self.links: Dict[int, Dict] = {}
+
+    def link(self, row, canonical, kind: str, similarity: float) -> None:
+        self.links[row.row_index] = {
+            "canonical_row": canonical.row_index,
+            "canonical_id": canonical.id,
+            "kind": kind,
+            "similarity": round(float(similarity), 4),
+            "shared": kind == "exact" or self.share_near,
+        }
+
+    def is_canonical(self, row) -> bool:
+        """
+        True if the row needs its own retrieval and reasoning.
+        """
+        link = self.links.get(row.row_index)
+        return link is None or not link["shared"]
+
+    def canonical_rows(self) -> Iterator:
+        return (row for row in self.rows if self.is_canonical(row))
+
+    def expand(self, results: Iterable[tuple]) -> Iterator[tuple]:
+        """
+        `results` are the in-order outputs for canonical_rows(), each a
+        tuple starting with the row. Yields one output per input row, in
+        input order; shared duplicates reuse their canonical row's output
+        with the row swapped in. Stops where `results` stops (e.g. a
+        budget stop), so no duplicate outlives its canonical row.
+        """
+        results = iter(results)
+        # Only outputs that a later duplicate still needs are kept
+        needed = {link["canonical_row"] for link in self.links.values() if link["shared"]}
+        kept: Dict[int, tuple] = {}
+
+        for row in self.rows:
+            if self.is_canonical(row):
+                out = next(results, None)
+                if out is None:
+                    return
+                if out[0].row_index in needed:
+                    kept[out[0].row_index] = out
+                yield out
+            else:
+                out = kept[self.links[row.row_index]["canonical_row"]]
+                yield (row,) + tuple(out[1:])
+
+    def save(self, path: str) -> None:
+        """
+        Audit trail: one line per duplicate row.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        ids = {row.row_index: row.id for row in self.rows}
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["row_index", "id", "canonical_row", "canonical_id", "kind", "similarity", "shared"])
+            for row_index, link in sorted(self.links.items()):
+                writer.writerow([
+                    row_index, ids[row_index], link["canonical_row"], link["canonical_id"],
+                    link["kind"], link["similarity"], int(link["shared"]),
+                ])
+
+    def summary(self) -> str:
+        exact = sum(1 for link in self.links.values() if link["kind"] == "exact")
+        near = len(self.links) - exact
+        shared = sum(1 for link in self.links.values() if link["shared"])
+        n = len(self.rows)
+        saved = f"{shared / n:.1%}" if n else "0%"
+        return (
+            f"Dedup: {n} rows, {exact} exact / {near} near duplicates "
+            f"(threshold {self.threshold}, near {'shared' if self.share_near else 'recorded only'}); "
+            f"{n - shared} rows reasoned, {saved} of the workload reused"
+        )
+
+
+def find_duplicates(
+    rows: Iterable,
+    model=None,
+    threshold: float = DEFAULT_THRESHOLD,
+    share_near: bool = False,
+    batch_size: int = 64,
+) -> DedupPlan:
+    """
+    Groups rows by (story_id, character). Exact duplicates are found by
+    normalized text; with an embedding `model` (SentenceTransformer),
+    the remaining distinct backstories of a group are embedded in one
+    batch and linked to the most similar earlier group leader.
+    """
+    rows = list(rows)
+    plan = DedupPlan(rows, share_near=share_near, threshold=threshold)
+
+    groups: Dict[Tuple[str, str], List] = {}
+    for row in rows:
+        groups.setdefault(group_key(row), []).append(row)
+    norm = {row.row_index: normalize_backstory(row.backstory) for row in rows}
+
+    # Distinct texts of groups that have more than one: only these can be near duplicates
+    vectors: Dict[str, np.ndarray] = {}
+    if model is not None:
+        texts = set()
+        for group in groups.values():
+            distinct = {norm[r.row_index] for r in group}
+            if len(distinct) > 1:
+                texts |= distinct
+        if texts:
+            texts = sorted(texts)
+            embeddings = model.encode(
+                texts,
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            ).astype("float32")
+            vectors = dict(zip(texts, embeddings))
+
+    for group in groups.values():
+        first_of: Dict[str, object] = {}                  # text -> first row with it
+        leader_of: Dict[str, Tuple[object, float]] = {}   # text -> (near leader, similarity)
+        leaders: List = []                                # rows starting a near group
+        leader_vecs: List[np.ndarray] = []
+
+        for row in group:
+            text = norm[row.row_index]
+
+            if text in first_of:
+                if text in leader_of and share_near:
+                    leader, sim = leader_of[text]
+                    plan.link(row, leader, "near", sim)
+                else:
+                    plan.link(row, first_of[text], "exact", 1.0)
+                continue
+            first_of[text] = row
+
+            vec = vectors.get(text)
+            if vec is None:
+                continue
+            if leader_vecs:
+                sims = np.stack(leader_vecs) @ vec
+                best = int(np.argmax(sims))
+                if sims[best] >= threshold:
+                    leader_of[text] = (leaders[best], float(sims[best]))
+                    plan.link(row, leaders[best], "near", sims[best])
+                    continue
+            leaders.append(row)
+            leader_vecs.append(vec)
+
+    return plan
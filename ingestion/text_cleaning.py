@@ -1,4 +1,12 @@
 import re
+from typing import List
+
+
+CHAPTER_HEADING = re.compile(
+    r"^[ \t]*chapter\s+(?:[ivxlcdm]+|\d+|one)\b[^\n]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
 
 def strip_gutenberg_text(text: str) -> str:
     """
@@ -35,3 +43,14 @@ def strip_gutenberg_text(text: str) -> str:
         text = text[chapter_match.start():]
 
     return text.strip()
+
+
+def find_chapter_starts(text: str) -> List[int]:
+    """
+    Character offsets where chapters begin (always starting with 0,
+    so text before the first heading forms its own section).
+    """
+    starts = [m.start() for m in CHAPTER_HEADING.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    return starts
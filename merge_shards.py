@@ -0,0 +1,54 @@
+import argparse
+
+import pandas as pd
+
+from execution.sharding import PARTIALS_DIR, find_partials
+
+
+# --------------------------------------------------
+# Merge helpers
+# --------------------------------------------------
+def load_partials(kind: str, partials_dir: str) -> pd.DataFrame:
+    paths = find_partials(kind, partials_dir)
+    print(f"Merging {len(paths)} '{kind}' partials from {partials_dir}")
+
+    df = pd.concat([pd.read_csv(p) for p in paths], ignore_index=True)
+
+    duplicated = df["id"][df["id"].duplicated()]
+    if not duplicated.empty:
+        raise ValueError(f"Rows present in more than one shard: {sorted(set(duplicated))}")
+
+    # Restore the original file order
+    return df.sort_values("row_index").reset_index(drop=True)
+
+
+def merge_eval(partials_dir: str) -> None:
+    from execution.reporting import report_metrics
+
+    df = load_partials("eval", partials_dir)
+    report_metrics(df["label"].tolist(), df["pred"].tolist())
+
+
+def merge_test(partials_dir: str, output: str) -> None:
+    df = load_partials("test", partials_dir)
+    df.drop(columns=["row_index"]).to_csv(output, index=False)
+    print(f"\nSaved {len(df)} predictions to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Combine sharded evaluate.py / final_test.py runs"
+    )
+    parser.add_argument("kind", choices=["eval", "test"])
+    parser.add_argument("--partials-dir", default=PARTIALS_DIR)
+    parser.add_argument("--output", default="result.csv", help="Merged test predictions")
+    args = parser.parse_args()
+
+    if args.kind == "eval":
+        merge_eval(args.partials_dir)
+    else:
+        merge_test(args.partials_dir, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,53 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence
 
-from ingestion.data_ingestion import load_novels, load_dataset
-from indexing.chunking import chunk_all_novels
-from indexing.local_vector_index import LocalVectorIndex
-from retrieval.retrieval_evidence import retrieve_evidence
+from execution.claim_stages import claim_stages
+from execution.resources import ResourcePlan
+from execution.staged_executor import Stage, StagedExecutor
+from indexing.hierarchical_index import HierarchicalIndex
+from indexing.local_vector_index import build_local_index
+from indexing.sharded_index import ShardedVectorIndex
+from retrieval.dossier import DossierStore
+from retrieval.retrieval_evidence import gather_evidence
+from retrieval.sentence_index import SentenceEvidenceIndex
 from reasoning.claim_reasoner import ClaimReasoner
+from reasoning.escalation import make_escalating_reasoner
+from reasoning.nli_cascade import CascadeReasoner
 from config.llm_config import GeminiLLM
+from config.prompt_templates import DEFAULT_PROMPT_VARIANT
 
 
 class NarrativeConsistencyPipeline:
-    def __init__(self):
-        # Load data
-        novels = load_novels("data/novels")
-        chunks = chunk_all_novels(novels)
+    def __init__(
+        self,
+        nli_cascade: bool = False,
+        structured_output: bool = False,
+        hierarchical: bool = False,
+        index_dir: Optional[str] = None,
+        sentence_evidence: bool = False,
+        index_shards: Optional[List[str]] = None,
+        dossiers_path: Optional[str] = None,
+        escalation_steps: Optional[Sequence[int]] = None,
+        strong_model: Optional[str] = None,
+        index=None,
+        prompt_variant: str = DEFAULT_PROMPT_VARIANT,
+        plan: Optional[ResourcePlan] = None,
+    ):
+        if index is not None:
+            # Shared, already loaded index (e.g. several configs in one process)
+            self.index = HierarchicalIndex(index) if hierarchical else index
+        elif index_shards:
+            # Scatter-gather over remote/local index shard workers
+            self.index = ShardedVectorIndex(index_shards)
+        else:
+            # Load data and build vector index (once), or map a prebuilt artifact
+            self.index = build_local_index("data/novels", index_dir=index_dir, plan=plan)
+            if hierarchical:
+                self.index = HierarchicalIndex(self.index)
 
-        # Build vector index (once)
-        self.index = LocalVectorIndex()
-        self.index.index_chunks(chunks)
+        self.sentence_index = (
+            SentenceEvidenceIndex(self.index.model) if sentence_evidence else None
+        )
+        self.dossiers = DossierStore.load(dossiers_path) if dossiers_path else None
 
         # LLM
         self.llm = GeminiLLM(
@@ -25,27 +56,52 @@ class NarrativeConsistencyPipeline:
             max_output_tokens=1536,
         )
 
-        self.reasoner = ClaimReasoner(self.llm)
+        self.reasoner = ClaimReasoner(
+            self.llm, structured_output=structured_output, prompt_variant=prompt_variant
+        )
+        self.escalation = None
+        if escalation_steps:
+            # Small evidence set on the fast model first, more (and a stronger model) if UNCLEAR
+            self.escalation = make_escalating_reasoner(
+                self.reasoner,
+                steps=escalation_steps,
+                strong_model=strong_model,
+                structured_output=structured_output,
+                prompt_variant=prompt_variant,
+            )
+            self.reasoner = self.escalation
+        if nli_cascade:
+            self.reasoner = CascadeReasoner(self.reasoner)
 
-    def predict(
+    def retrieve(
         self,
         claim: str,
         story_id: str,
         character_name: str = None,
         top_k: int = 12,
-    ) -> Dict:
+    ) -> List[Dict]:
         """
-        Runs full pipeline for a single claim.
+        Retrieval stage only: the character's dossier when one exists
+        (searching only if it does not cover the claim), else a fresh search.
         """
+        if self.escalation is not None:
+            # Retrieve once at the largest step; reasoning uses prefixes
+            top_k = max(top_k, self.escalation.max_evidence)
 
-        evidence = retrieve_evidence(
+        return gather_evidence(
             claim=claim,
             story_id=story_id,
             vector_index=self.index,
             character_name=character_name,
             top_k=top_k,
+            sentence_index=self.sentence_index,
+            dossiers=self.dossiers,
         )
 
+    def reason(self, claim: str, evidence: List[Dict]) -> Dict:
+        """
+        Reasoning stage only.
+        """
         result = self.reasoner.verify_claim(claim, evidence)
 
         return {
@@ -54,5 +110,53 @@ class NarrativeConsistencyPipeline:
             "num_evidence": len(evidence),
         }
 
+    def predict(
+        self,
+        claim: str,
+        story_id: str,
+        character_name: str = None,
+        top_k: int = 12,
+    ) -> Dict:
+        """
+        Runs full pipeline for a single claim.
+        """
+        evidence = self.retrieve(claim, story_id, character_name, top_k)
+        return self.reason(claim, evidence)
 
+    def stages(
+        self,
+        top_k: int = 12,
+        retrieval_workers: int = 1,
+        reasoning_workers: int = 4,
+        row_errors: bool = False,
+    ) -> List[Stage]:
+        """
+        Retrieval and reasoning stages over ClaimRecords (execution/claim_stages.py).
+        """
+        return claim_stages(
+            lambda record: self.retrieve(record.backstory, record.story_id, record.char, top_k),
+            lambda record, evidence: self.reason(record.backstory, evidence),
+            retrieval_workers,
+            reasoning_workers,
+            row_errors=row_errors,
+        )
 
+    def make_executor(
+        self,
+        top_k: int = 12,
+        retrieval_workers: int = 1,
+        reasoning_workers: int = 4,
+        queue_size: int = 8,
+        ordered: bool = True,
+        row_errors: bool = False,
+    ) -> StagedExecutor:
+        """
+        Staged executor over ClaimRecords: retrieval for upcoming rows
+        overlaps in-flight LLM calls. Yields (record, evidence, prediction)
+        triples, or (position, triple) pairs with ordered=False.
+        """
+        return StagedExecutor(
+            self.stages(top_k, retrieval_workers, reasoning_workers, row_errors),
+            queue_size=queue_size,
+            ordered=ordered,
+        )
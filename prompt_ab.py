@@ -0,0 +1,137 @@
+import argparse
+import contextlib
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from config.prompt_templates import PROMPT_VARIANTS
+from config.usage_tracker import parse_budget, usage_tracker
+from execution.reporting import bootstrap_ci, bootstrap_indices, paired_bootstrap_diff, score_prediction, unclear_rate
+from execution.claim_stages import reasoning_stage
+from execution.staged_executor import StagedExecutor
+from ingestion.data_ingestion import read_claims
+from quick_eval import stratified_sample
+from reasoning.claim_reasoner import ClaimReasoner
+
+
+# --------------------------------------------------
+# A/B harness for prompt variants (config/prompt_templates.py)
+# --------------------------------------------------
+#   python prompt_ab.py --stub                       # input tokens + latency, no API calls
+#   python prompt_ab.py --variants legacy,split,compact --size 80
+#
+# Evidence is retrieved once per row and shared by every variant, so
+# differences come from the prompt alone.
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare prompt variants: input tokens, latency, accuracy")
+    parser.add_argument("--variants", default=",".join(PROMPT_VARIANTS), help="Comma-separated variant names")
+    parser.add_argument("--size", type=int, default=40, help="Stratified sample size from data/train.csv")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--structured-output", action="store_true")
+    parser.add_argument("--stub", action="store_true", help="Local stub LLM: token / latency side only")
+    parser.add_argument("--index-dir", default="artifacts/index")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent LLM calls")
+    parser.add_argument("--budget", default=None, help="Hard LLM budget, e.g. cost=1")
+    args = parser.parse_args()
+
+    args.variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    unknown = [v for v in args.variants if v not in PROMPT_VARIANTS]
+    if unknown:
+        parser.error(f"Unknown variants {unknown}; available: {sorted(PROMPT_VARIANTS)}")
+    return args
+
+
+def main():
+    args = parse_args()
+    usage_tracker.set_budgets(hard=parse_budget(args.budget))
+
+    rows = stratified_sample(list(read_claims("data/train.csv", require_label=True)), args.size, args.seed)
+
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        from indexing.local_vector_index import build_local_index
+        from retrieval.retrieval_evidence import retrieve_evidence
+
+        index = build_local_index("data/novels", index_dir=args.index_dir)
+        evidence = [
+            retrieve_evidence(
+                claim=row.backstory,
+                story_id=row.story_id,
+                vector_index=index,
+                character_name=row.char,
+                top_k=args.top_k,
+            )
+            for row in rows
+        ]
+
+        if args.stub:
+            from config.stub_llm import StubLLM
+            llm = StubLLM()
+        else:
+            from config.llm_config import GeminiLLM
+            llm = GeminiLLM(model_name="models/gemini-flash-latest", temperature=0.0, max_output_tokens=1536)
+
+        reasoners = {
+            name: ClaimReasoner(llm, structured_output=args.structured_output, prompt_variant=name)
+            for name in args.variants
+        }
+
+        def reason(item, evidence):
+            i, name = item
+            t0 = time.perf_counter()
+            with usage_tracker.context(stage=name, row=rows[i].id):
+                result = reasoners[name].verify_claim(rows[i].backstory, evidence)
+            return dict(result, seconds=time.perf_counter() - t0)
+
+        executor = StagedExecutor([reasoning_stage(reason, args.workers)], queue_size=2 * args.workers)
+
+        preds: Dict[str, List[str]] = {name: [] for name in args.variants}
+        latency: Dict[str, List[float]] = {name: [] for name in args.variants}
+        labels: List[str] = []
+
+        # Variants of one row run next to each other, so load affects them alike
+        items = (((i, name), evidence[i]) for i in range(len(rows)) for name in args.variants)
+        for (i, name), _evidence, result in usage_tracker.until_budget(executor.run(items)):
+            preds[name].append(score_prediction(result["label"]))
+            latency[name].append(result["seconds"])
+            if name == args.variants[-1]:
+                labels.append(rows[i].label)
+
+    n = len(labels)
+    for name in args.variants:
+        del preds[name][n:]
+
+    print(f"\nPrompt A/B on {n} rows{' (stub LLM: accuracy is meaningless)' if args.stub else ''}")
+    print(f"{'variant':<10} {'calls':>6} {'input tok/call':>15} {'p50 ms':>8} {'p95 ms':>8}   "
+          f"{'accuracy [95% CI]':<26} {'unclear':>7}  {'Δ acc vs ' + args.variants[0]:<26}")
+    print("(UNCLEAR counts as wrong)")
+
+    indices = bootstrap_indices(n, seed=args.seed) if n else None
+    base = args.variants[0]
+    for name in args.variants:
+        usage = usage_tracker.by_stage.get(name, {})
+        calls = usage.get("requests", 0)
+        tokens = usage.get("prompt_tokens", 0) / calls if calls else 0.0
+        ms = np.asarray(latency[name][:n] or [0.0]) * 1000
+
+        acc = diff = ""
+        if n:
+            point, lo, hi = bootstrap_ci(labels, preds[name], "accuracy", indices)
+            acc = f"{point:.3f} [{lo:.3f}, {hi:.3f}]"
+            if name != base:
+                point, lo, hi = paired_bootstrap_diff(labels, preds[base], preds[name], "accuracy", indices)
+                diff = f"{point:+.3f} [{lo:+.3f}, {hi:+.3f}]"
+
+        print(f"{name:<10} {calls:>6} {tokens:>15,.0f} {np.percentile(ms, 50):>8.0f} "
+              f"{np.percentile(ms, 95):>8.0f}   {acc:<26} {unclear_rate(preds[name]):>7.1%}  {diff:<26}")
+
+    print()
+    print(usage_tracker.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import argparse
+import contextlib
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from config.usage_tracker import parse_budget, usage_tracker
+from execution.reporting import bootstrap_ci, bootstrap_indices, paired_bootstrap_diff, score_prediction, unclear_rate
+from execution.claim_stages import claim_stages
+from execution.staged_executor import StagedExecutor
+from ingestion.data_ingestion import read_claims
+from reasoning.escalation import DEFAULT_STEPS, STRONG_MODEL
+
+
+# --------------------------------------------------
+# Quick evaluation on a stratified sample of data/train.csv
+# --------------------------------------------------
+#   python quick_eval.py --size 60
+#   python quick_eval.py --config baseline --config escalate,structured-output
+#
+# A config is "baseline" or a comma-separated list of options:
+#   nli-cascade, structured-output, hierarchical, sentence-evidence,
+#   escalate, strong-model, dossiers=PATH, top-k=N, prompt=VARIANT
+
+FLAG_OPTIONS = {
+    "nli-cascade": "nli_cascade",
+    "structured-output": "structured_output",
+    "hierarchical": "hierarchical",
+    "sentence-evidence": "sentence_evidence",
+}
+
+
+def parse_config(spec: str) -> Tuple[Dict, int]:
+    """
+    Config spec -> (NarrativeConsistencyPipeline kwargs, retrieval top_k).
+    """
+    kwargs: Dict = {}
+    top_k = 8   # same as evaluate.py
+
+    for part in spec.split(","):
+        name, _, value = part.strip().partition("=")
+        if name in ("", "baseline"):
+            continue
+        elif name in FLAG_OPTIONS:
+            kwargs[FLAG_OPTIONS[name]] = True
+        elif name == "escalate":
+            kwargs["escalation_steps"] = DEFAULT_STEPS
+        elif name == "strong-model":
+            kwargs["strong_model"] = value or STRONG_MODEL
+        elif name == "dossiers" and value:
+            kwargs["dossiers_path"] = value
+        elif name == "prompt" and value:
+            kwargs["prompt_variant"] = value
+        elif name == "top-k" and value.isdigit():
+            top_k = int(value)
+        else:
+            raise ValueError(f"Unknown config option {part!r} in {spec!r}")
+
+    return kwargs, top_k
+
+
+# --------------------------------------------------
+# Sampling
+# --------------------------------------------------
+def stratified_sample(rows: List, size: int, seed: int = 13) -> List:
+    """
+    Reproducible sample stratified by (story_id, label), with
+    proportional allocation (largest remainder, at least one row per
+    stratum when size allows).
+
+    The sample is interleaved so that every prefix is itself roughly
+    stratified, which is what makes stopping early meaningful.
+    """
+    rng = random.Random(seed)
+
+    strata: Dict[Tuple[str, str], List] = {}
+    for row in rows:
+        strata.setdefault((row.story_id, row.label), []).append(row)
+    keys = sorted(strata)
+    for key in keys:
+        rng.shuffle(strata[key])
+
+    size = min(size, len(rows))
+    quotas = {key: size * len(strata[key]) / len(rows) for key in keys}
+    alloc = {key: int(quotas[key]) for key in keys}
+    if size >= len(keys):
+        for key in keys:
+            alloc[key] = max(alloc[key], 1)
+    by_remainder = sorted(keys, key=lambda k: quotas[k] - int(quotas[k]), reverse=True)
+    while sum(alloc.values()) < size:
+        for key in by_remainder:
+            if sum(alloc.values()) < size and alloc[key] < len(strata[key]):
+                alloc[key] += 1
+    while sum(alloc.values()) > size:
+        largest = max(keys, key=lambda k: alloc[k])
+        alloc[largest] -= 1
+
+    # Position of the i-th pick of a stratum within the run: (i + u) / n
+    placed = []
+    for key in keys:
+        n = alloc[key]
+        for i, row in enumerate(strata[key][:n]):
+            placed.append(((i + rng.random()) / n, row))
+    placed.sort(key=lambda x: x[0])
+    return [row for _, row in placed]
+
+
+# --------------------------------------------------
+# Reporting
+# --------------------------------------------------
+def _fmt(ci: Tuple[float, float, float], signed: bool = False) -> str:
+    point, lo, hi = ci
+    sign = "+" if signed else ""
+    return f"{point:{sign}.3f} [{lo:{sign}.3f}, {hi:{sign}.3f}]"
+
+
+def report(names: List[str], y_true: List[str], preds: List[List[str]], n_boot: int, seed: int) -> float:
+    """
+    Prints point estimates with 95% bootstrap intervals; returns the
+    width of the interval used for early stopping (accuracy, or the
+    accuracy difference when comparing two configs). UNCLEAR counts as
+    wrong; its rate is shown per config.
+    """
+    indices = bootstrap_indices(len(y_true), n_boot, seed)
+
+    print(f"\n{'Config':<40} {'n':>4}   {'accuracy [95% CI]':<26} {'macro-F1 [95% CI]':<26} {'unclear':>7}")
+    widths = []
+    for name, pred in zip(names, preds):
+        acc = bootstrap_ci(y_true, pred, "accuracy", indices)
+        f1 = bootstrap_ci(y_true, pred, "macro_f1", indices)
+        widths.append(acc[2] - acc[1])
+        print(f"{name:<40} {len(y_true):>4}   {_fmt(acc):<26} {_fmt(f1):<26} {unclear_rate(pred):>7.1%}")
+
+    if len(preds) == 2:
+        acc = paired_bootstrap_diff(y_true, preds[0], preds[1], "accuracy", indices)
+        f1 = paired_bootstrap_diff(y_true, preds[0], preds[1], "macro_f1", indices)
+        label = f"Δ ({names[1]} − {names[0]})"
+        print(f"{label:<40} {'':>4}   {_fmt(acc, True):<26} {_fmt(f1, True):<26}")
+        verdict = "significant" if acc[1] > 0 or acc[2] < 0 else "not significant"
+        print(f"Accuracy difference is {verdict} at 95%")
+        return acc[2] - acc[1]
+
+    return max(widths)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Quick stratified evaluation with bootstrap confidence intervals")
+    parser.add_argument(
+        "--config",
+        action="append",
+        default=None,
+        help="\"baseline\" or comma-separated options; give twice to compare two configs on the same sample",
+    )
+    parser.add_argument("--size", type=int, default=60, help="Sample size (rows of data/train.csv)")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument(
+        "--target-width",
+        type=float,
+        default=None,
+        help="Stop early once the 95%% accuracy interval (or the difference interval) is this narrow",
+    )
+    parser.add_argument("--min-rows", type=int, default=30, help="Never stop early before this many rows")
+    parser.add_argument("--check-every", type=int, default=10)
+    parser.add_argument("--bootstrap", type=int, default=2000, help="Bootstrap replicates")
+    parser.add_argument(
+        "--index-dir",
+        default="artifacts/index",
+        help="Index artifact (built and saved there on the first run, memory-mapped afterwards)",
+    )
+    parser.add_argument("--reasoning-workers", type=int, default=4, help="Concurrent LLM calls (all configs)")
+    parser.add_argument("--budget", default=None, help="Hard LLM budget, e.g. cost=1")
+    parser.add_argument("--verbose", action="store_true", help="Show per-row pipeline output on stderr")
+    args = parser.parse_args()
+
+    args.config = args.config or ["baseline"]
+    if len(args.config) > 2:
+        parser.error("At most two configs can be compared")
+    return args
+
+
+# --------------------------------------------------
+# Main
+# --------------------------------------------------
+def main():
+    args = parse_args()
+    usage_tracker.set_budgets(hard=parse_budget(args.budget))
+    configs = [parse_config(spec) for spec in args.config]
+
+    rows = list(read_claims("data/train.csv", require_label=True))
+    sample = stratified_sample(rows, args.size, args.seed)
+    print(f"Sample: {len(sample)} of {len(rows)} rows (seed {args.seed}), "
+          f"stratified by story and label", file=sys.stderr)
+
+    # Pipeline / per-row output goes to stderr with --verbose, else nowhere
+    sink = sys.stderr if args.verbose else open(os.devnull, "w")
+    with contextlib.redirect_stdout(sink):
+        from indexing.local_vector_index import build_local_index
+        from pipeline import NarrativeConsistencyPipeline
+
+        # One index shared by every config
+        index = build_local_index("data/novels", index_dir=args.index_dir)
+        pipelines = [NarrativeConsistencyPipeline(index=index, **kwargs) for kwargs, _ in configs]
+
+    # Each (row, config) pair is one item: configs run side by side on the same rows
+    def retrieve(item):
+        row, c = item
+        return pipelines[c].retrieve(row.backstory, row.story_id, row.char, configs[c][1])
+
+    def reason(item, evidence):
+        row, c = item
+        with usage_tracker.context(stage=args.config[c], row=row.id):
+            return pipelines[c].reason(row.backstory, evidence)
+
+    executor = StagedExecutor(
+        claim_stages(retrieve, reason, 1, args.reasoning_workers),
+        queue_size=2 * args.reasoning_workers,
+    )
+
+    items = ((row, c) for row in sample for c in range(len(configs)))
+
+    y_true: List[str] = []
+    preds: List[List[str]] = [[] for _ in configs]
+    t0 = time.time()
+
+    with contextlib.redirect_stdout(sink):
+        for (row, c), _evidence, result in usage_tracker.until_budget(executor.run(items)):
+            preds[c].append(score_prediction(result["label"]))
+            if c < len(configs) - 1:
+                continue
+
+            # All configs done for this row (results arrive in input order)
+            y_true.append(row.label)
+            n = len(y_true)
+            print(f"\r{n}/{len(sample)} rows", end="", file=sys.stderr)
+
+            if args.target_width and n >= args.min_rows and n % args.check_every == 0:
+                with contextlib.redirect_stdout(sys.stderr):
+                    width = report(args.config, y_true, preds, args.bootstrap, args.seed)
+                if width <= args.target_width:
+                    print(f"\nInterval width {width:.3f} <= {args.target_width}; stopping early "
+                          f"after {n} rows", file=sys.stderr)
+                    break
+
+    # Drop a half-finished row (budget stop between configs)
+    for pred in preds:
+        del pred[len(y_true):]
+
+    print(f"\n\nQuick eval: {len(y_true)} rows in {time.time() - t0:.0f}s")
+    if y_true:
+        report(args.config, y_true, preds, args.bootstrap, args.seed)
+    print()
+    print(usage_tracker.summary())
+
+
+if __name__ == "__main__":
+    main()
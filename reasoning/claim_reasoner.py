@@ -1,7 +1,44 @@
+import json
 import re
-from typing import List, Dict
+from bisect import bisect_right
+from typing import List, Dict, Optional
 
-from config.prompt_templates import CLAIM_VERIFICATION_PROMPT
+from config.prompt_templates import (
+    CLAIM_VERDICT_SCHEMA,
+    DEFAULT_PROMPT_VARIANT,
+    PROMPT_VARIANTS,
+)
+from retrieval.retrieval_evidence import span_segments
+
+
+# Characters of passage text sent per chunk when there is no sentence excerpt
+CHUNK_CHAR_LIMIT = 800
+
+
+def passage_text(chunk: Dict) -> str:
+    """
+    Evidence text sent to the LLM: the sentence-level excerpt when available,
+    else the passage truncated to avoid token overflow. A span merged from
+    several chunks keeps the first CHUNK_CHAR_LIMIT characters of each chunk,
+    so its later chunks are not cut off.
+    """
+    if chunk.get("excerpt"):
+        return chunk["excerpt"]
+
+    spans = chunk.get("chunk_spans")
+    if not spans:
+        # Passages from older dossier files: no per-chunk offsets
+        limit = CHUNK_CHAR_LIMIT * max(1, len(chunk.get("chunk_ids") or ()))
+        return chunk["text"].strip()[:limit]
+
+    segments = span_segments(spans)
+    heads = span_segments([(start, min(end, start + CHUNK_CHAR_LIMIT)) for start, end in spans])
+    parts = []
+    for start, end, _ in heads:
+        seg_start, _, offset = segments[bisect_right([s for s, _, _ in segments], start) - 1]
+        begin = offset + start - seg_start
+        parts.append(chunk["text"][begin:begin + end - start].strip())
+    return "\n".join(parts)
 
 
 class ClaimReasoner:
@@ -9,8 +46,20 @@ class ClaimReasoner:
     Layer 5: Reasoning / Claim Verification
     """
 
-    def __init__(self, llm_client):
+    def __init__(
+        self,
+        llm_client,
+        structured_output: bool = False,
+        prompt_variant: str = DEFAULT_PROMPT_VARIANT,
+    ):
         self.llm = llm_client
+        # JSON verdicts via the SDK response schema; regex parsing stays as fallback
+        self.structured_output = structured_output
+
+        if prompt_variant not in PROMPT_VARIANTS:
+            raise ValueError(f"Unknown prompt variant {prompt_variant!r}, choose from {sorted(PROMPT_VARIANTS)}")
+        self.prompt_variant = prompt_variant
+        self.prompts = PROMPT_VARIANTS[prompt_variant]
 
 
     def verify_claim(
@@ -33,17 +82,39 @@ class ClaimReasoner:
 
         evidence_blocks = self._format_evidence(evidence_chunks)
 
-        prompt = CLAIM_VERIFICATION_PROMPT.format(
-            claim=claim,
-            evidence_blocks=evidence_blocks
-        )
-
-        raw_output = self.llm.generate(prompt) or ""
+        # Static instructions go in the system instruction when the variant has one
+        if self.structured_output:
+            prompt = self.prompts["json_user"].format(
+                claim=claim,
+                evidence_blocks=evidence_blocks
+            )
+            system = self.prompts["json_system"]
+            if system:
+                raw_output = self.llm.generate_json(
+                    prompt, CLAIM_VERDICT_SCHEMA, system_instruction=system
+                ) or ""
+            else:
+                raw_output = self.llm.generate_json(prompt, CLAIM_VERDICT_SCHEMA) or ""
+        else:
+            prompt = self.prompts["user"].format(
+                claim=claim,
+                evidence_blocks=evidence_blocks
+            )
+            system = self.prompts["system"]
+            if system:
+                raw_output = self.llm.generate(prompt, system_instruction=system) or ""
+            else:
+                raw_output = self.llm.generate(prompt) or ""
 
         print("\n----- RAW LLM OUTPUT -----")
         print(raw_output)
         print("----- END RAW OUTPUT -----\n")
 
+        if self.structured_output:
+            parsed = self._parse_json_output(raw_output)
+            if parsed is not None:
+                return parsed
+
         return self._parse_llm_output(raw_output)
 
 
@@ -53,11 +124,12 @@ class ClaimReasoner:
     def _format_evidence(self, evidence_chunks: List[Dict]) -> str:
         blocks = []
         for i, chunk in enumerate(evidence_chunks, 1):
-            # 🔑 truncate to avoid token overflow
-            text = chunk["text"].strip()[:800]
+            # 🔑 sentence-level excerpt when available, else truncated per chunk
+            text = passage_text(chunk)
 
+            label = self.prompts["evidence_label"].format(i=i)
             blocks.append(
-                f"[Evidence {i}]\n{text}"
+                f"{label}\n{text}"
             )
 
         return "\n\n".join(blocks)
@@ -66,6 +138,37 @@ class ClaimReasoner:
     # --------------------------------------------------
     # Output parsing
     # --------------------------------------------------
+    def _parse_json_output(self, text: str) -> Optional[Dict]:
+        try:
+            data = json.loads(text)
+        except (json.JSONDecodeError, TypeError):
+            # Output cut off by the token cap: the label comes first
+            match = re.search(
+                r'"label"\s*:\s*"(CONSISTENT|CONTRADICT|UNCLEAR)"',
+                text or "",
+                re.IGNORECASE,
+            )
+            if not match:
+                return None
+            return {
+                "label": match.group(1).lower(),
+                "explanation": "No explanation provided."
+            }
+
+        if not isinstance(data, dict):
+            return None
+
+        label = str(data.get("label", "")).strip().lower()
+        if label not in {"consistent", "contradict", "unclear"}:
+            return None
+
+        explanation = str(data.get("explanation", "")).strip()
+
+        return {
+            "label": label,
+            "explanation": explanation or "No explanation provided."
+        }
+
     def _parse_llm_output(self, text: str) -> Dict:
         text = text.strip()
         text = re.sub(r"[*_`]", "", text)
@@ -85,7 +188,8 @@ class ClaimReasoner:
         if not label_match:
             return {
                 "label": "unclear",
-                "explanation": "Model output could not be parsed reliably."
+                "explanation": "Model output could not be parsed reliably.",
+                "parse_ok": False,
             }
 
         label = label_match.group(1).lower()
@@ -105,17 +209,11 @@ class ClaimReasoner:
 
 # Local test
 if __name__ == "__main__":
-    from ingestion.data_ingestion import load_novels
-    from indexing.chunking import chunk_all_novels
-    from indexing.local_vector_index import LocalVectorIndex
+    from indexing.local_vector_index import build_local_index
     from retrieval.retrieval_evidence import retrieve_evidence
     from config.llm_config import GeminiLLM
 
-    novels = load_novels("data/novels")
-    chunks = chunk_all_novels(novels)
-
-    index = LocalVectorIndex()
-    index.index_chunks(chunks)
+    index = build_local_index("data/novels")
 
     claim = (
         "Thalcave's people faded as colonists advanced; "
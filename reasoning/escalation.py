@@ -0,0 +1,152 @@
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from config.prompt_templates import DEFAULT_PROMPT_VARIANT
+from config.usage_tracker import usage_tracker
+from reasoning.claim_reasoner import ClaimReasoner, passage_text
+
+
+DEFAULT_STEPS = (4, 8, 12)
+STRONG_MODEL = "models/gemini-pro-latest"
+
+
+def needs_escalation(result: Dict) -> bool:
+    return result["label"] == "unclear" or not result.get("parse_ok", True)
+
+
+class EscalatingReasoner:
+    """
+    Adaptive evidence / model escalation around a ClaimReasoner.
+
+    Evidence is retrieved once at the largest step (ordered by score), and
+    the claim is first judged on the top few passages with the fast model.
+    Only UNCLEAR or unparsable verdicts are retried with the next, larger
+    evidence prefix; the last step optionally uses a stronger model.
+    Drop-in replacement for ClaimReasoner.verify_claim.
+    """
+
+    def __init__(
+        self,
+        reasoner,
+        steps: Sequence[int] = DEFAULT_STEPS,
+        strong_reasoner=None,
+    ):
+        if not steps or list(steps) != sorted(set(steps)):
+            raise ValueError(f"Escalation steps must be increasing, got {steps}")
+        self.reasoner = reasoner
+        self.steps = list(steps)
+        self.strong_reasoner = strong_reasoner
+
+        self.rows = 0
+        self.calls = 0
+        self.passages_sent = 0
+        self.chars_sent = 0
+        self.resolved_at: Dict[str, int] = {}
+        self.unresolved = 0
+        self._lock = threading.Lock()   # counters are shared by reasoning workers
+
+    @property
+    def max_evidence(self) -> int:
+        return self.steps[-1]
+
+    def _plan(self, num_evidence: int) -> List[tuple]:
+        """
+        (prefix size, reasoner, step name) attempts, skipping steps that
+        would resend the same prefix to the same model.
+        """
+        plan = []
+        for i, step in enumerate(self.steps):
+            last = i == len(self.steps) - 1
+            strong = last and self.strong_reasoner is not None
+            size = min(step, num_evidence)
+
+            if plan and plan[-1][0] == size and not strong:
+                continue
+            plan.append((
+                size,
+                self.strong_reasoner if strong else self.reasoner,
+                f"{size}+strong" if strong else str(size),
+            ))
+        return plan
+
+    def verify_claim(self, claim: str, evidence_chunks: List[Dict]) -> Dict:
+        plan = self._plan(len(evidence_chunks))
+
+        result = None
+        for attempt, (size, reasoner, name) in enumerate(plan, 1):
+            evidence = evidence_chunks[:size]
+            if attempt == 1:
+                result = reasoner.verify_claim(claim, evidence)
+            else:
+                # Token usage of retries is reported separately
+                with usage_tracker.context(stage=f"escalation-{name}"):
+                    result = reasoner.verify_claim(claim, evidence)
+
+            with self._lock:
+                self.calls += 1
+                self.passages_sent += len(evidence)
+                self.chars_sent += sum(len(passage_text(c)) for c in evidence)
+
+            # Empty claim / no evidence: more of the same cannot help
+            if not evidence or not needs_escalation(result):
+                break
+
+        with self._lock:
+            self.rows += 1
+            if needs_escalation(result):
+                self.unresolved += 1
+            else:
+                self.resolved_at[name] = self.resolved_at.get(name, 0) + 1
+
+        result["escalation_step"] = name
+        result["attempts"] = attempt
+        return result
+
+    def summary(self) -> str:
+        if not self.rows:
+            return "Escalation: no rows"
+        resolved = ", ".join(
+            f"{name}: {n}" for name, n in sorted(
+                self.resolved_at.items(), key=lambda kv: int(kv[0].split("+")[0])
+            )
+        )
+        return (
+            f"Escalation: {self.rows} rows, {self.calls} LLM calls "
+            f"({self.calls / self.rows:.2f}/row), "
+            f"avg {self.passages_sent / self.calls:.1f} passages / "
+            f"{self.chars_sent / self.calls:.0f} evidence chars per call\n"
+            f"  resolved at step [{resolved}], still unclear: {self.unresolved}"
+        )
+
+
+def make_escalating_reasoner(
+    reasoner,
+    steps: Sequence[int] = DEFAULT_STEPS,
+    strong_model: Optional[str] = None,
+    structured_output: bool = False,
+    prompt_variant: str = DEFAULT_PROMPT_VARIANT,
+) -> EscalatingReasoner:
+    """
+    Wraps `reasoner`; with `strong_model`, the last step runs a
+    ClaimReasoner on that Gemini model.
+    """
+    strong = None
+    if strong_model:
+        from config.llm_config import GeminiLLM
+
+        strong_llm = GeminiLLM(model_name=strong_model, temperature=0.0, max_output_tokens=1536)
+        strong = ClaimReasoner(
+            strong_llm, structured_output=structured_output, prompt_variant=prompt_variant
+        )
+
+    return EscalatingReasoner(reasoner, steps=steps, strong_reasoner=strong)
+
+
+def parse_steps(spec: str) -> List[int]:
+    """
+    "4,8,12" -> [4, 8, 12]
+    """
+    try:
+        return [int(s) for s in spec.split(",") if s.strip()]
+    except ValueError:
+        raise ValueError(f"Invalid escalation steps {spec!r}, expected e.g. 4,8,12") from None
@@ -0,0 +1,247 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from sentence_transformers import CrossEncoder
+
+
+DEFAULT_NLI_MODEL = "cross-encoder/nli-deberta-v3-xsmall"
+THRESHOLDS_PATH = "config/nli_thresholds.json"
+
+# Conservative defaults until calibrate_thresholds() has been run
+DEFAULT_THRESHOLDS = {
+    "contradict": 0.97,
+    "consistent": 0.97,
+}
+
+
+class NLIScorer:
+    """
+    Local cross-encoder NLI model scoring (claim, evidence) pairs.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_NLI_MODEL,
+        batch_size: int = 32,
+        max_evidence_chars: int = 1500,
+    ):
+        self.model = CrossEncoder(model_name)
+        self.batch_size = batch_size
+        self.max_evidence_chars = max_evidence_chars
+
+        id2label = self.model.config.id2label
+        labels = [id2label[i].lower() for i in range(len(id2label))]
+        self.entail_idx = labels.index("entailment")
+        self.contradict_idx = labels.index("contradiction")
+
+    def score_batch(
+        self,
+        claims: List[str],
+        evidence_lists: List[List[Dict]],
+    ) -> List[Dict]:
+        """
+        Scores every (claim, evidence) pair of several rows in one
+        batched forward pass and keeps the strongest signal per row.
+        """
+        pairs = []
+        owners = []
+        for row, (claim, evidence) in enumerate(zip(claims, evidence_lists)):
+            for chunk in evidence:
+                pairs.append((chunk["text"].strip()[: self.max_evidence_chars], claim))
+                owners.append(row)
+
+        scores = [{"entail": 0.0, "contradict": 0.0} for _ in claims]
+        if not pairs:
+            return scores
+
+        probs = self.model.predict(
+            pairs,
+            batch_size=self.batch_size,
+            apply_softmax=True,
+            show_progress_bar=False,
+        )
+
+        for row, p in zip(owners, probs):
+            scores[row]["entail"] = max(scores[row]["entail"], float(p[self.entail_idx]))
+            scores[row]["contradict"] = max(scores[row]["contradict"], float(p[self.contradict_idx]))
+
+        return scores
+
+    def score(self, claim: str, evidence: List[Dict]) -> Dict:
+        return self.score_batch([claim], [evidence])[0]
+
+
+# --------------------------------------------------
+# Decision rule
+# --------------------------------------------------
+def decide(scores: Dict, thresholds: Dict) -> Optional[str]:
+    """
+    Returns a confident label, or None to escalate to the LLM.
+    """
+    entail = scores["entail"]
+    contradict = scores["contradict"]
+
+    if contradict >= thresholds["contradict"] and contradict > entail:
+        return "contradict"
+    if entail >= thresholds["consistent"] and entail > contradict:
+        return "consistent"
+    return None
+
+
+def load_thresholds(path: str = THRESHOLDS_PATH) -> Dict:
+    if not os.path.exists(path):
+        return dict(DEFAULT_THRESHOLDS)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class CascadeReasoner:
+    """
+    Layer 5 cascade: local NLI first, LLM only for uncertain rows.
+    Drop-in replacement for ClaimReasoner.verify_claim.
+    """
+
+    def __init__(
+        self,
+        reasoner,
+        scorer: Optional[NLIScorer] = None,
+        thresholds: Optional[Dict] = None,
+    ):
+        self.reasoner = reasoner
+        self.scorer = scorer or NLIScorer()
+        self.thresholds = thresholds or load_thresholds()
+
+        self.total = 0
+        self.escalated = 0
+        self._lock = threading.Lock()   # counters are shared by reasoning workers
+
+    def verify_claim(self, claim: str, evidence_chunks: List[Dict]) -> Dict:
+        with self._lock:
+            self.total += 1
+
+        if claim and claim.strip() and evidence_chunks:
+            scores = self.scorer.score(claim, evidence_chunks)
+            label = decide(scores, self.thresholds)
+
+            if label is not None:
+                key = "entail" if label == "consistent" else "contradict"
+                return {
+                    "label": label,
+                    "explanation": (
+                        f"Local NLI model judged the evidence to "
+                        f"{'entail' if label == 'consistent' else 'contradict'} "
+                        f"the claim (p={scores[key]:.3f})."
+                    ),
+                    "stage": "nli",
+                }
+
+        with self._lock:
+            self.escalated += 1
+        result = self.reasoner.verify_claim(claim, evidence_chunks)
+        result["stage"] = "llm"
+        return result
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalated / self.total if self.total else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"NLI cascade: {self.total - self.escalated}/{self.total} rows "
+            f"decided locally, escalation rate {self.escalation_rate:.1%}"
+        )
+
+
+# --------------------------------------------------
+# Calibration
+# --------------------------------------------------
+def _threshold_for(
+    values: List[float],
+    correct: List[bool],
+    target_precision: float,
+    min_support: int,
+) -> Tuple[float, int]:
+    """
+    Lowest threshold whose accepted rows reach the target precision.
+    """
+    best = (1.01, 0)
+    ranked = sorted(zip(values, correct), key=lambda x: x[0], reverse=True)
+
+    hits = 0
+    for n, (value, ok) in enumerate(ranked, 1):
+        hits += ok
+        if n >= min_support and hits / n >= target_precision:
+            best = (value, n)
+
+    return best
+
+
+def calibrate_thresholds(
+    scores: List[Dict],
+    labels: List[str],
+    target_precision: float = 0.9,
+    min_support: int = 3,
+) -> Dict:
+    """
+    Picks per-label thresholds on labelled rows (e.g. data/train.csv)
+    so that locally decided verdicts keep the target precision.
+    """
+    thresholds = {}
+    for label, key in (("contradict", "contradict"), ("consistent", "entail")):
+        other = "entail" if key == "contradict" else "contradict"
+        candidates = [
+            (s[key], y == label) for s, y in zip(scores, labels)
+            if s[key] > s[other]
+        ]
+        value, support = _threshold_for(
+            [c[0] for c in candidates],
+            [c[1] for c in candidates],
+            target_precision,
+            min_support,
+        )
+        thresholds[label] = value
+        print(f"{label}: threshold={value:.3f} (covers {support} train rows)")
+
+    return thresholds
+
+
+if __name__ == "__main__":
+    from indexing.local_vector_index import build_local_index
+    from ingestion.data_ingestion import read_claims
+    from retrieval.retrieval_evidence import retrieve_evidence
+
+    index = build_local_index("data/novels")
+    scorer = NLIScorer()
+
+    rows = list(read_claims("data/train.csv", require_label=True))
+
+    claims = [row.backstory for row in rows]
+    labels = [row.label for row in rows]
+    evidence_lists = [
+        retrieve_evidence(
+            claim=row.backstory,
+            story_id=row.story_id,
+            vector_index=index,
+            character_name=row.char,
+            top_k=8,
+        )
+        for row in rows
+    ]
+
+    scores = scorer.score_batch(claims, evidence_lists)
+    thresholds = calibrate_thresholds(scores, labels)
+
+    decided = [decide(s, thresholds) for s in scores]
+    local = [(d, y) for d, y in zip(decided, labels) if d is not None]
+    correct = sum(d == y for d, y in local)
+
+    print(f"\nDecided locally: {len(local)}/{len(rows)} "
+          f"(escalation rate {1 - len(local) / len(rows):.1%})")
+    if local:
+        print(f"Local accuracy: {correct / len(local):.3f}")
+
+    with open(THRESHOLDS_PATH, "w", encoding="utf-8") as f:
+        json.dump(thresholds, f, indent=2)
+    print(f"Saved thresholds to {THRESHOLDS_PATH}")
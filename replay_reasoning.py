@@ -0,0 +1,129 @@
+import argparse
+import sys
+import time
+from typing import Dict
+
+from config.prompt_templates import DEFAULT_PROMPT_VARIANT, PROMPT_VARIANTS
+from config.usage_tracker import parse_budget, usage_tracker
+from execution.csv_output import AtomicCsvWriter
+from execution.reporting import normalize_prediction, report_metrics
+from execution.claim_stages import reasoning_stage
+from execution.staged_executor import StagedExecutor
+from ingestion.data_ingestion import ClaimReader
+from reasoning.claim_reasoner import ClaimReasoner
+from reasoning.escalation import STRONG_MODEL, make_escalating_reasoner, parse_steps
+from retrieval.snapshot import EvidenceSnapshot
+
+
+# --------------------------------------------------
+# Reasoning-only runs on a frozen evidence snapshot
+# --------------------------------------------------
+#   python -m retrieval.snapshot --claims data/train.csv        # once
+#   python replay_reasoning.py --snapshot artifacts/evidence_train.jsonl.gz --prompt-variant compact
+#
+# Loads no embedding model, FAISS index or torch: the first LLM call goes
+# out right away, and every run with the same snapshot sees exactly the
+# same evidence, so reasoning changes are measured on their own.
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay a saved evidence snapshot into the claim reasoner")
+    parser.add_argument("--snapshot", required=True, help="File written by retrieval.snapshot or --snapshot-out")
+    parser.add_argument("--claims", default=None, help="Claims CSV (default: the one recorded in the snapshot)")
+    parser.add_argument("--novels-dir", default="data/novels")
+    parser.add_argument("--model", default="models/gemini-flash-latest")
+    parser.add_argument("--stub", action="store_true", help="Local stub LLM (no API calls)")
+    parser.add_argument("--structured-output", action="store_true")
+    parser.add_argument("--prompt-variant", default=DEFAULT_PROMPT_VARIANT, choices=sorted(PROMPT_VARIANTS))
+    parser.add_argument("--top-k", type=int, default=8, help="Evidence passages per claim (prefix of the snapshot)")
+    parser.add_argument("--escalate", action="store_true", help="Retry UNCLEAR verdicts with more evidence")
+    parser.add_argument("--escalation-steps", default="4,8,12")
+    parser.add_argument("--strong-model", nargs="?", const=STRONG_MODEL, default=None)
+    parser.add_argument("--reasoning-workers", type=int, default=4, help="Concurrent LLM calls")
+    parser.add_argument("--limit", type=int, default=None, help="Only the first N rows")
+    parser.add_argument("--budget", default=None, help="Hard LLM budget, e.g. cost=1")
+    parser.add_argument("--output", default=None, help="Optional CSV of id, label, explanation")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    usage_tracker.set_budgets(hard=parse_budget(args.budget))
+    t0 = time.time()
+
+    snapshot = EvidenceSnapshot(args.snapshot, novels_dir=args.novels_dir)
+    claims_path = args.claims or snapshot.claims
+    with ClaimReader(claims_path) as reader:
+        claims: Dict[int, object] = {row.row_index: row for row in reader}
+    print(f"Snapshot {args.snapshot}: retrieval config {snapshot.config_hash} "
+          f"(top_k={snapshot.config.get('top_k')}, index={snapshot.config.get('index')})")
+
+    if args.stub:
+        from config.stub_llm import StubLLM
+        llm = StubLLM()
+    else:
+        from config.llm_config import GeminiLLM
+        llm = GeminiLLM(model_name=args.model, temperature=0.0, max_output_tokens=1536)
+
+    reasoner = ClaimReasoner(llm, structured_output=args.structured_output, prompt_variant=args.prompt_variant)
+    escalation = None
+    top_k = args.top_k
+    if args.escalate:
+        escalation = make_escalating_reasoner(
+            reasoner,
+            steps=parse_steps(args.escalation_steps),
+            strong_model=args.strong_model,
+            structured_output=args.structured_output,
+            prompt_variant=args.prompt_variant,
+        )
+        reasoner = escalation
+        top_k = escalation.max_evidence
+    if top_k > (snapshot.config.get("top_k") or 0):
+        print(f"⚠️ Snapshot holds at most {snapshot.config.get('top_k')} passages per row; "
+              f"top_k={top_k} cannot be honoured")
+
+    def rows():
+        for n, (row_index, row_id, evidence) in enumerate(snapshot):
+            if args.limit is not None and n >= args.limit:
+                return
+            row = claims.get(row_index)
+            if row is None or row.id != row_id:
+                raise ValueError(
+                    f"Row {row_index} (id {row_id}) of {args.snapshot} does not match {claims_path}"
+                )
+            yield row, evidence[:top_k]
+
+    executor = StagedExecutor(
+        [reasoning_stage(lambda row, evidence: reasoner.verify_claim(row.backstory, evidence), args.reasoning_workers)],
+        queue_size=2 * args.reasoning_workers,
+    )
+    writer = AtomicCsvWriter(args.output, ["id", "label", "explanation"]) if args.output else None
+
+    y_true, y_pred = [], []
+    done = 0
+    first_call = None
+    for row, _evidence, result in usage_tracker.until_budget(executor.run(rows())):
+        done += 1
+        if first_call is None:
+            first_call = time.time() - t0
+        if row.label:
+            y_true.append(row.label)
+            y_pred.append(normalize_prediction(result["label"], row.label))
+        if writer is not None:
+            writer.write({"id": row.id, "label": result["label"], "explanation": result["explanation"]})
+        print(f"\r{done} rows", end="", file=sys.stderr)
+
+    if writer is not None:
+        writer.close(commit=usage_tracker.stopped is None)
+
+    print(f"\n\nReplayed in {time.time() - t0:.1f}s (first verdict after {first_call or 0:.1f}s)")
+    if y_true:
+        report_metrics(y_true, y_pred)
+    print("\n" + executor.summary())
+    if escalation is not None:
+        print(escalation.summary())
+    print(usage_tracker.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config.prompt_templates import CHARACTER_DOSSIER_PROMPT
+from config.usage_tracker import usage_tracker
+from ingestion.data_ingestion import normalize_story_id
+from retrieval.retrieval_evidence import _add_to_spans, mmr_order, retrieve_evidence
+
+
+DOSSIERS_PATH = "artifacts/dossiers.json"
+DOSSIER_VERSION = 1
+
+# Claim / passage cosine similarity (bge-base-en-v1.5) from which a dossier
+# passage counts as covering the claim; below it the story is searched
+COVER_SIMILARITY = 0.6
+
+
+def dossier_key(story_id: str, character: str) -> str:
+    return f"{normalize_story_id(story_id)}::{character.strip().lower()}"
+
+
+def _passages_hash(passages: List[Dict]) -> str:
+    ids = "|".join(",".join(p["chunk_ids"]) for p in passages)
+    return hashlib.sha256(ids.encode("utf-8")).hexdigest()[:16]
+
+
+# --------------------------------------------------
+# Offline building
+# --------------------------------------------------
+def build_dossier(
+    vector_index,
+    story_id: str,
+    character: str,
+    max_passages: int = 16,
+    mmr_lambda: float = 0.5,
+) -> Optional[Dict]:
+    """
+    Top passages about one character: chunks mentioning the character
+    (entity index), ranked by closeness to the centroid of all of them,
+    diversified with MMR and merged into non-overlapping spans.
+
+    Needs a LocalVectorIndex (stored vectors + entity index). Returns
+    None when the character has no indexed mentions.
+    """
+    story_id = normalize_story_id(story_id)
+    if vector_index.entity_index is None:
+        return None
+
+    rows = vector_index.entity_index.rows_for(story_id, character)
+    if not rows:
+        return None
+
+    rows = np.fromiter(sorted(rows), dtype="int64")
+    vectors = vector_index.index.reconstruct_batch(rows)
+
+    # The mean mention vector stands for "what the book says about them"
+    centroid = vectors.mean(axis=0)
+    centroid /= max(np.linalg.norm(centroid), 1e-12)
+    relevance = vectors @ centroid
+
+    spans: List[Dict] = []
+    for i in mmr_order(relevance, vectors, mmr_lambda):
+        hit = dict(vector_index.chunks[int(rows[i])])
+        hit["score"] = float(relevance[i])
+        _add_to_spans(spans, hit)
+        if len(spans) >= max_passages:
+            break
+
+    spans.sort(key=lambda s: s["start_char"])
+    passages = [
+        {
+            "chunk_ids": s["chunk_ids"],
+            "chunk_spans": [[int(a), int(b)] for a, b in s["chunk_spans"]],
+            "start_char": int(s["start_char"]),
+            "end_char": int(s["end_char"]),
+            "text": s["text"],
+            "score": round(s["score"], 4),
+        }
+        for s in spans
+    ]
+
+    return {
+        "story_id": story_id,
+        "character": character,
+        "num_mentions": len(rows),
+        "passages": passages,
+        "summary": None,
+        "summary_hash": None,
+    }
+
+
+def summarize_dossier(llm, dossier: Dict, max_chars_per_passage: int = 800) -> bool:
+    """
+    Adds an LLM-written fact summary. Cached: only called again when the
+    dossier's passages changed. Returns True if the LLM was called.
+    """
+    passages_hash = _passages_hash(dossier["passages"])
+    if dossier.get("summary") and dossier.get("summary_hash") == passages_hash:
+        return False
+
+    blocks = "\n\n".join(
+        f"[Passage {i}]\n{p['text'].strip()[:max_chars_per_passage]}"
+        for i, p in enumerate(dossier["passages"], 1)
+    )
+    prompt = CHARACTER_DOSSIER_PROMPT.format(character=dossier["character"], passages=blocks)
+
+    with usage_tracker.context(stage="dossier-summary"):
+        dossier["summary"] = llm.generate(prompt) or None
+    dossier["summary_hash"] = passages_hash
+    return True
+
+
+# --------------------------------------------------
+# Store + claim-time lookup
+# --------------------------------------------------
+class DossierStore:
+    """
+    JSON file of per-(story_id, character) dossiers.
+
+    At claim time, evidence_for() ranks the character's dossier passages
+    against the claim and serves them with the cached fact summary,
+    without a fresh search. Only when no dossier passage covers the claim
+    (similarity below min_similarity) does it search the story, merging
+    those hits with the best dossier passages. Characters without a
+    dossier return None so the caller can fall back to retrieve_evidence.
+    """
+
+    def __init__(self, dossiers: Optional[Dict[str, Dict]] = None, min_similarity: float = COVER_SIMILARITY):
+        self.dossiers: Dict[str, Dict] = dossiers or {}
+        self.min_similarity = min_similarity
+        self.hits = 0           # served from the dossier alone
+        self.searched = 0       # dossier did not cover the claim
+        self.misses = 0         # no dossier for the character
+        self._lock = threading.Lock()   # counters are shared by retrieval workers
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    @classmethod
+    def load(cls, path: str = DOSSIERS_PATH, min_similarity: float = COVER_SIMILARITY) -> "DossierStore":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format_version") != DOSSIER_VERSION:
+            raise ValueError(f"Unsupported dossier file version in {path}")
+        print(f"✅ Loaded {len(data['dossiers'])} character dossiers from {path}")
+        return cls(data["dossiers"], min_similarity)
+
+    def save(self, path: str = DOSSIERS_PATH) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "format_version": DOSSIER_VERSION,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "dossiers": self.dossiers,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        print(f"💾 Saved {len(self.dossiers)} character dossiers to {path}")
+
+    def get(self, story_id: str, character: Optional[str]) -> Optional[Dict]:
+        if not character or not character.strip():
+            return None
+        return self.dossiers.get(dossier_key(story_id, character))
+
+    def put(self, dossier: Dict) -> None:
+        self.dossiers[dossier_key(dossier["story_id"], dossier["character"])] = dossier
+
+    def evidence_for(
+        self,
+        claim: str,
+        story_id: str,
+        character_name: Optional[str],
+        vector_index,
+        top_k: int = 6,
+        sentence_index=None,
+    ) -> Optional[List[Dict]]:
+        """
+        Evidence list shaped like retrieve_evidence's output (at most top_k
+        items, fact summary included), or None when no dossier applies.
+        """
+        dossier = self.get(story_id, character_name)
+        if dossier is None or not dossier["passages"] or not claim or not claim.strip():
+            self._count("misses")
+            return None
+
+        claim_vec = vector_index.encode_query(claim)[0]
+
+        # One vector lookup for all passages; a merged passage is the mean of its chunks
+        all_ids = [cid for p in dossier["passages"] for cid in p["chunk_ids"]]
+        vectors = vector_index.get_vectors(all_ids)
+
+        ranked = []
+        offset = 0
+        for passage in dossier["passages"]:
+            n = len(passage["chunk_ids"])
+            vec = vectors[offset:offset + n].mean(axis=0)
+            vec /= max(np.linalg.norm(vec), 1e-12)
+            offset += n
+
+            item = {
+                "story_id": dossier["story_id"],
+                "chunk_id": passage["chunk_ids"][0],
+                "chunk_ids": list(passage["chunk_ids"]),
+                "start_char": passage["start_char"],
+                "end_char": passage["end_char"],
+                "text": passage["text"],
+                "score": float(vec @ claim_vec),
+            }
+            if passage.get("chunk_spans"):   # missing in older dossier files
+                item["chunk_spans"] = passage["chunk_spans"]
+            ranked.append(item)
+        ranked.sort(key=lambda x: x["score"], reverse=True)
+
+        # The fact summary takes one of the top_k slots
+        limit = max(1, top_k - 1) if dossier.get("summary") else top_k
+
+        if ranked[0]["score"] >= self.min_similarity:
+            evidence = ranked[:limit]
+            self._count("hits")
+        else:
+            # Not covered: search the story, best of both merged and capped
+            retrieved = retrieve_evidence(
+                claim=claim,
+                story_id=story_id,
+                vector_index=vector_index,
+                character_name=character_name,
+                top_k=limit,
+            )
+            evidence = []
+            for item in sorted(retrieved + ranked, key=lambda x: x["score"], reverse=True):
+                _add_to_spans(evidence, item)
+                if len(evidence) >= limit:
+                    break
+            evidence.sort(key=lambda x: x["score"], reverse=True)
+            self._count("searched")
+
+        if sentence_index is not None:
+            evidence = sentence_index.focus(claim, evidence)
+
+        if dossier.get("summary"):
+            evidence.insert(0, {
+                "story_id": dossier["story_id"],
+                "chunk_id": f"dossier:{dossier_key(story_id, character_name)}",
+                "chunk_ids": [],
+                "text": f"Known facts about {dossier['character']}:\n{dossier['summary']}",
+                "score": 1.0,
+                "dossier_summary": True,
+            })
+
+        return evidence
+
+    def summary(self) -> str:
+        total = self.hits + self.searched + self.misses
+        return (
+            f"Dossiers: {self.hits}/{total} rows served from a character dossier, "
+            f"{self.searched} searched as well (dossier below similarity {self.min_similarity})"
+            if total else "Dossiers: no lookups"
+        )
+
+
+if __name__ == "__main__":
+    # Offline build:
+    #   python -m retrieval.dossier --index-dir artifacts/index --summarize
+    import argparse
+    from collections import Counter
+
+    from indexing.local_vector_index import build_local_index
+    from ingestion.data_ingestion import read_claims
+
+    parser = argparse.ArgumentParser(description="Build per-character evidence dossiers")
+    parser.add_argument("--claims", nargs="+", default=["data/train.csv", "data/test.csv"])
+    parser.add_argument("--index-dir", default=None)
+    parser.add_argument("--out", default=DOSSIERS_PATH)
+    parser.add_argument("--max-passages", type=int, default=16)
+    parser.add_argument("--min-claims", type=int, default=2, help="Only characters with at least this many claims")
+    parser.add_argument("--summarize", action="store_true", help="Add a cached LLM fact summary per dossier")
+    args = parser.parse_args()
+
+    counts = Counter()
+    for path in args.claims:
+        for row in read_claims(path):
+            if row.char:
+                counts[(row.story_id, row.char)] += 1
+
+    index = build_local_index("data/novels", index_dir=args.index_dir)
+    store = DossierStore.load(args.out) if os.path.exists(args.out) else DossierStore()
+
+    llm = None
+    if args.summarize:
+        from config.llm_config import GeminiLLM
+        llm = GeminiLLM(model_name="models/gemini-flash-latest", temperature=0.0)
+
+    built = summarized = 0
+    for (story_id, character), n in counts.most_common():
+        if n < args.min_claims:
+            continue
+
+        dossier = build_dossier(index, story_id, character, max_passages=args.max_passages)
+        if dossier is None:
+            print(f"⚠️ No indexed mentions for {character} ({story_id}), skipped")
+            continue
+
+        # Keep a cached summary if the passages did not change
+        old = store.get(story_id, character)
+        if old is not None:
+            dossier["summary"] = old.get("summary")
+            dossier["summary_hash"] = old.get("summary_hash")
+
+        if llm is not None:
+            summarized += summarize_dossier(llm, dossier)
+
+        dossier["num_claims"] = n
+        store.put(dossier)
+        built += 1
+        print(f"{character} ({story_id}): {n} claims, {len(dossier['passages'])} passages")
+
+    print(f"\nBuilt {built} dossiers ({summarized} new summaries)")
+    store.save(args.out)
+    if llm is not None:
+        print(usage_tracker.summary())
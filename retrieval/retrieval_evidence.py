@@ -1,8 +1,122 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
+import numpy as np
 
-def normalize_story_id(s: str) -> str:
-    return s.strip().lower().replace(" ", "_")
+from ingestion.data_ingestion import normalize_story_id
+
+
+# Gap (in characters) up to which two hits count as adjacent
+MERGE_GAP_CHARS = 2
+
+
+# --------------------------------------------------
+# Diversification
+# --------------------------------------------------
+def mmr_order(
+    relevance: np.ndarray,
+    vectors: np.ndarray,
+    lambda_: float = 0.7,
+) -> List[int]:
+    """
+    Maximal marginal relevance ordering of all candidates.
+
+    Pairwise similarities come from one matrix product; each greedy
+    step is a vectorized update of the running max-similarity.
+    """
+    n = len(relevance)
+    if n == 0:
+        return []
+
+    sim = vectors @ vectors.T
+    max_sim = np.full(n, -np.inf, dtype="float32")
+    chosen = np.zeros(n, dtype=bool)
+    order = []
+
+    for _ in range(n):
+        redundancy = np.where(np.isfinite(max_sim), max_sim, 0.0)
+        mmr = lambda_ * relevance - (1.0 - lambda_) * redundancy
+        mmr[chosen] = -np.inf
+
+        best = int(np.argmax(mmr))
+        order.append(best)
+        chosen[best] = True
+        max_sim = np.maximum(max_sim, sim[best])
+
+    return order
+
+
+def _add_to_spans(spans: List[Dict], hit: Dict) -> None:
+    """
+    Adds a hit to the span list, merging it with every span of the same
+    story whose character range overlaps or touches it.
+    """
+    merged = dict(hit)
+    if "chunk_ids" not in merged:
+        merged["chunk_ids"] = [hit["chunk_id"]]
+        merged["chunk_spans"] = [[hit["start_char"], hit["end_char"]]]
+
+    remaining = []
+    for span in spans:
+        touches = (
+            span["story_id"] == merged["story_id"]
+            and span["start_char"] <= merged["end_char"] + MERGE_GAP_CHARS
+            and merged["start_char"] <= span["end_char"] + MERGE_GAP_CHARS
+        )
+        if touches:
+            merged = _merge_pair(span, merged)
+        else:
+            remaining.append(span)
+
+    remaining.append(merged)
+    spans[:] = remaining
+
+
+def _merge_pair(a: Dict, b: Dict) -> Dict:
+    if b["start_char"] < a["start_char"]:
+        a, b = b, a
+
+    if b["end_char"] <= a["end_char"]:
+        text = a["text"]
+    elif b["start_char"] <= a["end_char"]:
+        text = a["text"] + b["text"][a["end_char"] - b["start_char"]:]
+    else:
+        text = a["text"] + "\n" + b["text"]
+
+    # Chunk ids (and their novel offsets, unknown for older dossier
+    # passages) of both sides; a dossier passage may repeat retrieved chunks
+    a_ids = a.get("chunk_ids", [a["chunk_id"]])
+    b_ids = b.get("chunk_ids", [b["chunk_id"]])
+    new = [i for i, cid in enumerate(b_ids) if cid not in a_ids]
+
+    merged = dict(a)
+    merged.update({
+        "text": text,
+        "end_char": max(a["end_char"], b["end_char"]),
+        "score": max(a["score"], b["score"]),
+        "chunk_ids": a_ids + [b_ids[i] for i in new],
+    })
+    if "chunk_spans" in a and "chunk_spans" in b:
+        merged["chunk_spans"] = a["chunk_spans"] + [b["chunk_spans"][i] for i in new]
+    else:
+        merged.pop("chunk_spans", None)
+    return merged
+
+
+def span_segments(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int, int]]:
+    """
+    (start_char, end_char, text offset) of each contiguous novel range of
+    a span's text, given its chunks' (start_char, end_char). Mirrors
+    _merge_pair: ranges that do not overlap or touch are joined with a "\n".
+    """
+    segments = []
+    for start, end in sorted(ranges):
+        if segments and start <= segments[-1][1]:
+            s, e, offset = segments[-1]
+            segments[-1] = (s, max(e, end), offset)
+        else:
+            offset = segments[-1][2] + segments[-1][1] - segments[-1][0] + 1 if segments else 0
+            segments.append((start, end, offset))
+    return segments
 
 
 def retrieve_evidence(
@@ -12,9 +126,21 @@ def retrieve_evidence(
     character_name: str = None,
     top_k: int = 10,
     min_similarity: float = 0.03,
+    mmr_lambda: float = 0.7,
+    sentence_index=None,
 ) -> List[Dict]:
     """
     Robust dual-query retrieval with fallback.
+
+    When the index carries an entity mention index, the strict stage
+    only searches chunks that mention `character_name`.
+
+    The final selection runs MMR over the candidate embeddings and merges
+    overlapping / adjacent hits into single spans, so the result holds
+    up to top_k distinct passages with no duplicated text.
+
+    With a SentenceEvidenceIndex, each passage also gets an "excerpt"
+    holding only its best-matching sentences plus context.
     """
 
     if not claim or not claim.strip():
@@ -37,6 +163,7 @@ def retrieve_evidence(
             story_id=story_id_norm,
             top_k=top_k * 3,
             return_scores=True,
+            entity=character_name,
         )
         all_results.extend(results)
 
@@ -69,25 +196,71 @@ def retrieve_evidence(
         if cid not in merged or score > merged[cid]["score"]:
             merged[cid] = r
 
-    final = [
+    candidates = [
         v for v in merged.values()
         if v["score"] >= min_similarity
     ]
-    final.sort(key=lambda x: x["score"], reverse=True)
+    candidates.sort(key=lambda x: x["score"], reverse=True)
 
-    return final[:top_k]
+    # -------------------------------
+    # MMR diversification + span merging
+    # -------------------------------
+    if hasattr(vector_index, "get_vectors") and len(candidates) > 1:
+        vectors = vector_index.get_vectors([c["chunk_id"] for c in candidates])
+        relevance = np.asarray([c["score"] for c in candidates], dtype="float32")
+        order = mmr_order(relevance, vectors, mmr_lambda)
+    else:
+        order = range(len(candidates))
 
+    spans: List[Dict] = []
+    for i in order:
+        _add_to_spans(spans, candidates[i])
+        if len(spans) >= top_k:
+            break
+
+    spans.sort(key=lambda x: x["score"], reverse=True)
+
+    if sentence_index is not None:
+        spans = sentence_index.focus(claim, spans)
+
+    return spans
+
+
+def gather_evidence(
+    claim: str,
+    story_id: str,
+    vector_index,
+    character_name: str = None,
+    top_k: int = 10,
+    sentence_index=None,
+    dossiers=None,
+) -> List[Dict]:
+    """
+    Evidence for one claim as every runner gathers it: the character's
+    dossier (a DossierStore) when one applies, else retrieve_evidence.
+    """
+    if dossiers is not None:
+        evidence = dossiers.evidence_for(
+            claim, story_id, character_name, vector_index,
+            top_k=top_k, sentence_index=sentence_index,
+        )
+        if evidence is not None:
+            return evidence
+
+    return retrieve_evidence(
+        claim=claim,
+        story_id=story_id,
+        vector_index=vector_index,
+        character_name=character_name,
+        top_k=top_k,
+        sentence_index=sentence_index,
+    )
 
-if __name__ == "__main__":
-    from ingestion.data_ingestion import load_novels
-    from indexing.chunking import chunk_all_novels
-    from indexing.local_vector_index import LocalVectorIndex
 
-    novels = load_novels("data/novels")
-    chunks = chunk_all_novels(novels)
+if __name__ == "__main__":
+    from indexing.local_vector_index import build_local_index
 
-    index = LocalVectorIndex()
-    index.index_chunks(chunks)
+    index = build_local_index("data/novels")
 
     claim = (
         "Thalcave's people faded as colonists advanced; his father was the last "
@@ -0,0 +1,216 @@
+import re
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from retrieval.retrieval_evidence import span_segments
+
+
+# Sentence boundary: terminal punctuation, optional closing quote, whitespace
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])[\"'”’)]*\s+")
+
+
+def split_sentences(text: str, min_chars: int = 25) -> List[Tuple[int, int]]:
+    """
+    Sentence (start, end) offsets within text. Fragments shorter than
+    min_chars are folded into the following sentence.
+    """
+    spans = []
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        end = match.start() + len(match.group(0).rstrip())
+        if end - start >= min_chars:
+            spans.append((start, end))
+            start = match.end()
+    if start < len(text) and text[start:].strip():
+        spans.append((start, len(text)))
+    return spans
+
+
+class SentenceEvidenceIndex:
+    """
+    Lazily built sentence-level index inside retrieved chunks.
+
+    The first time a chunk is retrieved, it is split into sentences that
+    are embedded in one batch with the other new chunks of that query and
+    cached by chunk id, so a chunk is embedded once whichever merged span
+    it later turns up in. A span combines the cached sentences of its
+    chunks; scoring then keeps only the best sentences plus neighbouring
+    context as the evidence excerpt, so the sentence cost is paid only for
+    chunks that actually get retrieved.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_sentences: int = 3,
+        context: int = 1,
+        max_cached: int = 20000,
+        batch_size: int = 64,
+    ):
+        self.model = model
+        self.max_sentences = max_sentences
+        self.context = context
+        self.max_cached = max_cached
+        self.batch_size = batch_size
+
+        # chunk id -> (sentence novel offsets, sentence vectors)
+        self._cache: "OrderedDict[str, Tuple[List[Tuple[int, int]], np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --------------------------------------------------
+    # Span layout
+    # --------------------------------------------------
+    @staticmethod
+    def _pieces(chunk: Dict) -> List[Tuple[str, int, int]]:
+        """
+        (cache key, start_char, end_char) of each chunk in a span.
+        """
+        spans = chunk.get("chunk_spans")
+        if spans:
+            return [(cid, int(s), int(e)) for cid, (s, e) in zip(chunk["chunk_ids"], spans)]
+        # Passages from older dossier files: the whole span as one piece
+        key = "|".join(chunk.get("chunk_ids") or [chunk["chunk_id"]])
+        return [(key, int(chunk["start_char"]), int(chunk["end_char"]))]
+
+    @staticmethod
+    def _segments(pieces: List[Tuple[str, int, int]]) -> List[Tuple[int, int, int]]:
+        return span_segments([(start, end) for _, start, end in pieces])
+
+    @staticmethod
+    def _segment_of(segments: List[Tuple[int, int, int]], pos: int) -> int:
+        return bisect_right([s for s, _, _ in segments], pos) - 1
+
+    def _text_at(self, text: str, segments: List[Tuple[int, int, int]], start: int, end: int) -> str:
+        # Span text of the novel range [start, end), which lies in one segment
+        seg_start, _, offset = segments[self._segment_of(segments, start)]
+        begin = offset + start - seg_start
+        return text[begin:begin + end - start]
+
+    # --------------------------------------------------
+    # Sentence cache
+    # --------------------------------------------------
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            batch_size=self.batch_size,
+            show_progress_bar=False,
+        ).astype("float32")
+
+    def _ensure_cached(self, evidence: List[Dict], layouts: List[Tuple[List, List]]) -> None:
+        missing: Dict[str, Tuple[int, str]] = {}
+        with self._lock:
+            for chunk, (pieces, segments) in zip(evidence, layouts):
+                for key, start, end in pieces:
+                    if key not in self._cache and key not in missing:
+                        missing[key] = (start, self._text_at(chunk["text"], segments, start, end))
+
+        if not missing:
+            return
+
+        # One encode call for every sentence of every new chunk
+        all_spans, texts = [], []
+        for start, text in missing.values():
+            spans = split_sentences(text)
+            all_spans.append([(start + s, start + e) for s, e in spans])
+            texts.extend(text[s:e] for s, e in spans)
+
+        vectors = self._encode(texts) if texts else np.zeros((0, 0), dtype="float32")
+
+        with self._lock:
+            offset = 0
+            for key, spans in zip(missing, all_spans):
+                self._cache[key] = (spans, vectors[offset:offset + len(spans)])
+                offset += len(spans)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+
+    def _sentences(self, pieces: List[Tuple[str, int, int]]):
+        """
+        Sentence novel offsets and vectors of a span, in text order. Where
+        two chunks overlap, the sentence starting first (longest on ties)
+        wins, which drops the fragments cut at chunk edges.
+        """
+        candidates = []
+        with self._lock:
+            for key, _, _ in pieces:
+                entry = self._cache.get(key)
+                if entry is None:
+                    return [], None
+                self._cache.move_to_end(key)
+                candidates.extend(zip(entry[0], entry[1]))
+
+        spans, vectors = [], []
+        for (s, e), vec in sorted(candidates, key=lambda c: (c[0][0], -c[0][1])):
+            if spans and s < spans[-1][1]:
+                continue
+            spans.append((s, e))
+            vectors.append(vec)
+        return spans, (np.stack(vectors) if vectors else None)
+
+    # --------------------------------------------------
+    # Sentence selection
+    # --------------------------------------------------
+    def focus(self, claim: str, evidence: List[Dict]) -> List[Dict]:
+        """
+        Adds "excerpt" (best sentences + context, gaps marked with " … ")
+        and "excerpt_spans" (absolute novel offsets) to each evidence item.
+        """
+        if not evidence:
+            return evidence
+
+        layouts = []
+        for chunk in evidence:
+            pieces = self._pieces(chunk)
+            layouts.append((pieces, self._segments(pieces)))
+
+        self._ensure_cached(evidence, layouts)
+        query_vec = self._encode([claim])[0]
+
+        focused = []
+        for chunk, (pieces, segments) in zip(evidence, layouts):
+            spans, vectors = self._sentences(pieces)
+            chunk = dict(chunk)
+
+            if len(spans) <= self.max_sentences:
+                chunk["excerpt"] = chunk["text"]
+                chunk["excerpt_spans"] = [[s, e] for s, e, _ in segments]
+                focused.append(chunk)
+                continue
+
+            scores = vectors @ query_vec
+            best = np.argsort(-scores)[: self.max_sentences]
+
+            keep = set()
+            for i in best:
+                keep.update(range(max(0, i - self.context), min(len(spans), i + self.context + 1)))
+
+            # Group consecutive sentences of one novel range into passages
+            groups = []
+            for i in sorted(keep):
+                same_range = (
+                    groups and i == groups[-1][1] + 1
+                    and self._segment_of(segments, spans[i][0]) == self._segment_of(segments, spans[i - 1][0])
+                )
+                if same_range:
+                    groups[-1][1] = i
+                else:
+                    groups.append([i, i])
+
+            parts, abs_spans = [], []
+            for first, last in groups:
+                s, e = spans[first][0], spans[last][1]
+                parts.append(self._text_at(chunk["text"], segments, s, e).strip())
+                abs_spans.append([s, e])
+
+            chunk["excerpt"] = " … ".join(parts)
+            chunk["excerpt_spans"] = abs_spans
+            chunk["sentence_score"] = float(scores[best[0]])
+            focused.append(chunk)
+
+        return focused
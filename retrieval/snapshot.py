@@ -0,0 +1,256 @@
+import gzip
+import hashlib
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ingestion.data_ingestion import load_novels
+
+
+# --------------------------------------------------
+# Frozen evidence snapshots
+# --------------------------------------------------
+# Each row's retrieved evidence, saved so reasoning experiments (prompts,
+# parsers, escalation) can replay it without loading the retriever:
+#
+#   python -m retrieval.snapshot --claims data/train.csv --out artifacts/evidence_train.jsonl.gz
+#   python replay_reasoning.py --snapshot artifacts/evidence_train.jsonl.gz
+#
+# gzip JSONL: a header line (format, retrieval config + hash, novel
+# fingerprints), then one line per row. Passage text is stored as novel
+# offsets (chunk ids, start/end, excerpt spans, scores) and rebuilt from
+# data/novels on load; only text that is not a plain novel slice (e.g.
+# gap-merged spans, dossier summaries) is stored inline.
+
+FORMAT_VERSION = 1
+SNAPSHOT_PATH = "artifacts/evidence_{split}.jsonl.gz"
+EXCERPT_GAP = " … "
+
+
+def config_hash(config: Dict) -> str:
+    blob = json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+def retrieval_config(
+    index,
+    top_k: int,
+    sentence_evidence: bool = False,
+    dossiers_path: Optional[str] = None,
+) -> Dict:
+    """
+    Everything that decides which evidence a row gets.
+    """
+    from indexing.chunking import CHUNK_SIZE_CHARS, OVERLAP_CHARS
+
+    dossiers = None
+    if dossiers_path:
+        with open(dossiers_path, "rb") as f:
+            dossiers = {"path": dossiers_path, "sha256": hashlib.sha256(f.read()).hexdigest()[:16]}
+
+    return {
+        "index": type(index).__name__,
+        "embedding_model": getattr(getattr(index, "base", index), "embedding_model", None),
+        "chunk_size": CHUNK_SIZE_CHARS,
+        "overlap": OVERLAP_CHARS,
+        "top_k": top_k,
+        "sentence_evidence": sentence_evidence,
+        "dossiers": dossiers,
+    }
+
+
+def _fingerprint(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _to_json(value):
+    # numpy scalars / arrays from the chunk store
+    return value.item() if hasattr(value, "item") and getattr(value, "ndim", 0) == 0 else value.tolist()
+
+
+def _slice(novel: Optional[str], item: Dict) -> Optional[str]:
+    if novel is None or "start_char" not in item or "end_char" not in item:
+        return None
+    return novel[int(item["start_char"]):int(item["end_char"])]
+
+
+def _excerpt(novel: Optional[str], spans) -> Optional[str]:
+    if novel is None or not spans:
+        return None
+    return EXCERPT_GAP.join(novel[int(s):int(e)].strip() for s, e in spans)
+
+
+# --------------------------------------------------
+# Writing
+# --------------------------------------------------
+class SnapshotWriter:
+    """
+    Streams rows to "<path>.tmp"; close() renames it into place.
+    """
+
+    def __init__(self, path: str, config: Dict, claims: str, novels_dir: str = "data/novels"):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.novels = load_novels(novels_dir)
+        self.rows = 0
+        self.passages = 0
+        self.inline = 0     # passages whose text is not a novel slice
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = gzip.open(self.tmp_path, "wt", encoding="utf-8")
+        self._write({
+            "format_version": FORMAT_VERSION,
+            "config": config,
+            "config_hash": config_hash(config),
+            "claims": claims,
+            "novels": {sid: _fingerprint(text) for sid, text in sorted(self.novels.items())},
+        })
+
+    def _write(self, obj: Dict) -> None:
+        self._file.write(json.dumps(obj, ensure_ascii=False, default=_to_json) + "\n")
+
+    def _pack(self, item: Dict) -> Dict:
+        packed = {k: v for k, v in item.items() if k not in ("text", "excerpt")}
+        novel = self.novels.get(item.get("story_id"))
+
+        if _slice(novel, item) != item["text"]:
+            packed["text"] = item["text"]
+            self.inline += 1
+        if "excerpt" in item and _excerpt(novel, item.get("excerpt_spans")) != item["excerpt"]:
+            packed["excerpt"] = item["excerpt"]
+        return packed
+
+    def write(self, row, evidence: List[Dict]) -> None:
+        self._write({
+            "row_index": row.row_index,
+            "id": row.id,
+            "evidence": [self._pack(item) for item in evidence],
+        })
+        self.rows += 1
+        self.passages += len(evidence)
+
+    def close(self) -> None:
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+        print(
+            f"💾 Saved evidence for {self.rows} rows to {self.path} "
+            f"({self.passages} passages, {self.inline} stored inline)"
+        )
+
+
+# --------------------------------------------------
+# Reading (no faiss / torch)
+# --------------------------------------------------
+class EvidenceSnapshot:
+    """
+    Iterates (row_index, id, evidence) with passage text rebuilt from the
+    novels. Refuses to load if a referenced novel changed since the
+    snapshot was taken, as the offsets would point at the wrong text.
+    """
+
+    def __init__(self, path: str, novels_dir: str = "data/novels"):
+        self.path = path
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+
+        if header.get("format_version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported snapshot format {header.get('format_version')} in {path}, "
+                f"expected {FORMAT_VERSION}"
+            )
+        self.config = header["config"]
+        self.config_hash = header["config_hash"]
+        self.claims = header.get("claims")
+
+        self.novels = load_novels(novels_dir)
+        changed = [
+            sid for sid, fp in header["novels"].items()
+            if sid in self.novels and _fingerprint(self.novels[sid]) != fp
+        ]
+        if changed:
+            raise ValueError(f"Novels changed since {path} was taken: {changed}; rebuild the snapshot")
+
+    def _unpack(self, packed: Dict) -> Dict:
+        item = dict(packed)
+        novel = self.novels.get(item.get("story_id"))
+
+        if "text" not in item:
+            text = _slice(novel, item)
+            if text is None:
+                raise ValueError(f"Cannot rebuild passage {item.get('chunk_id')}: novel not found")
+            item["text"] = text
+        if "excerpt_spans" in item and "excerpt" not in item:
+            item["excerpt"] = _excerpt(novel, item["excerpt_spans"])
+        return item
+
+    def __iter__(self) -> Iterator[Tuple[int, str, List[Dict]]]:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            f.readline()   # header
+            for line in f:
+                entry = json.loads(line)
+                yield entry["row_index"], entry["id"], [self._unpack(p) for p in entry["evidence"]]
+
+
+# --------------------------------------------------
+# CLI: retrieval only
+# --------------------------------------------------
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from execution import resources
+    from execution.claim_stages import retrieval_stage
+    from execution.staged_executor import StagedExecutor
+    from ingestion.data_ingestion import ClaimReader
+    from indexing.hierarchical_index import HierarchicalIndex
+    from indexing.local_vector_index import build_local_index
+    from retrieval.dossier import DossierStore
+    from retrieval.retrieval_evidence import gather_evidence
+    from retrieval.sentence_index import SentenceEvidenceIndex
+
+    parser = argparse.ArgumentParser(description="Run retrieval only and save an evidence snapshot")
+    parser.add_argument("--claims", default="data/train.csv")
+    parser.add_argument("--out", default=None, help=f"Default: {SNAPSHOT_PATH.format(split='<claims name>')}")
+    parser.add_argument("--index-dir", default=None)
+    parser.add_argument("--top-k", type=int, default=12, help="Covers the largest escalation step")
+    parser.add_argument("--hierarchical", action="store_true")
+    parser.add_argument("--sentence-evidence", action="store_true")
+    parser.add_argument("--dossiers", default=None)
+    parser.add_argument("--cores", type=int, default=None)
+    args = parser.parse_args()
+
+    split = os.path.splitext(os.path.basename(args.claims))[0]
+    out = args.out or SNAPSHOT_PATH.format(split=split)
+    plan = resources.configure("batch", args.cores)
+
+    index = build_local_index("data/novels", index_dir=args.index_dir, plan=plan)
+    if args.hierarchical:
+        index = HierarchicalIndex(index)
+    sentence_index = SentenceEvidenceIndex(index.model) if args.sentence_evidence else None
+    dossiers = DossierStore.load(args.dossiers) if args.dossiers else None
+
+    def retrieve(row):
+        return gather_evidence(
+            claim=row.backstory,
+            story_id=row.story_id,
+            vector_index=index,
+            character_name=row.char,
+            top_k=args.top_k,
+            sentence_index=sentence_index,
+            dossiers=dossiers,
+        )
+
+    config = retrieval_config(index, args.top_k, args.sentence_evidence, args.dossiers)
+    writer = SnapshotWriter(out, config, claims=args.claims)
+    executor = StagedExecutor([retrieval_stage(retrieve, plan.retrieval_workers)])
+
+    t0 = time.time()
+    with ClaimReader(args.claims, required=("id", "backstory", "char")) as reader:
+        for row, evidence in executor.run(reader):
+            writer.write(row, evidence)
+    writer.close()
+
+    print(f"Config hash {config_hash(config)}; retrieval took {time.time() - t0:.1f}s")
+    print(executor.summary())
+    if args.hierarchical:
+        print(index.summary())